@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Usuario
+
+# Datos del usuario que se firman dentro del token y bastan para los permisos
+CLAIMS_USUARIO = ('username', 'nombre', 'rol')
+
+
+def tokens_para_usuario(user):
+    refresh = RefreshToken.for_user(user)
+    for claim in CLAIMS_USUARIO:
+        refresh[claim] = getattr(user, claim)
+    return refresh
+
+
+class JWTClaimsAuthentication(JWTAuthentication):
+    # Con API_JWT_SIN_CONSULTA activo construye el usuario a partir de los claims
+    # firmados (id, username, nombre, rol) sin consultar la base. El resto de campos
+    # quedan diferidos y Django los carga solo si se accede a ellos. Un cambio de rol
+    # o una baja no se aplica hasta que el token expira (ACCESS_TOKEN_LIFETIME).
+    def get_user(self, validated_token):
+        if not getattr(settings, 'API_JWT_SIN_CONSULTA', False):
+            return super().get_user(validated_token)
+        if any(claim not in validated_token for claim in CLAIMS_USUARIO):
+            # Tokens emitidos antes de incluir los claims
+            return super().get_user(validated_token)
+
+        user_id = validated_token.get(jwt_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        datos = {'id': int(user_id), **{claim: validated_token[claim] for claim in CLAIMS_USUARIO}}
+        # from_db espera los valores en el orden de los campos del modelo
+        campos = [campo.attname for campo in Usuario._meta.concrete_fields if campo.attname in datos]
+        return Usuario.from_db(DEFAULT_DB_ALIAS, campos, [datos[campo] for campo in campos])
+
+
+async def autenticar_asincrono(request, token=None):
+    # Autenticación JWT para las vistas asíncronas: el usuario sale de los claims
+    # (API_JWT_SIN_CONSULTA) o de una consulta con el ORM asíncrono. None si no es válido.
+    autenticacion = JWTClaimsAuthentication()
+    try:
+        if token is None:
+            header = autenticacion.get_header(request)
+            token = autenticacion.get_raw_token(header) if header is not None else None
+        if not token:
+            return None
+        validado = autenticacion.get_validated_token(token)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+    if getattr(settings, 'API_JWT_SIN_CONSULTA', False) and all(claim in validado for claim in CLAIMS_USUARIO):
+        return autenticacion.get_user(validado)
+    try:
+        usuario = await Usuario.objects.aget(pk=validado[jwt_settings.USER_ID_CLAIM])
+    except (KeyError, Usuario.DoesNotExist):
+        return None
+    return usuario if usuario.is_active else None
@@ -0,0 +1,87 @@
+import re
+from heapq import merge
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+# Búsqueda de texto completo en nombre y descripción de tareas y proyectos
+# (/api/search/). Los índices los crea la migración 0009_busqueda_texto: FULLTEXT en
+# MySQL y tablas FTS5 "<tabla>_busqueda" en SQLite. La relevancia y el corte de la
+# página se calculan en la base de datos sobre el queryset visible del usuario.
+
+# Configuración por defecto; se sobrescribe con API_BUSQUEDA en settings.py
+BUSQUEDA_POR_DEFECTO = {
+    'MIN_LONGITUD': 3,  # términos más cortos se ignoran (innodb_ft_min_token_size)
+    'MAX_TERMINOS': 8,
+    # Límite de offset + page_size: cada página ordena todas las coincidencias hasta ahí
+    'MAX_RESULTADOS': 1000,
+}
+
+
+def configuracion():
+    return {**BUSQUEDA_POR_DEFECTO, **getattr(settings, 'API_BUSQUEDA', {})}
+
+
+def terminos(texto):
+    # Palabras de la búsqueda sin operadores: el usuario no puede inyectar sintaxis
+    # de MATCH; cada término se busca como prefijo y deben aparecer todos
+    config = configuracion()
+    palabras = [palabra for palabra in re.findall(r'\w+', texto.lower()) if len(palabra) >= config['MIN_LONGITUD']]
+    return list(dict.fromkeys(palabras))[:config['MAX_TERMINOS']]
+
+
+def ranking(queryset, palabras):
+    # Queryset de (id, relevancia) de las filas que contienen todos los términos,
+    # de la más relevante a la menos
+    tabla = queryset.model._meta.db_table
+    if connection.vendor == 'mysql':
+        expresion = ' '.join(f'+{palabra}*' for palabra in palabras)
+        coincidencia = f'MATCH ({tabla}.nombre, {tabla}.descripcion) AGAINST (%s IN BOOLEAN MODE)'
+        queryset = queryset.filter(RawSQL(coincidencia, [expresion], output_field=BooleanField())).annotate(
+            relevancia=RawSQL(coincidencia, [expresion], output_field=FloatField())
+        )
+    elif connection.vendor == 'sqlite':
+        fts = f'{tabla}_busqueda'
+        expresion = ' '.join(f'"{palabra}"*' for palabra in palabras)
+        # bm25 es menor cuanto más relevante; el nombre pesa el doble que la descripción
+        queryset = queryset.extra(
+            tables=[fts],
+            where=[f'{fts}.rowid = {tabla}.id', f'{fts} MATCH %s'],
+            params=[expresion],
+            select={'relevancia': f'-bm25({fts}, 2.0, 1.0)'},
+        )
+    else:
+        # Sin índice de texto: LIKE por término, sin relevancia
+        for palabra in palabras:
+            queryset = queryset.filter(Q(nombre__icontains=palabra) | Q(descripcion__icontains=palabra))
+        queryset = queryset.annotate(relevancia=Value(0.0, output_field=FloatField()))
+    return queryset.order_by('-relevancia', 'id').values_list('relevancia', 'id')
+
+
+def buscar(palabras, consultas, offset, limite):
+    # consultas: (tipo, queryset visible, LecturaValores). Cada tabla aporta sus
+    # offset + limite + 1 mejores filas, se mezclan por relevancia y se representa
+    # solo la página. Devuelve los resultados y si hay más.
+    fin = offset + limite + 1
+    listas = [
+        [(-relevancia, tipo, objeto_id) for relevancia, objeto_id in ranking(queryset, palabras)[:fin]]
+        for tipo, queryset, _ in consultas
+    ]
+    pagina = list(merge(*listas))[offset:fin]
+    hay_mas = len(pagina) > limite
+    pagina = pagina[:limite]
+
+    objetos = {}
+    for tipo, queryset, lectura in consultas:
+        ids = [objeto_id for _, tipo_fila, objeto_id in pagina if tipo_fila == tipo]
+        if ids:
+            filas = lectura.representar(queryset.filter(id__in=ids).values(*lectura.columnas))
+            objetos.update(((tipo, fila['id']), fila) for fila in filas)
+
+    resultados = [
+        {'tipo': tipo, 'relevancia': round(-orden, 4), 'objeto': objetos[tipo, objeto_id]}
+        for orden, tipo, objeto_id in pagina if (tipo, objeto_id) in objetos
+    ]
+    return resultados, hay_mas
@@ -0,0 +1,148 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework.response import Response
+
+from . import replicas
+from .etags import alcance, etag_coincide, no_modificado
+from .renderers import renderizar_json
+
+# Versión global de las lecturas cacheadas: cualquier cambio en Tarea, Proyecto o
+# Usuario la incrementa (ver signals.py) y deja obsoletas todas las claves anteriores
+CLAVE_VERSION = 'api:lecturas:version'
+# Invalidación reciente (menos de API_REPLICAS['PEGAJOSO'] segundos), con réplicas de lectura
+CLAVE_INVALIDADA = 'api:lecturas:invalidada'
+
+_metricas = Counter()
+_metricas_lock = threading.Lock()
+
+
+def _cache():
+    return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+
+def _contar(evento, vista):
+    with _metricas_lock:
+        _metricas[evento] += 1
+        _metricas[f'{evento}:{vista}'] += 1
+
+
+def metricas():
+    with _metricas_lock:
+        return dict(_metricas)
+
+
+def version_actual():
+    cache = _cache()
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        cache.add(CLAVE_VERSION, 1, timeout=None)
+        version = cache.get(CLAVE_VERSION, 1)
+    return version
+
+
+async def aversion_actual():
+    cache = _cache()
+    version = await cache.aget(CLAVE_VERSION)
+    if version is None:
+        await cache.aadd(CLAVE_VERSION, 1, timeout=None)
+        version = await cache.aget(CLAVE_VERSION, 1)
+    return version
+
+
+def invalidar_lecturas():
+    cache = _cache()
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        # La clave no existía (cache vacía o reiniciada)
+        cache.set(CLAVE_VERSION, 2, timeout=None)
+    config = replicas.configuracion()
+    if config['ALIAS']:
+        cache.set(CLAVE_INVALIDADA, time.time(), timeout=config['PEGAJOSO'])
+
+
+def guardable():
+    # Una lectura de una réplica justo después de una invalidación puede no incluir
+    # aún la escritura que la provocó: no se guarda bajo la versión nueva
+    return not replicas.en_replica() or _cache().get(CLAVE_INVALIDADA) is None
+
+
+def clave_lectura(request, vista, version=None):
+    # Por rol y usuario, con el mismo alcance con el que se firma el ETag guardado
+    ruta = hashlib.md5(f'{request.get_host()}{request.get_full_path()}'.encode()).hexdigest()
+    if version is None:
+        version = version_actual()
+    return f'api:{vista}:{alcance(request)}:{version}:{ruta}'
+
+
+def respuesta_cacheada(request, vista, construir, calcular_etag=None):
+    # Devuelve la respuesta guardada o la construye con construir() y la guarda si es 200.
+    # El ETag se guarda junto a los datos: un acierto responde 304 sin consultar la base.
+    cache = _cache()
+    clave = clave_lectura(request, vista)
+    entrada = cache.get(clave)
+    if entrada is not None:
+        _contar('hits', vista)
+        datos, etag = entrada
+        if etag_coincide(request, etag):
+            response = no_modificado(etag)
+        else:
+            response = Response(datos)
+            if etag is not None:
+                response['ETag'] = etag
+        response['X-Cache'] = 'HIT'
+        return response
+
+    _contar('misses', vista)
+    etag = calcular_etag() if calcular_etag is not None else None
+    if etag_coincide(request, etag):
+        response = no_modificado(etag)
+    else:
+        response = construir()
+        if response.status_code == 200 and guardable():
+            cache.set(clave, (response.data, etag), timeout=getattr(settings, 'API_CACHE_TIMEOUT', 300))
+            if etag is not None:
+                response['ETag'] = etag
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+async def arespuesta_cacheada(request, vista, construir, calcular_etag=None):
+    # Versión para las vistas asíncronas: construir y calcular_etag son corrutinas y
+    # construir devuelve los datos. Comparte las entradas con respuesta_cacheada.
+    cache = _cache()
+    clave = clave_lectura(request, vista, await aversion_actual())
+    entrada = await cache.aget(clave)
+    if entrada is not None:
+        _contar('hits', vista)
+        datos, etag = entrada
+        estado_cache = 'HIT'
+    else:
+        _contar('misses', vista)
+        datos = None
+        etag = await calcular_etag() if calcular_etag is not None else None
+        estado_cache = 'MISS'
+
+    if etag_coincide(request, etag):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+    else:
+        if datos is None:
+            datos = await construir()
+            await cache.aset(clave, (datos, etag), timeout=getattr(settings, 'API_CACHE_TIMEOUT', 300))
+        response = respuesta_json(datos)
+        if etag is not None:
+            response['ETag'] = etag
+    response['X-Cache'] = estado_cache
+    return response
+
+
+def respuesta_json(datos, status=200):
+    # Mismo JSON que el renderer de DRF configurado (compacto y sin escapar unicode)
+    return HttpResponse(renderizar_json(datos), status=status, content_type='application/json')
@@ -0,0 +1,181 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .models import Cambio, CompactacionCambios, Tarea
+
+# Registro de cambios para la sincronización incremental (/api/sync/). Cada escritura
+# de Proyecto, Tarea o Alerta añade una fila por usuario afectado: el dueño actual y,
+# si el objeto cambia de dueño, el anterior (que recibe una lápida). Editar un proyecto
+# añade además una sola fila para todas sus tareas. La vista resuelve el estado final
+# de cada objeto al leer, así que el orden de las filas no importa.
+
+# Configuración por defecto; se sobrescribe con API_SYNC en settings.py
+SYNC_POR_DEFECTO = {
+    'LOTE': 1000,  # cambios por respuesta de /api/sync/
+    # Segundos que se espera antes de entregar un cambio: un id menor puede confirmarse
+    # después de uno mayor y el cursor lo saltaría
+    'MARGEN': 2,
+    'RETENCION_DIAS': 30,  # compactar_cambios elimina los cambios más antiguos
+}
+
+LOTE = 1000  # filas por INSERT o DELETE
+
+
+def configuracion():
+    return {**SYNC_POR_DEFECTO, **getattr(settings, 'API_SYNC', {})}
+
+
+def dueno(objeto):
+    # Usuario que ve el objeto sin ser admin (ver views.*_visibles)
+    if isinstance(objeto, Tarea):
+        return objeto.asignada_a_id
+    return objeto.usuario_id
+
+
+def modelo(objeto):
+    return objeto._meta.model_name
+
+
+def recordar(objeto):
+    # Dueño con el que se cargó el objeto (se lee de __dict__ por si está diferido)
+    campo = 'asignada_a_id' if isinstance(objeto, Tarea) else 'usuario_id'
+    objeto._dueno_original = objeto.__dict__.get(campo) if objeto.pk is not None else None
+
+
+def registrar(objetos, eliminados=False):
+    cambios = []
+    for objeto in objetos:
+        if objeto.pk is None:
+            # Un objeto sin id no llegaría nunca a /api/sync/ (bulk_create en MySQL:
+            # ver api/insercion.py)
+            raise ValueError(f'No se puede registrar el cambio de {modelo(objeto)} sin id.')
+        actual = dueno(objeto)
+        original = getattr(objeto, '_dueno_original', None)
+        cambios.append(Cambio(modelo=modelo(objeto), objeto_id=objeto.pk, usuario_id=original or actual))
+        if not eliminados and original is not None and original != actual:
+            # Reasignado: lápida para el dueño anterior y alta para el nuevo
+            cambios.append(Cambio(modelo=modelo(objeto), objeto_id=objeto.pk, usuario_id=actual))
+        objeto._dueno_original = None if eliminados else actual
+    Cambio.objects.bulk_create(cambios, batch_size=LOTE)
+
+
+def registrar_tareas_de_proyecto(proyecto):
+    # Las tareas incluyen los datos de su proyecto: al editarlo cambian todas. Una sola
+    # fila para el proyecto; la vista la expande a sus tareas (representar_cambios)
+    Cambio.objects.create(modelo=Cambio.TAREAS, objeto_id=proyecto.pk, usuario_id=proyecto.usuario_id)
+
+
+def registrar_alertas_de_usuarios(usuario_ids, desde):
+    # Cambios en bloque sin ids (UPDATE de visibilidad o mark-all-read): la vista
+    # devuelve las alertas del usuario con updated_at >= desde
+    Cambio.objects.bulk_create(
+        [Cambio(modelo=Cambio.ALERTA, objeto_id=None, usuario_id=usuario_id, fecha=desde) for usuario_id in set(usuario_ids)],
+        batch_size=LOTE,
+    )
+
+
+def ultimo_cursor():
+    return Cambio.objects.aggregate(ultimo=Max('id'))['ultimo'] or 0
+
+
+def horizonte():
+    return CompactacionCambios.objects.aggregate(hasta=Max('hasta'))['hasta'] or 0
+
+
+def pendientes(usuario, cursor, limite):
+    # Cambios visibles para el usuario después del cursor; los admin ven todos los de
+    # proyectos y tareas y solo sus propias alertas
+    cambios = Cambio.objects.filter(id__gt=cursor, fecha__lte=timezone.now() - timedelta(seconds=configuracion()['MARGEN']))
+    if usuario.rol == 'admin':
+        cambios = cambios.filter(Q(usuario=usuario) | Q(modelo__in=(Cambio.PROYECTO, Cambio.TAREA, Cambio.TAREAS)))
+    else:
+        # Y los de proyectos en los que tiene tareas asignadas
+        proyectos = Tarea.objects.filter(asignada_a=usuario).values('proyecto_id')
+        cambios = cambios.filter(Q(usuario=usuario) | Q(modelo=Cambio.TAREAS, objeto_id__in=proyectos))
+    return list(cambios.order_by('id').values('id', 'modelo', 'objeto_id', 'fecha')[:limite + 1])
+
+
+def compactar(antes_de):
+    # 1) De varias filas de un mismo objeto y usuario basta la última: cualquier cursor
+    #    anterior a ella la sigue recibiendo. 2) Las filas anteriores a antes_de se
+    #    eliminan y los cursores más antiguos pasan a ser inválidos (410).
+    duplicados = (
+        Cambio.objects.filter(objeto_id__isnull=False)
+        .values('modelo', 'objeto_id', 'usuario_id')
+        .annotate(ultimo=Max('id'), filas=Count('id'))
+        .filter(filas__gt=1)
+        .order_by()
+    )
+    colapsados = 0
+    condiciones = []
+    for fila in duplicados.iterator():
+        condiciones.append(Q(modelo=fila['modelo'], objeto_id=fila['objeto_id'],
+                             usuario_id=fila['usuario_id'], id__lt=fila['ultimo']))
+        if len(condiciones) >= 500:
+            colapsados += _borrar(condiciones)
+            condiciones = []
+    if condiciones:
+        colapsados += _borrar(condiciones)
+
+    expirados = 0
+    hasta = Cambio.objects.filter(fecha__lt=antes_de).aggregate(hasta=Max('id'))['hasta']
+    if hasta is not None:
+        # El horizonte va primero: si el borrado se interrumpe, los cursores anteriores
+        # ya reciben 410 en lugar de un resultado incompleto
+        CompactacionCambios.objects.create(hasta=hasta)
+        # Por rangos de id, sin un DELETE que bloquee toda la tabla
+        while True:
+            ids = list(Cambio.objects.filter(id__lte=hasta).order_by('id').values_list('id', flat=True)[:LOTE])
+            if not ids:
+                break
+            expirados += Cambio.objects.filter(id__gte=ids[0], id__lte=ids[-1]).delete()[0]
+    return colapsados, expirados
+
+
+def _borrar(condiciones):
+    filtro = Q()
+    for condicion in condiciones:
+        filtro |= condicion
+    return Cambio.objects.filter(filtro).delete()[0]
+
+
+def representar_cambios(cambios, consultas):
+    # consultas: (modelo, clave, queryset visible, LecturaValores). Devuelve, por clave,
+    # los objetos actuales y los ids que ya no existen o que el usuario ya no ve.
+    resultado = {}
+    for nombre, clave, queryset, lectura in consultas:
+        filas = [cambio for cambio in cambios if cambio['modelo'] == nombre]
+        ids = {cambio['objeto_id'] for cambio in filas if cambio['objeto_id'] is not None}
+        desde = min((cambio['fecha'] for cambio in filas if cambio['objeto_id'] is None), default=None)
+        proyectos = set()
+        if nombre == Cambio.TAREA:
+            proyectos = {cambio['objeto_id'] for cambio in cambios if cambio['modelo'] == Cambio.TAREAS}
+        if not ids and desde is None and not proyectos:
+            resultado[clave] = {'actualizados': [], 'eliminados': []}
+            continue
+
+        filtro = Q(id__in=ids)
+        if desde is not None:
+            filtro |= Q(updated_at__gte=desde)
+        if proyectos:
+            filtro |= Q(proyecto_id__in=proyectos)
+        actuales = lectura.representar(queryset.filter(filtro).order_by('id').values(*lectura.columnas))
+        vistos = {actual['id'] for actual in actuales}
+        resultado[clave] = {
+            'actualizados': actuales,
+            'eliminados': sorted(ids - vistos),
+        }
+    return resultado
+
+
+def sincronizar(usuario, cursor, consultas):
+    limite = configuracion()['LOTE']
+    cambios = pendientes(usuario, cursor, limite)
+    return {
+        'cursor': str(cambios[min(len(cambios), limite) - 1]['id'] if cambios else cursor),
+        'mas': len(cambios) > limite,
+        **representar_cambios(cambios[:limite], consultas),
+    }
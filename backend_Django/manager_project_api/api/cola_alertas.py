@@ -0,0 +1,178 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.module_loading import import_string
+
+from . import cambios, insercion
+from .models import Alerta
+from .realtime import publicar_alertas
+
+logger = logging.getLogger(__name__)
+
+# Configuración por defecto; se sobrescribe con ALERTAS_COLA en settings.py
+COLA_POR_DEFECTO = {
+    'BACKEND': 'api.cola_alertas.ColaEnProceso',
+    'TAMANO_LOTE': 500,  # máximo de alertas por bulk_create
+    'INTERVALO': 0.2,  # segundos que se esperan para agrupar alertas en un lote
+}
+
+
+def escribir_alertas(alertas):
+    # Un solo INSERT por lote; se publican en tiempo real al confirmar. Los ids se leen
+    # de vuelta si la base no los devuelve (MySQL): el cliente los necesita para
+    # ocultar o eliminar la alerta y /api/sync/ para registrarla.
+    with transaction.atomic():
+        insercion.crear(Alerta, alertas, ('usuario_id', 'mensaje'))
+        cambios.registrar(alertas)
+    transaction.on_commit(lambda: publicar_alertas(alertas))
+
+
+# Escribe las alertas dentro de la petición (modo para tests o despliegues simples)
+class ColaSincrona:
+    def __init__(self, **opciones):
+        pass
+
+    def encolar(self, alertas):
+        escribir_alertas(alertas)
+
+    def vaciar(self):
+        pass
+
+
+# Hilo de fondo que agrupa las alertas recibidas y las escribe con bulk_create
+class ColaEnProceso:
+    def __init__(self, TAMANO_LOTE=500, INTERVALO=0.2, **opciones):
+        self.tamano_lote = TAMANO_LOTE
+        self.intervalo = INTERVALO
+        self._cola = queue.Queue()
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._pid = None
+
+    def encolar(self, alertas):
+        # Solo se encolan si la transacción de la petición se confirma
+        transaction.on_commit(lambda: self._poner(alertas))
+
+    def _poner(self, alertas):
+        self._iniciar()
+        for alerta in alertas:
+            self._cola.put(self._codificar(alerta))
+
+    def vaciar(self):
+        # Espera a que se escriban todas las alertas pendientes
+        if self._hilo is not None and self._hilo.is_alive():
+            self._cola.join()
+
+    def _iniciar(self):
+        # El hilo se crea al primer uso y de nuevo tras un fork del servidor
+        if self._hilo is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._hilo is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._hilo = threading.Thread(target=self._trabajar, name='cola-alertas', daemon=True)
+            self._hilo.start()
+
+    def _trabajar(self):
+        while True:
+            lote = [self._cola.get()]
+            limite = time.monotonic() + self.intervalo
+            while len(lote) < self.tamano_lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._cola.get(timeout=restante))
+                except queue.Empty:
+                    break
+            self._escribir(lote)
+
+    def _escribir(self, lote):
+        try:
+            close_old_connections()
+            escribir_alertas([self._decodificar(mensaje) for mensaje in lote])
+        except Exception:
+            logger.exception("No se pudieron escribir %s alertas", len(lote))
+        finally:
+            for _ in lote:
+                self._cola.task_done()
+
+    def _codificar(self, alerta):
+        return alerta
+
+    def _decodificar(self, mensaje):
+        return mensaje
+
+
+# Sustituto local de un broker externo (Redis, RabbitMQ...): los mensajes viajan
+# serializados en JSON, como lo harían por la red, y un consumidor los escribe por lotes
+class ColaBrokerLocal(ColaEnProceso):
+    def _codificar(self, alerta):
+        return json.dumps({
+            'usuario': alerta.usuario_id,
+            'mensaje': alerta.mensaje,
+            'fecha_emision': alerta.fecha_emision.isoformat(),
+        }).encode()
+
+    def _decodificar(self, mensaje):
+        datos = json.loads(mensaje)
+        return Alerta(
+            usuario_id=datos['usuario'],
+            mensaje=datos['mensaje'],
+            fecha_emision=parse_datetime(datos['fecha_emision']),
+        )
+
+
+_cola = None
+_cola_lock = threading.Lock()
+
+
+def obtener_cola():
+    global _cola
+    if _cola is None:
+        with _cola_lock:
+            if _cola is None:
+                opciones = {**COLA_POR_DEFECTO, **getattr(settings, 'ALERTAS_COLA', {})}
+                _cola = import_string(opciones.pop('BACKEND'))(**opciones)
+    return _cola
+
+
+@receiver(setting_changed)
+def reiniciar_cola(setting, **kwargs):
+    # Permite cambiar de backend con override_settings en los tests
+    global _cola
+    if setting == 'ALERTAS_COLA':
+        _cola = None
+
+
+@atexit.register
+def vaciar_al_salir():
+    if _cola is not None:
+        _cola.vaciar()
+
+
+def emitir_alertas(alertas):
+    # alertas: iterable de (usuario, mensaje); la escritura la hace la cola configurada
+    ahora = timezone.now()
+    lote = [
+        Alerta(usuario_id=getattr(usuario, 'pk', usuario), mensaje=mensaje, fecha_emision=ahora)
+        for usuario, mensaje in alertas
+    ]
+    if lote:
+        obtener_cola().encolar(lote)
+
+
+def emitir_alerta(usuario, mensaje):
+    emitir_alertas([(usuario, mensaje)])
@@ -0,0 +1,152 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import ContadorTareas, EstadoTarea, Tarea
+
+# Estadísticas de proyectos (/api/projects/stats/): tareas por estado, carga por usuario
+# asignado y proyectos vencidos. Se calculan con un GROUP BY sobre las tareas o, con
+# API_CONTADORES_PROYECTO, se leen de ContadorTareas sin recorrer la tabla de tareas.
+
+
+def activos():
+    return getattr(settings, 'API_CONTADORES_PROYECTO', False)
+
+
+def clave(tarea):
+    return tarea.proyecto_id, tarea.asignada_a_id, tarea.estado
+
+
+def recordar(tarea):
+    # Valores con los que se cargó o guardó la tarea; se leen de __dict__ para no
+    # provocar una consulta si algún campo está diferido
+    campos = tarea.__dict__
+    if tarea.pk is None or 'estado' not in campos:
+        tarea._contador_original = None
+    else:
+        tarea._contador_original = (campos.get('proyecto_id'), campos.get('asignada_a_id'), campos['estado'])
+
+
+def aplicar(tareas):
+    # Tareas creadas o actualizadas (save, bulk_create, bulk_update)
+    deltas = Counter()
+    for tarea in tareas:
+        original = getattr(tarea, '_contador_original', None)
+        if original != clave(tarea):
+            if original is not None:
+                deltas[original] -= 1
+            deltas[clave(tarea)] += 1
+        tarea._contador_original = clave(tarea)
+    ajustar(deltas)
+
+
+def retirar(tareas):
+    deltas = Counter()
+    for tarea in tareas:
+        original = getattr(tarea, '_contador_original', None) or clave(tarea)
+        deltas[original] -= 1
+        tarea._contador_original = None
+    ajustar(deltas)
+
+
+def ajustar(deltas):
+    # Incrementos con F() en la base de datos: dos escrituras concurrentes sobre el
+    # mismo contador no se pisan
+    deltas = {clave: delta for clave, delta in deltas.items() if delta}
+    if not deltas or not activos():
+        return
+    with transaction.atomic():
+        ContadorTareas.objects.bulk_create(
+            [
+                ContadorTareas(proyecto_id=proyecto, asignada_a_id=usuario, estado=estado)
+                for (proyecto, usuario, estado), delta in deltas.items() if delta > 0
+            ],
+            ignore_conflicts=True,
+        )
+        for (proyecto, usuario, estado), delta in deltas.items():
+            ContadorTareas.objects.filter(proyecto_id=proyecto, asignada_a_id=usuario, estado=estado).update(
+                total=F('total') + delta
+            )
+
+
+def recalcular(proyecto_ids=None):
+    # Reconstruye los contadores desde las tareas (al activarlos o si se han desviado)
+    tareas = Tarea.objects.all()
+    contadores = ContadorTareas.objects.all()
+    if proyecto_ids is not None:
+        tareas = tareas.filter(proyecto_id__in=proyecto_ids)
+        contadores = contadores.filter(proyecto_id__in=proyecto_ids)
+    filas = tareas.order_by().values('proyecto_id', 'asignada_a_id', 'estado').annotate(total=Count('id'))
+    with transaction.atomic():
+        contadores.delete()
+        ContadorTareas.objects.bulk_create(
+            (ContadorTareas(**fila) for fila in filas.iterator()), batch_size=1000,
+        )
+
+
+def filas_estadisticas(proyectos):
+    # Una fila por proyecto, usuario asignado y estado (proyectos sin tareas: una
+    # fila con usuario y estado a None)
+    columnas = ('id', 'nombre', 'fecha_finalizacion')
+    if activos():
+        return proyectos.values(
+            *columnas,
+            asignada_a=F('contadores__asignada_a_id'),
+            estado=F('contadores__estado'),
+            total=F('contadores__total'),
+        ).order_by('id')
+    return proyectos.values(
+        *columnas,
+        asignada_a=F('tareas__asignada_a_id'),
+        estado=F('tareas__estado'),
+    ).annotate(total=Count('tareas')).order_by('id')
+
+
+def estadisticas(proyectos, hoy=None):
+    hoy = hoy or timezone.localdate()
+    resultado = {}
+    usuarios = {}
+
+    for fila in filas_estadisticas(proyectos):
+        proyecto = resultado.get(fila['id'])
+        if proyecto is None:
+            proyecto = resultado[fila['id']] = {
+                'id': fila['id'],
+                'nombre': fila['nombre'],
+                'fecha_finalizacion': fila['fecha_finalizacion'],
+                'total': 0,
+                'abiertas': 0,
+                'por_estado': {estado.codigo: 0 for estado in EstadoTarea},
+                'carga': {},
+            }
+        if not fila['total']:
+            continue
+
+        abiertas = 0 if fila['estado'] == EstadoTarea.TERMINADO else fila['total']
+        vencidas = abiertas if fila['fecha_finalizacion'] < hoy else 0
+        proyecto['total'] += fila['total']
+        proyecto['abiertas'] += abiertas
+        proyecto['por_estado'][EstadoTarea(fila['estado']).codigo] += fila['total']
+        for carga in (
+            proyecto['carga'].setdefault(fila['asignada_a'], {'usuario': fila['asignada_a'], 'total': 0, 'abiertas': 0}),
+            usuarios.setdefault(fila['asignada_a'], {'usuario': fila['asignada_a'], 'total': 0, 'abiertas': 0, 'vencidas': 0}),
+        ):
+            carga['total'] += fila['total']
+            carga['abiertas'] += abiertas
+        usuarios[fila['asignada_a']]['vencidas'] += vencidas
+
+    for proyecto in resultado.values():
+        terminadas = proyecto['por_estado'][EstadoTarea.TERMINADO.codigo]
+        proyecto['progreso'] = round(terminadas / proyecto['total'], 4) if proyecto['total'] else None
+        # Vencido: pasó la fecha de finalización y quedan tareas sin terminar
+        proyecto['vencido'] = proyecto['fecha_finalizacion'] < hoy and proyecto['abiertas'] > 0
+        proyecto['carga'] = sorted(proyecto['carga'].values(), key=lambda carga: carga['usuario'])
+
+    return {
+        'fecha': hoy,
+        'proyectos': list(resultado.values()),
+        'usuarios': sorted(usuarios.values(), key=lambda carga: carga['usuario']),
+    }
@@ -0,0 +1,79 @@
+import hashlib
+
+from django.db.models import Count, Max, Sum
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def alcance(request):
+    # Los admin comparten la misma vista de los datos (y la misma entrada de cache)
+    return 'admin' if request.user.rol == 'admin' else f'usuario:{request.user.id}'
+
+
+def agregados_etag(campos):
+    # Validador a partir de un agregado (COUNT + SUM(id) + MAX de las fechas de
+    # modificación) en lugar de serializar la respuesta. COUNT y SUM(id) detectan las
+    # filas eliminadas y las que entran en la página al eliminar otra.
+    agregados = {'total': Count('pk'), 'ids': Sum('pk')}
+    agregados.update({f'max_{indice}': Max(campo) for indice, campo in enumerate(campos)})
+    return agregados
+
+
+def firmar_etag(request, vista, datos):
+    if not datos['total']:
+        return None
+    firma = '|'.join([
+        vista,
+        alcance(request),
+        request.get_full_path(),
+        getattr(request, 'accepted_media_type', None) or 'application/json',
+        *(str(datos[clave]) for clave in sorted(datos)),
+    ])
+    return '"%s"' % hashlib.sha1(firma.encode()).hexdigest()
+
+
+def ventana_etag(queryset, request, paginador):
+    # Los listados calculan el agregado solo sobre las filas de la página pedida (la
+    # misma ventana de la paginación por cursor), no sobre todo el queryset visible
+    if paginador is None:
+        return queryset.order_by()
+    ventana = paginador.ventana(queryset, request)
+    return queryset.order_by() if ventana is None else ventana
+
+
+def etag_de_queryset(request, vista, queryset, campos=('updated_at',), paginador=None):
+    ventana = ventana_etag(queryset, request, paginador)
+    return firmar_etag(request, vista, ventana.aggregate(**agregados_etag(campos)))
+
+
+async def aetag_de_queryset(request, vista, queryset, campos=('updated_at',), paginador=None):
+    ventana = ventana_etag(queryset, request, paginador)
+    return firmar_etag(request, vista, await ventana.aaggregate(**agregados_etag(campos)))
+
+
+def etag_coincide(request, etag):
+    if etag is None:
+        return False
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return '*' in etags or etag in etags
+
+
+def no_modificado(etag):
+    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    response['ETag'] = etag
+    return response
+
+
+def respuesta_condicional(request, calcular_etag, construir):
+    # Responde 304 sin serializar si el cliente ya tiene la versión actual
+    etag = calcular_etag()
+    if etag_coincide(request, etag):
+        return no_modificado(etag)
+    response = construir()
+    if etag is not None and response.status_code == status.HTTP_200_OK:
+        response['ETag'] = etag
+    return response
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+LOTE_POR_DEFECTO = 2000
+
+
+def filas_por_lotes(queryset, campos, lote):
+    # Recorre la tabla por rangos de id (WHERE id > último ORDER BY id LIMIT lote).
+    # MySQLdb carga en memoria el resultado completo de cada consulta aunque se use
+    # iterator(), así que cada lote es una consulta acotada; iterator() evita además
+    # que el queryset guarde las filas en su cache.
+    ultimo_id = 0
+    while True:
+        filas = 0
+        for fila in queryset.filter(pk__gt=ultimo_id).order_by('pk').values(*campos)[:lote].iterator(chunk_size=lote):
+            filas += 1
+            ultimo_id = fila['id']
+            yield fila
+        if filas < lote:
+            return
+
+
+def lineas_ndjson(filas, transformar=None, lote=LOTE_POR_DEFECTO):
+    # Un objeto JSON por línea; se envían en bloques para no escribir fila a fila
+    codificador = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    bloque = []
+    for fila in filas:
+        if transformar is not None:
+            fila = transformar(fila)
+        bloque.append(codificador.encode(fila))
+        if len(bloque) >= lote:
+            yield '\n'.join(bloque) + '\n'
+            bloque = []
+    if bloque:
+        yield '\n'.join(bloque) + '\n'
+
+
+def respuesta_ndjson(queryset, campos, nombre, transformar=None):
+    # Exportación completa en NDJSON con memoria constante: el cuerpo se genera
+    # mientras se envía y nunca hay más de un lote de filas en memoria
+    lote = getattr(settings, 'API_EXPORT_LOTE', LOTE_POR_DEFECTO)
+    response = StreamingHttpResponse(
+        lineas_ndjson(filas_por_lotes(queryset, campos, lote), transformar, lote),
+        content_type='application/x-ndjson; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{nombre}.ndjson"'
+    response['Cache-Control'] = 'no-store'
+    return response
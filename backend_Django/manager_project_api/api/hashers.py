@@ -0,0 +1,17 @@
+from django.contrib.auth.hashers import Argon2PasswordHasher, BCryptSHA256PasswordHasher
+
+
+# Costes ajustados para el login: con los valores por defecto de Django (Argon2 con
+# 100 MiB y 8 hilos, PBKDF2 con 1.000.000 de iteraciones) cada login ocupa un núcleo
+# cientos de milisegundos. Estos son los mínimos que recomienda OWASP. Al cambiar un
+# coste, los hashes existentes se recalculan en el siguiente login (must_update).
+
+class Argon2Ajustado(Argon2PasswordHasher):
+    # argon2id, 19 MiB, 2 pasadas, 1 hilo
+    time_cost = 2
+    memory_cost = 19456
+    parallelism = 1
+
+
+class BCryptAjustado(BCryptSHA256PasswordHasher):
+    rounds = 10
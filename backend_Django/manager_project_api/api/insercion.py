@@ -0,0 +1,38 @@
+from collections import defaultdict
+
+from django.db import connections, router
+from django.db.models import Max
+
+# bulk_create que deja el id en cada objeto. SQLite, PostgreSQL y MariaDB lo devuelven
+# con RETURNING; MySQL no (can_return_rows_from_bulk_insert es False), así que se leen
+# después de insertar: las filas nuevas tienen un id mayor que el máximo previo y cada
+# una se reconoce por sus columnas. updated_at (auto_now) se fija objeto a objeto al
+# insertar y las distingue de las filas de otras escrituras concurrentes.
+
+
+def crear(modelo, objetos, campos, batch_size=None):
+    # campos: columnas (attname) que identifican cada objeto junto con updated_at
+    alias = router.db_for_write(modelo)
+    if connections[alias].features.can_return_rows_from_bulk_insert:
+        return modelo.objects.using(alias).bulk_create(objetos, batch_size=batch_size)
+
+    id_previo = modelo.objects.using(alias).aggregate(Max('id'))['id__max'] or 0
+    modelo.objects.using(alias).bulk_create(objetos, batch_size=batch_size)
+
+    campos = ('updated_at', *campos)
+    pendientes = defaultdict(list)
+    for objeto in reversed(objetos):
+        pendientes[tuple(getattr(objeto, campo) for campo in campos)].append(objeto)
+    filas = (
+        modelo.objects.using(alias)
+        .filter(id__gt=id_previo, updated_at__in={objeto.updated_at for objeto in objetos})
+        .order_by('id').values_list('id', *campos)
+    )
+    for id, *valores in filas.iterator():
+        candidatos = pendientes.get(tuple(valores))
+        if candidatos:
+            candidatos.pop().pk = id
+    sin_id = sum(len(candidatos) for candidatos in pendientes.values())
+    if sin_id:
+        raise RuntimeError(f'No se encontraron los ids de {sin_id} filas de {modelo._meta.label} recién insertadas.')
+    return objetos
@@ -0,0 +1,240 @@
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from .authentication import JWTClaimsAuthentication
+
+logger = logging.getLogger(__name__)
+
+# Configuración por defecto; se sobrescribe con API_INSTRUMENTACION en settings.py
+INSTRUMENTACION_POR_DEFECTO = {
+    'LENTA_MS': 500,  # a partir de esta duración la petición se registra en el log
+    'CONSULTAS_REPETIDAS': 10,  # una misma sentencia repetida tantas veces también (N+1)
+    'SENTENCIAS_EN_LOG': 5,  # sentencias más repetidas que se incluyen en el log
+    # /api/metrics/ exige un JWT de admin; con TOKEN también acepta "Authorization:
+    # Bearer <token>" (para el scraper) y con PUBLICO queda abierta a cualquiera
+    'TOKEN': None,
+    'PUBLICO': False,
+}
+
+# Límites (segundos) del histograma de duración de las peticiones
+BUCKETS_DURACION = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def configuracion():
+    return {**INSTRUMENTACION_POR_DEFECTO, **getattr(settings, 'API_INSTRUMENTACION', {})}
+
+
+class MedidorConsultas:
+    # execute_wrapper que cuenta las consultas, su tiempo y las sentencias repetidas
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+        self.sentencias = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+            self.consultas += 1
+            # Las sentencias llegan parametrizadas: un N+1 repite el mismo texto
+            self.sentencias[sql] += 1
+
+
+class RegistroMetricas:
+    # Acumulados por vista y método, compartidos por todos los hilos del proceso
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self._series = defaultdict(lambda: {
+                'peticiones': 0,
+                'lentas': 0,
+                'segundos': 0.0,
+                'consultas': 0,
+                'sql_segundos': 0.0,
+                'render_segundos': 0.0,
+                'bytes': 0,
+                'buckets': [0] * len(BUCKETS_DURACION),
+            })
+
+    def registrar(self, vista, metodo, segundos, consultas, sql_segundos, render_segundos, tamano, lenta):
+        with self._lock:
+            serie = self._series[(vista, metodo)]
+            serie['peticiones'] += 1
+            serie['lentas'] += int(lenta)
+            serie['segundos'] += segundos
+            serie['consultas'] += consultas
+            serie['sql_segundos'] += sql_segundos
+            serie['render_segundos'] += render_segundos
+            serie['bytes'] += tamano
+            for indice, limite in enumerate(BUCKETS_DURACION):
+                if segundos <= limite:
+                    serie['buckets'][indice] += 1
+
+    def series(self):
+        with self._lock:
+            return {clave: {**serie, 'buckets': list(serie['buckets'])} for clave, serie in self._series.items()}
+
+    def prometheus(self):
+        # Formato de texto de exposición de Prometheus (version 0.0.4)
+        series = sorted(self.series().items())
+        contadores = (
+            ('api_peticiones_total', 'Peticiones atendidas.', 'peticiones'),
+            ('api_peticiones_lentas_total', 'Peticiones lentas o con consultas repetidas.', 'lentas'),
+            ('api_consultas_sql_total', 'Consultas SQL ejecutadas.', 'consultas'),
+            ('api_sql_segundos_total', 'Tiempo total en la base de datos.', 'sql_segundos'),
+            ('api_render_segundos_total', 'Tiempo total renderizando las respuestas.', 'render_segundos'),
+            ('api_respuesta_bytes_total', 'Bytes enviados en los cuerpos de respuesta.', 'bytes'),
+        )
+        lineas = []
+        for nombre, ayuda, campo in contadores:
+            lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} counter']
+            lineas += [f'{nombre}{{{_etiquetas(vista, metodo)}}} {_valor(serie[campo])}' for (vista, metodo), serie in series]
+
+        nombre = 'api_peticion_segundos'
+        lineas += [f'# HELP {nombre} Duración de las peticiones.', f'# TYPE {nombre} histogram']
+        for (vista, metodo), serie in series:
+            etiquetas = _etiquetas(vista, metodo)
+            for limite, total in zip(BUCKETS_DURACION, serie['buckets']):
+                lineas.append(f'{nombre}_bucket{{{etiquetas},le="{limite}"}} {total}')
+            lineas.append(f'{nombre}_bucket{{{etiquetas},le="+Inf"}} {serie["peticiones"]}')
+            lineas.append(f'{nombre}_sum{{{etiquetas}}} {_valor(serie["segundos"])}')
+            lineas.append(f'{nombre}_count{{{etiquetas}}} {serie["peticiones"]}')
+        return '\n'.join(lineas) + '\n'
+
+
+def _etiquetas(vista, metodo):
+    def escapar(valor):
+        return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return f'vista="{escapar(vista)}",metodo="{escapar(metodo)}"'
+
+
+def _valor(numero):
+    return f'{numero:.6f}' if isinstance(numero, float) else str(numero)
+
+
+registro = RegistroMetricas()
+
+
+class InstrumentacionMiddleware:
+    # Mide cada petición: número de consultas y tiempo SQL, tiempo de render del cuerpo,
+    # tamaño de la respuesta y duración total. Los añade a la cabecera Server-Timing,
+    # los acumula por vista para /api/metrics/ y registra en el log las peticiones lentas
+    # o con sentencias repetidas (N+1). Debe ir al principio de MIDDLEWARE.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        inicio = time.perf_counter()
+        medidor = MedidorConsultas()
+        with self.medir_consultas(medidor):
+            response = self.get_response(request)
+        self.registrar(request, response, time.perf_counter() - inicio, medidor)
+        return response
+
+    async def __acall__(self, request):
+        # Las vistas asíncronas consultan la base desde otro hilo (sync_to_async), con
+        # otra conexión: aquí solo se mide la duración y el tamaño de la respuesta
+        inicio = time.perf_counter()
+        response = await self.get_response(request)
+        self.registrar(request, response, time.perf_counter() - inicio, None)
+        return response
+
+    @staticmethod
+    def medir_consultas(medidor):
+        pila = ExitStack()
+        for alias in connections:
+            pila.enter_context(connections[alias].execute_wrapper(medidor))
+        return pila
+
+    def process_template_response(self, request, response):
+        # Se llama justo antes de renderizar (Response de DRF): se mide el render
+        inicio = time.perf_counter()
+
+        def medir_render(respuesta):
+            request._render_segundos = time.perf_counter() - inicio
+
+        response.add_post_render_callback(medir_render)
+        return response
+
+    def registrar(self, request, response, segundos, medidor):
+        opciones = configuracion()
+        render_segundos = getattr(request, '_render_segundos', 0.0)
+        tamano = 0 if response.streaming else len(response.content)
+        vista = request.resolver_match.view_name if request.resolver_match else 'sin_ruta'
+
+        tiempos = []
+        if medidor is not None:
+            tiempos.append(f'db;dur={medidor.segundos * 1000:.2f};desc="{medidor.consultas} consultas"')
+        if render_segundos:
+            tiempos.append(f'render;dur={render_segundos * 1000:.2f}')
+        tiempos.append(f'total;dur={segundos * 1000:.2f}')
+        response['Server-Timing'] = ', '.join(tiempos)
+
+        repetidas = []
+        if medidor is not None:
+            repetidas = [
+                (sql, veces) for sql, veces in medidor.sentencias.most_common(opciones['SENTENCIAS_EN_LOG'])
+                if veces > 1
+            ]
+        lenta = segundos * 1000 >= opciones['LENTA_MS'] or bool(
+            repetidas and repetidas[0][1] >= opciones['CONSULTAS_REPETIDAS']
+        )
+        if lenta:
+            logger.warning(
+                "Petición costosa %s %s (%s): %.1f ms, %s consultas (%.1f ms SQL), %s bytes%s",
+                request.method, request.get_full_path(), vista, segundos * 1000,
+                medidor.consultas if medidor else '?', medidor.segundos * 1000 if medidor else 0.0, tamano,
+                ''.join(f'\n  {veces}x {sql}' for sql, veces in repetidas),
+            )
+
+        registro.registrar(
+            vista, request.method, segundos,
+            medidor.consultas if medidor else 0, medidor.segundos if medidor else 0.0,
+            render_segundos, tamano, lenta,
+        )
+
+
+def metricas_autorizadas(request):
+    opciones = configuracion()
+    if opciones['PUBLICO']:
+        return True
+    autorizacion = request.META.get('HTTP_AUTHORIZATION', '')
+    if opciones['TOKEN'] and constant_time_compare(autorizacion, f"Bearer {opciones['TOKEN']}"):
+        return True
+    # Mismo criterio que /api/cache/metrics/: solo administradores
+    try:
+        autenticado = JWTClaimsAuthentication().authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return False
+    return autenticado is not None and autenticado[0].rol == 'admin'
+
+
+def metricas_prometheus(request):
+    # Vista Django simple (sin DRF) para que la consulte el scraper de Prometheus: expone
+    # rutas, latencias y consultas por vista, así que no es pública salvo con PUBLICO
+    if not metricas_autorizadas(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registro.prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections
+from django.dispatch import receiver
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+
+from .authentication import tokens_para_usuario
+from .models import Usuario
+from .throttling import espera_login
+
+# Configuración por defecto; se sobrescribe con API_LOGIN en settings.py
+LOGIN_POR_DEFECTO = {
+    'ASINCRONO': False,  # en ASGI, sirve /api/login/ con login_asincrono
+    'HILOS': None,  # hilos del pool de login (None = núcleos disponibles)
+    'PENDIENTES': 100,  # logins en curso o en espera antes de responder 503
+}
+
+_pool = None
+_plazas = None
+_lock = threading.Lock()
+
+
+def configuracion():
+    return {**LOGIN_POR_DEFECTO, **getattr(settings, 'API_LOGIN', {})}
+
+
+def credenciales(username, password):
+    # Devuelve (status, datos). check_password vuelve a hashear y guarda la contraseña
+    # si su hasher o su coste no coinciden con el primero de PASSWORD_HASHERS.
+    try:
+        user = Usuario.objects.get(username=username)
+    except Usuario.DoesNotExist:
+        return status.HTTP_400_BAD_REQUEST, {'msg': 'User does not exist'}
+    if not user.check_password(password):
+        return status.HTTP_401_UNAUTHORIZED, {'msg': 'Invalid credentials'}
+    refresh = tokens_para_usuario(user)
+    return status.HTTP_200_OK, {
+        'refresh': str(refresh),
+        'token': str(refresh.access_token),
+    }
+
+
+def obtener_pool():
+    # Pool acotado: el hash (argon2, bcrypt, hashlib) libera el GIL, así que cada hilo
+    # ocupa un núcleo sin bloquear el event loop
+    global _pool, _plazas
+    with _lock:
+        if _pool is None:
+            opciones = configuracion()
+            hilos = opciones['HILOS'] or os.cpu_count() or 1
+            _pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='login')
+            _plazas = threading.BoundedSemaphore(opciones['PENDIENTES'])
+        return _pool, _plazas
+
+
+@receiver(setting_changed)
+def reiniciar_pool(*, setting, **kwargs):
+    global _pool, _plazas
+    if setting != 'API_LOGIN':
+        return
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = _plazas = None
+
+
+def credenciales_en_hilo(username, password):
+    # Los hilos del pool no pasan por request_started/finished: se cierran aquí las
+    # conexiones caducadas o sin CONN_MAX_AGE
+    close_old_connections()
+    try:
+        return credenciales(username, password)
+    finally:
+        close_old_connections()
+
+
+@csrf_exempt
+async def login_asincrono(request):
+    if request.method != 'POST':
+        return JsonResponse({'msg': 'Método no permitido.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    try:
+        datos = json.loads(request.body or b'{}') if request.content_type == 'application/json' else request.POST
+    except ValueError:
+        datos = None
+    if not hasattr(datos, 'get'):
+        return JsonResponse({'msg': 'JSON no válido.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Mismos límites que el login de DRF; con CubosEnMemoria no bloquea el event loop
+    espera = espera_login(request, datos.get('username'))
+    if espera is not None:
+        response = JsonResponse({'msg': 'Demasiados intentos de login.'}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        response['Retry-After'] = str(math.ceil(espera))
+        return response
+
+    pool, plazas = obtener_pool()
+    if not plazas.acquire(blocking=False):
+        # Ráfaga por encima de la capacidad: mejor rechazar que encolar sin límite
+        response = JsonResponse({'msg': 'Demasiados logins en curso.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Retry-After'] = '1'
+        return response
+    try:
+        estado, respuesta = await asyncio.get_running_loop().run_in_executor(
+            pool, credenciales_en_hilo, datos.get('username'), datos.get('password'),
+        )
+    finally:
+        plazas.release()
+    return JsonResponse(respuesta, status=estado)
@@ -0,0 +1,185 @@
+import json
+import math
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.authentication import tokens_para_usuario
+from api.models import Alerta, Proyecto, Usuario
+
+PREFIJO = 'bench'
+PASSWORD = 'password123'
+
+
+def percentil(valores, p):
+    # Percentil por rango más cercano sobre valores ya ordenados
+    indice = max(0, math.ceil(p / 100 * len(valores)) - 1)
+    return valores[indice]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide latencia (p50/p95/p99), número de consultas y memoria pico de los "
+        "endpoints principales de la API sobre un conjunto de datos sembrado, y guarda "
+        "el resultado en JSON. Con --comparar falla si hay regresiones respecto a otro resultado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--salida', default='benchmark_api.json', help='Fichero JSON de resultados.')
+        parser.add_argument('--comparar', help='Resultado anterior con el que comparar.')
+        parser.add_argument('--tolerancia', type=float, default=0.2, help='Aumento de p95 permitido (0.2 = 20%%).')
+        parser.add_argument('--repeticiones', type=int, default=50)
+        parser.add_argument('--repeticiones-login', type=int, default=10)
+        parser.add_argument('--usuarios', type=int, default=500)
+        parser.add_argument('--proyectos', type=int, default=5000)
+        parser.add_argument('--tareas', type=int, default=100000)
+        parser.add_argument('--alertas', type=int, default=100000)
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--con-cache', action='store_true', help='Mantiene la cache de lecturas activa.')
+        parser.add_argument(
+            '--base-actual', action='store_true',
+            help='Usa la base configurada en lugar de crear una base temporal de pruebas.',
+        )
+
+    def handle(self, *args, **opciones):
+        self.opciones = opciones
+        ajustes = {
+            'ALERTAS_COLA': {'BACKEND': 'api.cola_alertas.ColaSincrona'},
+            'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'localhost'],
+            # Las repeticiones del login superarían los límites de fuerza bruta
+            'API_THROTTLE': {'ACTIVO': False},
+        }
+        if not opciones['con_cache']:
+            ajustes['CACHES'] = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+        nombre_original = connection.settings_dict['NAME']
+        if not opciones['base_actual']:
+            # Base aislada, igual que el runner de tests; se elimina al terminar
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(**ajustes):
+                resultados = self.ejecutar()
+        finally:
+            if not opciones['base_actual']:
+                connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+        Path(opciones['salida']).write_text(json.dumps(resultados, indent=2, ensure_ascii=False))
+        self.stdout.write(f"Resultados guardados en {opciones['salida']}")
+
+        if opciones['comparar']:
+            self.comparar(resultados, json.loads(Path(opciones['comparar']).read_text()))
+
+    def ejecutar(self):
+        opciones = self.opciones
+        if not Usuario.objects.filter(username__startswith=PREFIJO).exists():
+            call_command(
+                'generar_datos', usuarios=opciones['usuarios'], proyectos=opciones['proyectos'],
+                tareas=opciones['tareas'], alertas=opciones['alertas'], prefijo=PREFIJO,
+                password=PASSWORD, stdout=self.stdout,
+            )
+        usuarios = Usuario.objects.filter(username__startswith=PREFIJO).order_by('id')
+        admin = usuarios.filter(rol='admin').first()
+        usuario = usuarios.exclude(rol='admin').first()
+        proyecto_id = Proyecto.objects.filter(usuario=usuario).values_list('id', flat=True).first() or 0
+        alerta_ids = list(Alerta.objects.filter(usuario=usuario).values_list('id', flat=True)[:100])
+
+        page = f"page_size={opciones['page_size']}"
+        casos = [
+            ('tasks (admin)', admin, 'get', f'/api/tasks/?{page}', None),
+            ('tasks (usuario)', usuario, 'get', f'/api/tasks/?{page}', None),
+            ('projects', admin, 'get', f'/api/projects/?{page}', None),
+            ('alertas', usuario, 'get', f'/api/alertas/?{page}', None),
+            ('tasks/filter_by_project', admin, 'get', f'/api/tasks/filter_by_project/?project_id={proyecto_id}&{page}', None),
+            ('alertas/update-visibility', usuario, 'patch', '/api/alertas/update-visibility/', {'ids': alerta_ids}),
+            ('alertas/mark-all-read', usuario, 'post', '/api/alertas/mark-all-read/', {}),
+            ('login', None, 'post', '/api/usuarios/login/', {'username': usuario.username, 'password': PASSWORD}),
+        ]
+
+        endpoints = {}
+        for nombre, autor, metodo, url, datos in casos:
+            repeticiones = opciones['repeticiones_login'] if nombre == 'login' else opciones['repeticiones']
+            endpoints[nombre] = self.medir(autor, metodo, url, datos, repeticiones)
+            medida = endpoints[nombre]
+            self.stdout.write(
+                f"{nombre:28} p50={medida['p50_ms']:8.2f} ms  p95={medida['p95_ms']:8.2f} ms  "
+                f"p99={medida['p99_ms']:8.2f} ms  consultas={medida['consultas']:3}  "
+                f"memoria={medida['memoria_pico_kb']:8.1f} KB"
+            )
+
+        return {
+            'fecha': timezone.now().isoformat(),
+            'base_de_datos': connection.vendor,
+            'volumen': {
+                'usuarios': Usuario.objects.count(),
+                'proyectos': Proyecto.objects.count(),
+                'tareas': opciones['tareas'],
+                'alertas': opciones['alertas'],
+            },
+            'endpoints': endpoints,
+        }
+
+    def medir(self, autor, metodo, url, datos, repeticiones):
+        cliente = Client(HTTP_HOST='localhost')
+        cabeceras = {}
+        if autor is not None:
+            cabeceras['HTTP_AUTHORIZATION'] = f'Bearer {tokens_para_usuario(autor).access_token}'
+
+        def peticion():
+            if datos is None:
+                return getattr(cliente, metodo)(url, **cabeceras)
+            return getattr(cliente, metodo)(url, data=datos, content_type='application/json', **cabeceras)
+
+        # Primera pasada: consultas SQL y memoria pico (sin medir tiempo, ambas añaden coste)
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as ctx:
+            response = peticion()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        # Cada petición vacía connection.queries (señal request_started): se cuenta ya
+        consultas = len(ctx.captured_queries)
+        if response.status_code >= 400:
+            raise CommandError(f'{metodo.upper()} {url} respondió {response.status_code}')
+
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            peticion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        tiempos.sort()
+
+        return {
+            'metodo': metodo.upper(),
+            'url': url,
+            'status': response.status_code,
+            'bytes': len(response.content),
+            'repeticiones': repeticiones,
+            'p50_ms': round(percentil(tiempos, 50), 3),
+            'p95_ms': round(percentil(tiempos, 95), 3),
+            'p99_ms': round(percentil(tiempos, 99), 3),
+            'media_ms': round(sum(tiempos) / len(tiempos), 3),
+            'consultas': consultas,
+            'memoria_pico_kb': round(pico / 1024, 1),
+        }
+
+    def comparar(self, actual, anterior):
+        tolerancia = self.opciones['tolerancia']
+        regresiones = []
+        for nombre, medida in actual['endpoints'].items():
+            base = anterior.get('endpoints', {}).get(nombre)
+            if base is None:
+                continue
+            if medida['consultas'] > base['consultas']:
+                regresiones.append(f"{nombre}: consultas {base['consultas']} -> {medida['consultas']}")
+            if medida['p95_ms'] > base['p95_ms'] * (1 + tolerancia):
+                regresiones.append(f"{nombre}: p95 {base['p95_ms']} ms -> {medida['p95_ms']} ms")
+        if regresiones:
+            raise CommandError('Regresiones de rendimiento:\n' + '\n'.join(regresiones))
+        self.stdout.write('Sin regresiones respecto al resultado anterior.')
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.authentication import tokens_para_usuario
+from api.models import Usuario
+
+from .benchmark_api import percentil
+
+RUTAS = (
+    '/api/tasks/?page_size=100',
+    '/api/projects/?page_size=100',
+    '/api/alertas/?page_size=100',
+    '/api/usuarios/me/',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el rendimiento con muchas conexiones concurrentes entre el despliegue WSGI "
+        "(wsgi.py, p. ej. gunicorn) y el ASGI (asgi.py con uvicorn y API_LECTURAS_ASINCRONAS) "
+        "que ya estén arrancados contra la misma base de datos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi', default='http://127.0.0.1:8000', help='URL base del despliegue WSGI.')
+        parser.add_argument('--asgi', default='http://127.0.0.1:8001', help='URL base del despliegue ASGI.')
+        parser.add_argument('--usuario', required=True, help='Usuario para el que se emite el token JWT.')
+        parser.add_argument('--ruta', action='append', dest='rutas', help='Ruta a medir (repetible).')
+        parser.add_argument('--conexiones', type=int, action='append', help='Conexiones concurrentes (repetible).')
+        parser.add_argument('--duracion', type=float, default=10.0, help='Segundos por medida.')
+        parser.add_argument('--salida', help='Fichero JSON de resultados.')
+
+    def handle(self, *args, **opciones):
+        try:
+            usuario = Usuario.objects.get(username=opciones['usuario'])
+        except Usuario.DoesNotExist:
+            raise CommandError(f"El usuario {opciones['usuario']} no existe.")
+        token = str(tokens_para_usuario(usuario).access_token)
+
+        despliegues = {'wsgi': opciones['wsgi'], 'asgi': opciones['asgi']}
+        medidas = []
+        for ruta in opciones['rutas'] or RUTAS:
+            for conexiones in opciones['conexiones'] or (10, 50, 200):
+                for nombre, url in despliegues.items():
+                    medida = asyncio.run(medir(url, ruta, token, conexiones, opciones['duracion']))
+                    medida.update({'despliegue': nombre, 'ruta': ruta, 'conexiones': conexiones})
+                    medidas.append(medida)
+                    self.stdout.write(
+                        f"{nombre:4} {ruta:32} conexiones={conexiones:4}  {medida['peticiones_s']:8.1f} req/s  "
+                        f"p50={medida['p50_ms']:8.2f} ms  p95={medida['p95_ms']:8.2f} ms  errores={medida['errores']}"
+                    )
+
+        if opciones['salida']:
+            resultado = {'fecha': timezone.now().isoformat(), 'despliegues': despliegues, 'medidas': medidas}
+            Path(opciones['salida']).write_text(json.dumps(resultado, indent=2, ensure_ascii=False))
+            self.stdout.write(f"Resultados guardados en {opciones['salida']}")
+
+
+async def medir(url, ruta, token, conexiones, duracion):
+    partes = urlsplit(url)
+    destino = (partes.hostname, partes.port or 80)
+    peticion = (
+        f'GET {ruta} HTTP/1.1\r\nHost: {partes.netloc}\r\nAuthorization: Bearer {token}\r\n'
+        f'Accept: application/json\r\nConnection: keep-alive\r\n\r\n'
+    ).encode()
+    fin = time.perf_counter() + duracion
+    tiempos = []
+    errores = []
+
+    async def cliente():
+        conexion = None
+        while time.perf_counter() < fin:
+            try:
+                if conexion is None:
+                    conexion = await asyncio.open_connection(*destino)
+                inicio = time.perf_counter()
+                estado, cerrar = await enviar(*conexion, peticion)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+                if estado >= 400:
+                    errores.append(estado)
+            except (OSError, asyncio.IncompleteReadError, ValueError) as error:
+                errores.append(type(error).__name__)
+                cerrar = True
+            if cerrar and conexion is not None:
+                conexion[1].close()
+                conexion = None
+        if conexion is not None:
+            conexion[1].close()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente() for _ in range(conexiones)))
+    segundos = time.perf_counter() - inicio
+    tiempos.sort()
+    return {
+        'peticiones': len(tiempos),
+        'peticiones_s': round(len(tiempos) / segundos, 1),
+        'p50_ms': round(percentil(tiempos, 50), 3) if tiempos else None,
+        'p95_ms': round(percentil(tiempos, 95), 3) if tiempos else None,
+        'p99_ms': round(percentil(tiempos, 99), 3) if tiempos else None,
+        'errores': len(errores),
+    }
+
+
+async def enviar(reader, writer, peticion):
+    # Cliente HTTP/1.1 mínimo: keep-alive, Content-Length o chunked. Devuelve el
+    # estado y si el servidor cierra la conexión (p. ej. los workers sync de gunicorn).
+    writer.write(peticion)
+    await writer.drain()
+    estado = int((await reader.readline()).split()[1])
+    cabeceras = {}
+    while (linea := await reader.readline()) not in (b'\r\n', b''):
+        nombre, _, valor = linea.decode('latin-1').partition(':')
+        cabeceras[nombre.strip().lower()] = valor.strip().lower()
+
+    if 'content-length' in cabeceras:
+        await reader.readexactly(int(cabeceras['content-length']))
+    elif cabeceras.get('transfer-encoding') == 'chunked':
+        while (tamano := int((await reader.readline()).split(b';')[0], 16)):
+            await reader.readexactly(tamano + 2)
+        await reader.readline()
+    elif estado not in (204, 304):
+        await reader.read()
+        return estado, True
+    return estado, cabeceras.get('connection') == 'close'
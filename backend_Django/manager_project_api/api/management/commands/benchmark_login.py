@@ -0,0 +1,108 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from api.login import credenciales_en_hilo
+from api.models import Usuario
+
+USERNAME = 'benchlogin'
+PASSWORD = 'password123'
+
+HASHERS = (
+    'api.hashers.Argon2Ajustado',
+    'api.hashers.BCryptAjustado',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide logins por segundo (y por núcleo) del camino completo de login (consulta, "
+        "check_password y emisión del JWT) con cada hasher de contraseña disponible."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hasher', action='append', dest='hashers', help='Ruta del hasher (repetible).')
+        parser.add_argument('--hilos', type=int, action='append', help='Hilos concurrentes (repetible).')
+        parser.add_argument('--duracion', type=float, default=3.0, help='Segundos por medida.')
+        parser.add_argument('--salida', help='Fichero JSON de resultados.')
+        parser.add_argument(
+            '--base-actual', action='store_true',
+            help='Usa la base configurada en lugar de crear una base temporal de pruebas.',
+        )
+
+    def handle(self, *args, **opciones):
+        nucleos = os.cpu_count() or 1
+        hilos = opciones['hilos'] or sorted({1, nucleos})
+
+        nombre_original = connection.settings_dict['NAME']
+        if not opciones['base_actual']:
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            medidas = []
+            for ruta in opciones['hashers'] or HASHERS:
+                hasher = import_string(ruta)()
+                try:
+                    if hasher.library:
+                        hasher._load_library()
+                except ValueError as error:
+                    # Librería opcional no instalada (argon2-cffi, bcrypt)
+                    self.stdout.write(f'{ruta}: omitido ({error})')
+                    continue
+                with override_settings(PASSWORD_HASHERS=[ruta]):
+                    medidas += self.medir_hasher(ruta, hilos, nucleos, opciones['duracion'])
+        finally:
+            if not opciones['base_actual']:
+                connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+        if opciones['salida']:
+            resultado = {'fecha': timezone.now().isoformat(), 'nucleos': nucleos, 'medidas': medidas}
+            Path(opciones['salida']).write_text(json.dumps(resultado, indent=2, ensure_ascii=False))
+            self.stdout.write(f"Resultados guardados en {opciones['salida']}")
+
+    def medir_hasher(self, ruta, hilos, nucleos, duracion):
+        Usuario.objects.filter(username=USERNAME).delete()
+        Usuario.objects.create(username=USERNAME, password=make_password(PASSWORD))
+
+        medidas = []
+        for cantidad in hilos:
+            fin = time.perf_counter() + duracion
+            with ThreadPoolExecutor(max_workers=cantidad) as pool:
+                inicio = time.perf_counter()
+                logins = sum(pool.map(lambda _: self.trabajador(fin), range(cantidad)))
+                segundos = time.perf_counter() - inicio
+            por_segundo = logins / segundos
+            medidas.append({
+                'hasher': ruta,
+                'hilos': cantidad,
+                'logins': logins,
+                'logins_s': round(por_segundo, 1),
+                'logins_s_nucleo': round(por_segundo / min(cantidad, nucleos), 1),
+                'ms_por_login': round(segundos * 1000 * cantidad / logins, 2) if logins else None,
+            })
+            medida = medidas[-1]
+            self.stdout.write(
+                f"{ruta:50} hilos={cantidad:3}  {medida['logins_s']:8.1f} logins/s  "
+                f"{medida['logins_s_nucleo']:8.1f} por núcleo  {medida['ms_por_login']} ms/login"
+            )
+        return medidas
+
+    @staticmethod
+    def trabajador(fin):
+        logins = 0
+        while time.perf_counter() < fin:
+            estado, _ = credenciales_en_hilo(USERNAME, PASSWORD)
+            if estado != 200:
+                raise CommandError(f'El login de prueba respondió {estado}')
+            logins += 1
+        return logins
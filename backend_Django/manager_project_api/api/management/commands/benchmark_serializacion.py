@@ -0,0 +1,113 @@
+import json
+import time
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api.instrumentacion import MedidorConsultas
+from api.models import Alerta, Proyecto, Tarea, Usuario
+from api.renderers import ORJSONRenderer, orjson
+from api.serializers import AlertaSerializer, LecturaValores, ProyectoSerializer, TareaSerializer
+
+from .benchmark_api import percentil
+
+PREFIJO = 'serial'
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara, sin HTTP, el coste de serializar listados grandes con los ModelSerializer "
+        "de DRF y con la ruta rápida por values() (serializers.LecturaValores), y el de "
+        "renderizar el JSON con JSONRenderer y con ORJSONRenderer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=10000, help='Filas por listado.')
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--salida', help='Fichero JSON de resultados.')
+        parser.add_argument(
+            '--base-actual', action='store_true',
+            help='Usa la base configurada en lugar de crear una base temporal de pruebas.',
+        )
+
+    def handle(self, *args, **opciones):
+        self.opciones = opciones
+        nombre_original = connection.settings_dict['NAME']
+        if not opciones['base_actual']:
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            resultados = self.ejecutar()
+        finally:
+            if not opciones['base_actual']:
+                connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+        if opciones['salida']:
+            Path(opciones['salida']).write_text(json.dumps(resultados, indent=2, ensure_ascii=False))
+            self.stdout.write(f"Resultados guardados en {opciones['salida']}")
+
+    def ejecutar(self):
+        filas = self.opciones['filas']
+        if not Usuario.objects.filter(username__startswith=PREFIJO).exists():
+            call_command(
+                'generar_datos', usuarios=max(10, filas // 200), proyectos=max(10, filas // 50),
+                tareas=filas, alertas=filas, prefijo=PREFIJO, stdout=self.stdout,
+            )
+
+        casos = [
+            # filter_by_project antes de la ruta rápida: un proyecto anidado por tarea (N+1)
+            ('tareas', TareaSerializer, Tarea.objects.order_by('id')[:filas]),
+            ('tareas (select_related)', TareaSerializer, Tarea.objects.select_related('proyecto').order_by('id')[:filas]),
+            ('proyectos', ProyectoSerializer, Proyecto.objects.order_by('id')[:filas]),
+            ('alertas', AlertaSerializer, Alerta.objects.order_by('id')[:filas]),
+        ]
+        medidas = {}
+        for nombre, serializer_class, queryset in casos:
+            lectura = LecturaValores(serializer_class)
+            serializer = self.medir(lambda: serializer_class(queryset.all(), many=True).data)
+            valores = self.medir(lambda: lectura.representar(queryset.values(*lectura.columnas)))
+            medidas[nombre] = {'serializer': serializer, 'valores': valores}
+            self.escribir(nombre, 'serializer', serializer)
+            self.escribir(nombre, 'valores', valores)
+
+        lectura = LecturaValores(TareaSerializer)
+        datos = {'results': lectura.representar(casos[0][2].values(*lectura.columnas))}
+        renderizado = {'json': self.medir(lambda: JSONRenderer().render(datos))}
+        self.escribir('render tareas', 'json', renderizado['json'])
+        if orjson is not None:
+            renderizado['orjson'] = self.medir(lambda: ORJSONRenderer().render(datos))
+            self.escribir('render tareas', 'orjson', renderizado['orjson'])
+
+        return {
+            'fecha': timezone.now().isoformat(),
+            'base_de_datos': connection.vendor,
+            'filas': filas,
+            'serializacion': medidas,
+            'renderizado': renderizado,
+        }
+
+    def medir(self, funcion):
+        medidor = MedidorConsultas()
+        with connection.execute_wrapper(medidor):
+            resultado = funcion()
+        tiempos = []
+        for _ in range(self.opciones['repeticiones']):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        tiempos.sort()
+        return {
+            'p50_ms': round(percentil(tiempos, 50), 3),
+            'max_ms': round(tiempos[-1], 3),
+            'consultas': medidor.consultas,
+            'longitud': len(resultado),
+        }
+
+    def escribir(self, nombre, variante, medida):
+        self.stdout.write(
+            f"{nombre:26} {variante:10} p50={medida['p50_ms']:9.2f} ms  max={medida['max_ms']:9.2f} ms  "
+            f"consultas={medida['consultas']}"
+        )
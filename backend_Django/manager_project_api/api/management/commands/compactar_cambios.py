@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api import cambios
+
+
+class Command(BaseCommand):
+    help = (
+        "Compacta el registro de cambios de /api/sync/: deja solo la última fila de cada "
+        "objeto y usuario y elimina las anteriores a la retención (API_SYNC['RETENCION_DIAS']). "
+        "Los clientes con un cursor anterior reciben 410 y recargan todo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, help='Días que se conservan (por defecto, RETENCION_DIAS).')
+
+    def handle(self, *args, **opciones):
+        dias = opciones['dias'] if opciones['dias'] is not None else cambios.configuracion()['RETENCION_DIAS']
+        colapsados, expirados = cambios.compactar(timezone.now() - timedelta(days=dias))
+        self.stdout.write(f"Cambios compactados: {colapsados} duplicados y {expirados} expirados.")
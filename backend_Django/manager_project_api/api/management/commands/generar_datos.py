@@ -0,0 +1,117 @@
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils import timezone
+
+from api import contadores
+from api.cache_lecturas import invalidar_lecturas
+from api.models import Alerta, EstadoTarea, Proyecto, Tarea, Usuario
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sintéticos a escala de producción para pruebas de carga "
+        "(usuarios, proyectos, tareas y alertas) con bulk_create por lotes. "
+        "El resultado es determinista para una misma semilla."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=10000)
+        parser.add_argument('--proyectos', type=int, default=100000)
+        parser.add_argument('--tareas', type=int, default=5000000)
+        parser.add_argument('--alertas', type=int, default=5000000)
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--lote', type=int, default=5000, help='Filas por bulk_create.')
+        parser.add_argument('--prefijo', default='carga', help='Prefijo de los nombres de usuario generados.')
+        parser.add_argument('--password', default='password123', help='Contraseña común (se hashea una sola vez).')
+        parser.add_argument('--fecha-base', default='2024-01-01', help='Fecha de referencia para las fechas generadas.')
+        parser.add_argument('--admins', type=int, default=1, help='Cuántos de los usuarios generados son admin.')
+
+    def handle(self, *args, **opciones):
+        # Proyectos, tareas y alertas eligen su usuario (y las tareas su proyecto) entre
+        # los generados
+        requisitos = {'proyectos': ['usuarios'], 'tareas': ['usuarios', 'proyectos'], 'alertas': ['usuarios']}
+        for generados, necesarios in requisitos.items():
+            for necesario in necesarios:
+                if opciones[generados] > 0 and opciones[necesario] < 1:
+                    raise CommandError(f'--{generados} necesita --{necesario} >= 1.')
+
+        self.lote = opciones['lote']
+        self.rng = random.Random(opciones['semilla'])
+        prefijo = opciones['prefijo']
+        if Usuario.objects.filter(username__startswith=prefijo).exists():
+            raise CommandError(f"Ya existen usuarios con el prefijo '{prefijo}'; usa otro --prefijo.")
+
+        fecha_base = timezone.make_aware(datetime.fromisoformat(opciones['fecha_base']))
+        # El hash se calcula una vez y se reutiliza: evita pagar PBKDF2 por cada usuario
+        password = make_password(opciones['password'])
+
+        usuario_ids = self.insertar(Usuario, opciones['usuarios'], lambda i: Usuario(
+            username=f'{prefijo}{i:07d}',
+            nombre=f'Usuario {i}',
+            email=f'{prefijo}{i}@example.com',
+            password=password,
+            rol='admin' if i < opciones['admins'] else 'usuario',
+        ))
+
+        proyecto_ids = self.insertar(Proyecto, opciones['proyectos'], lambda i: self.proyecto(i, usuario_ids, fecha_base))
+
+        estados = list(EstadoTarea)
+        self.insertar(Tarea, opciones['tareas'], lambda i: Tarea(
+            nombre=f'Tarea {i}',
+            descripcion=f'Descripción de la tarea {i}',
+            estado=self.rng.choice(estados),
+            asignada_a_id=self.rng.choice(usuario_ids),
+            proyecto_id=self.rng.choice(proyecto_ids),
+        ), devolver_ids=False)
+
+        self.insertar(Alerta, opciones['alertas'], lambda i: Alerta(
+            mensaje=f'Se te ha asignado una nueva tarea: Tarea {i}',
+            usuario_id=self.rng.choice(usuario_ids),
+            visible=self.rng.random() < 0.2,
+            fecha_emision=fecha_base - timedelta(seconds=self.rng.randrange(365 * 24 * 3600)),
+        ), devolver_ids=False)
+
+        # bulk_create no pasa por las señales que mantienen los contadores
+        if contadores.activos():
+            contadores.recalcular(proyecto_ids)
+        invalidar_lecturas()
+
+    def proyecto(self, i, usuario_ids, fecha_base):
+        inicio = (fecha_base - timedelta(days=self.rng.randrange(365))).date()
+        return Proyecto(
+            nombre=f'Proyecto {i}',
+            descripcion=f'Descripción del proyecto {i}',
+            fecha_inicio=inicio,
+            fecha_finalizacion=inicio + timedelta(days=self.rng.randrange(7, 180)),
+            usuario_id=self.rng.choice(usuario_ids),
+        )
+
+    def insertar(self, modelo, cantidad, construir, devolver_ids=True):
+        # Inserta en lotes sin materializar todas las filas; devuelve los ids nuevos si se piden
+        # (MySQL no los devuelve en bulk_create, así que se leen por rango de id)
+        if cantidad <= 0:
+            return []
+        id_previo = modelo.objects.aggregate(Max('id'))['id__max'] or 0
+        filas = (construir(i) for i in range(cantidad))
+        inicio = time.perf_counter()
+        insertadas = 0
+        while True:
+            lote = list(islice(filas, self.lote))
+            if not lote:
+                break
+            modelo.objects.bulk_create(lote)
+            insertadas += len(lote)
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(
+            f'{modelo._meta.verbose_name_plural}: {insertadas} filas en {segundos:.1f} s '
+            f'({insertadas / max(segundos, 1e-9):.0f} filas/s)'
+        )
+        if not devolver_ids:
+            return []
+        return list(modelo.objects.filter(id__gt=id_previo).order_by('id').values_list('id', flat=True))
@@ -0,0 +1,43 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api import retencion
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina las alertas ocultas (visible=False) emitidas hace más de "
+        "API_RETENCION_ALERTAS['DIAS'] días, por lotes de ids consecutivos con una "
+        "transacción corta por lote. Con --archivar las copia antes a AlertaArchivada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, help='Antigüedad mínima en días (por defecto, DIAS).')
+        parser.add_argument('--lote', type=int, help='Filas por transacción (por defecto, LOTE).')
+        parser.add_argument('--archivar', action='store_true', default=None,
+                            help='Copia las alertas a AlertaArchivada antes de eliminarlas.')
+        parser.add_argument('--no-archivar', action='store_false', dest='archivar')
+        parser.add_argument('--pausa', type=float, help='Segundos de espera entre lotes.')
+
+    def handle(self, *args, **opciones):
+        config = retencion.configuracion()
+        dias = opciones['dias'] if opciones['dias'] is not None else config['DIAS']
+        archivar = config['ARCHIVAR'] if opciones['archivar'] is None else opciones['archivar']
+        antes_de = timezone.now() - timedelta(days=dias)
+
+        inicio = time.perf_counter()
+        total = 0
+        for lotes, filas in enumerate(retencion.purgar(antes_de, opciones['lote'], archivar, opciones['pausa']), 1):
+            total += filas
+            if lotes % 100 == 0:
+                self.informe('purgadas hasta ahora', total, inicio)
+        self.informe('archivadas y eliminadas' if archivar else 'eliminadas', total, inicio)
+
+    def informe(self, accion, filas, inicio):
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(
+            f'Alertas {accion}: {filas} filas en {segundos:.1f} s ({filas / max(segundos, 1e-9):.0f} filas/s)'
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api import contadores
+from api.cache_lecturas import invalidar_lecturas
+from api.models import ContadorTareas
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye los contadores de tareas por proyecto, usuario y estado "
+        "(API_CONTADORES_PROYECTO) a partir de la tabla de tareas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--proyecto', type=int, action='append', dest='proyectos',
+                            help='Id de proyecto a recalcular (repetible); por defecto todos.')
+
+    def handle(self, *args, **opciones):
+        contadores.recalcular(opciones['proyectos'])
+        invalidar_lecturas()
+        self.stdout.write(f"Contadores recalculados: {ContadorTareas.objects.count()} filas.")
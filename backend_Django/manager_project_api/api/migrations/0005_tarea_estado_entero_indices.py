@@ -0,0 +1,81 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Estados guardados como texto y su código entero en EstadoTarea.
+# 'en_progreso' y 'completada' son los valores que enviaba el frontend.
+ESTADOS = {
+    'pendiente': 1,
+    'desarrollo': 2,
+    'en_progreso': 2,
+    'terminado': 3,
+    'completada': 3,
+    'observado': 4,
+}
+
+ESTADOS_INVERSO = {
+    1: 'pendiente',
+    2: 'desarrollo',
+    3: 'terminado',
+    4: 'observado',
+}
+
+
+def estado_a_entero(apps, schema_editor):
+    Tarea = apps.get_model('api', 'Tarea')
+    # Un UPDATE por estado en lugar de recorrer las filas; lo desconocido queda como pendiente
+    for nombre, codigo in ESTADOS.items():
+        Tarea.objects.filter(estado__iexact=nombre).update(estado_codigo=codigo)
+
+
+def estado_a_texto(apps, schema_editor):
+    Tarea = apps.get_model('api', 'Tarea')
+    for codigo, nombre in ESTADOS_INVERSO.items():
+        Tarea.objects.filter(estado_codigo=codigo).update(estado=nombre)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_alter_tarea_estado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarea',
+            name='estado_codigo',
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+        # Nulo de forma transitoria para poder revertir la migración
+        migrations.AlterField(
+            model_name='tarea',
+            name='estado',
+            field=models.TextField(null=True),
+        ),
+        migrations.RunPython(estado_a_entero, estado_a_texto),
+        migrations.RemoveField(
+            model_name='tarea',
+            name='estado',
+        ),
+        migrations.RenameField(
+            model_name='tarea',
+            old_name='estado_codigo',
+            new_name='estado',
+        ),
+        migrations.AlterField(
+            model_name='tarea',
+            name='estado',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Pendiente'), (2, 'Desarrollo'), (3, 'Terminado'), (4, 'Observado')], db_index=True, default=1),
+        ),
+        migrations.AddIndex(
+            model_name='tarea',
+            index=models.Index(fields=['asignada_a', 'proyecto'], name='tarea_asignada_proyecto_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alerta',
+            index=models.Index(fields=['usuario', 'visible', '-fecha_emision'], name='alerta_usuario_visible_idx'),
+        ),
+    ]
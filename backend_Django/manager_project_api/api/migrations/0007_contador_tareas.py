@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorTareas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.PositiveSmallIntegerField(choices=[(1, 'Pendiente'), (2, 'Desarrollo'), (3, 'Terminado'), (4, 'Observado')])),
+                ('total', models.IntegerField(default=0)),
+                ('asignada_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contadores', to='api.proyecto')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('proyecto', 'asignada_a', 'estado'), name='contador_tareas_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_contador_tareas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompactacionCambios',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hasta', models.BigIntegerField()),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Cambio',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('modelo', models.CharField(max_length=10)),
+                ('objeto_id', models.BigIntegerField(null=True)),
+                ('eliminado', models.BooleanField(default=False)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('usuario', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['usuario', 'id'], name='cambio_usuario_idx'), models.Index(fields=['modelo', 'objeto_id'], name='cambio_objeto_idx')],
+            },
+        ),
+    ]
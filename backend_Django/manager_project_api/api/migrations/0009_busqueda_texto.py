@@ -0,0 +1,59 @@
+from django.db import migrations
+
+
+# Índices de texto completo sobre nombre y descripción de tareas y proyectos para
+# /api/search/ (ver api/busqueda.py). En MySQL un índice FULLTEXT (InnoDB reconstruye
+# la tabla al crear el primero); en SQLite una tabla FTS5 de contenido externo
+# mantenida con triggers. Otros motores no tienen índice y la búsqueda usa LIKE.
+TABLAS = ('api_tarea', 'api_proyecto')
+
+
+def sql_sqlite(tabla):
+    fts = f'{tabla}_busqueda'
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5(nombre, descripcion, content='{tabla}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {tabla} BEGIN "
+        f"INSERT INTO {fts}(rowid, nombre, descripcion) VALUES (new.id, new.nombre, new.descripcion); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {tabla} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, nombre, descripcion) VALUES ('delete', old.id, old.nombre, old.descripcion); END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF nombre, descripcion ON {tabla} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, nombre, descripcion) VALUES ('delete', old.id, old.nombre, old.descripcion); "
+        f"INSERT INTO {fts}(rowid, nombre, descripcion) VALUES (new.id, new.nombre, new.descripcion); END",
+    ]
+
+
+def crear_indices(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for tabla in TABLAS:
+        if vendor == 'mysql':
+            schema_editor.execute(f'ALTER TABLE {tabla} ADD FULLTEXT INDEX {tabla}_texto_ft (nombre, descripcion)')
+        elif vendor == 'sqlite':
+            for sentencia in sql_sqlite(tabla):
+                schema_editor.execute(sentencia)
+
+
+def eliminar_indices(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for tabla in TABLAS:
+        if vendor == 'mysql':
+            schema_editor.execute(f'ALTER TABLE {tabla} DROP INDEX {tabla}_texto_ft')
+        elif vendor == 'sqlite':
+            fts = f'{tabla}_busqueda'
+            for sufijo in ('ai', 'ad', 'au'):
+                schema_editor.execute(f'DROP TRIGGER IF EXISTS {fts}_{sufijo}')
+            schema_editor.execute(f'DROP TABLE IF EXISTS {fts}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_registro_cambios'),
+    ]
+
+    operations = [
+        # En SQLite, una migración posterior que reconstruya api_tarea o api_proyecto
+        # (p. ej. al cambiar una columna) elimina los triggers: hay que volver a crearlos
+        migrations.RunPython(crear_indices, eliminar_indices),
+    ]
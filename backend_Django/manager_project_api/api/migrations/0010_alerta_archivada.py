@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_busqueda_texto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertaArchivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('mensaje', models.TextField()),
+                ('fecha_emision', models.DateTimeField()),
+                ('archivada', models.DateTimeField(default=django.utils.timezone.now)),
+                ('usuario', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
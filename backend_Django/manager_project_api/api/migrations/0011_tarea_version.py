@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:05
+
+import importlib
+
+from django.db import migrations, models
+
+busqueda_texto = importlib.import_module('api.migrations.0009_busqueda_texto')
+
+
+def recrear_triggers_busqueda(apps, schema_editor):
+    # En SQLite, añadir la columna con un default reconstruye api_tarea y elimina los
+    # triggers del índice FTS5 de 0009 (quitarla puede no hacerlo): se vuelven a crear
+    # y se reindexa
+    if schema_editor.connection.vendor == 'sqlite':
+        for sufijo in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS api_tarea_busqueda_{sufijo}')
+        for sentencia in busqueda_texto.sql_sqlite('api_tarea')[1:]:
+            schema_editor.execute(sentencia)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_alerta_archivada'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, recrear_triggers_busqueda),
+        migrations.AddField(
+            model_name='tarea',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(recrear_triggers_busqueda, migrations.RunPython.noop),
+    ]
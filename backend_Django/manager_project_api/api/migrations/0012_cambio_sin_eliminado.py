@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:31
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_tarea_version'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='cambio',
+            name='eliminado',
+        ),
+    ]
@@ -1,18 +1,18 @@
 from django.utils import timezone
 from django.db import models
 from django.contrib.auth.models import AbstractUser
-from enum import Enum
 
-# Define el Enum para los estados de la tarea
-class EstadoTarea(Enum):
+# Define el Enum para los estados de la tarea (se guarda como entero pequeño)
+class EstadoTarea(models.IntegerChoices):
     PENDIENTE = 1
     DESARROLLO = 2
     TERMINADO = 3
     OBSERVADO = 4
 
-    @classmethod
-    def choices(cls):
-        return [(tag.name.lower(), tag.value) for tag in cls]
+    @property
+    def codigo(self):
+        # Nombre usado por la API y el frontend (p. ej. 'pendiente')
+        return self.name.lower()
 
 # Usuario
 class Usuario(AbstractUser):
@@ -41,6 +41,7 @@ class Proyecto(models.Model):
     fecha_inicio = models.DateField()
     fecha_finalizacion = models.DateField()
     usuario = models.ForeignKey(Usuario, related_name='proyectos', on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # Validador para ETag
 
     def __str__(self):
         return self.nombre
@@ -49,18 +50,42 @@ class Proyecto(models.Model):
 class Tarea(models.Model):
     nombre = models.CharField(max_length=255)
     descripcion = models.TextField()
-    estado = models.TextField()
+    estado = models.PositiveSmallIntegerField(choices=EstadoTarea.choices, default=EstadoTarea.PENDIENTE, db_index=True)
     asignada_a = models.ForeignKey(Usuario, related_name='tareas_asignadas', on_delete=models.CASCADE)
     proyecto = models.ForeignKey(Proyecto,  related_name='tareas', on_delete=models.CASCADE,)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # Validador para ETag
+    # Concurrencia optimista: cada cambio la incrementa con un UPDATE condicionado a la
+    # versión leída (api/transiciones.py)
+    version = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.nombre
 
+    class Meta:
+        indexes = [
+            # Tareas de un usuario dentro de un proyecto (tablero y filter_by_project)
+            models.Index(fields=['asignada_a', 'proyecto'], name='tarea_asignada_proyecto_idx'),
+        ]
+
+# Contadores materializados de tareas por proyecto, usuario asignado y estado
+# (api/contadores.py, activos con API_CONTADORES_PROYECTO)
+class ContadorTareas(models.Model):
+    proyecto = models.ForeignKey(Proyecto, related_name='contadores', on_delete=models.CASCADE)
+    asignada_a = models.ForeignKey(Usuario, related_name='+', on_delete=models.CASCADE)
+    estado = models.PositiveSmallIntegerField(choices=EstadoTarea.choices)
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['proyecto', 'asignada_a', 'estado'], name='contador_tareas_unico'),
+        ]
+
 class Alerta(models.Model):
     mensaje = models.TextField()
     usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE)  # El usuario al que va dirigida la alerta
     visible = models.BooleanField(default=True)  # Controlar si la alerta es visible o no
     fecha_emision = models.DateTimeField(default=timezone.now)  # Fecha de emisión de la alerta
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # Validador para ETag
 
     def __str__(self):
         return f'Alerta para {self.usuario.username} - {self.mensaje[:20]}...'
@@ -68,3 +93,49 @@ class Alerta(models.Model):
     class Meta:
         verbose_name = "Alerta"
         verbose_name_plural = "Alertas"
+        indexes = [
+            # Alertas de un usuario filtradas por visibilidad, las más recientes primero
+            models.Index(fields=['usuario', 'visible', '-fecha_emision'], name='alerta_usuario_visible_idx'),
+        ]
+
+# Alertas ocultas y antiguas retiradas de api_alerta por purgar_alertas --archivar
+# (api/retencion.py). Sin índices ni restricciones además de la clave: solo se consulta
+# de forma puntual y cada lote se inserta de una vez.
+class AlertaArchivada(models.Model):
+    id = models.BigIntegerField(primary_key=True)  # El id original de la alerta
+    usuario = models.ForeignKey(Usuario, related_name='+', on_delete=models.DO_NOTHING,
+                                db_constraint=False, db_index=False)
+    mensaje = models.TextField()
+    fecha_emision = models.DateTimeField()
+    archivada = models.DateTimeField(default=timezone.now)
+
+# Registro de cambios (solo inserciones) para /api/sync/: una fila por objeto creado,
+# modificado o eliminado y por usuario afectado (api/cambios.py). El id es el cursor.
+# No guarda el tipo de cambio: la vista lee el estado actual y da por eliminado lo que
+# el usuario ya no ve.
+class Cambio(models.Model):
+    PROYECTO = 'proyecto'
+    TAREA = 'tarea'
+    ALERTA = 'alerta'
+    TAREAS = 'tareas'  # Todas las tareas del proyecto objeto_id (cambió el proyecto)
+
+    id = models.BigAutoField(primary_key=True)
+    modelo = models.CharField(max_length=10)
+    objeto_id = models.BigIntegerField(null=True)  # None: todas las alertas del usuario desde fecha
+    # Sin restricción en la base: las lápidas de un usuario eliminado se siguen escribiendo
+    # (los admin las necesitan) y la compactación las retira
+    usuario = models.ForeignKey(Usuario, related_name='+', on_delete=models.DO_NOTHING, db_constraint=False)
+    fecha = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Cambios de un usuario a partir del cursor
+            models.Index(fields=['usuario', 'id'], name='cambio_usuario_idx'),
+            models.Index(fields=['modelo', 'objeto_id'], name='cambio_objeto_idx'),
+        ]
+
+# Compactaciones del registro de cambios: los cursores anteriores a `hasta` ya no
+# son válidos y el cliente debe recargar todo
+class CompactacionCambios(models.Model):
+    hasta = models.BigIntegerField()
+    fecha = models.DateTimeField(default=timezone.now)
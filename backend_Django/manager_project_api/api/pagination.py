@@ -0,0 +1,87 @@
+from rest_framework.pagination import CursorPagination
+
+
+def invertir_orden(ordering):
+    return tuple(campo[1:] if campo.startswith('-') else f'-{campo}' for campo in ordering)
+
+
+# Paginación por cursor (keyset) sobre el id: cada página es un
+# "WHERE id > cursor ORDER BY id LIMIT n", sin OFFSET ni COUNT(*)
+class IdCursorPagination(CursorPagination):
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    # La ruta síncrona es paginate_queryset de DRF sin cambios.
+
+    def ventana(self, queryset, request, view=None):
+        # La consulta de la página que pide el cursor de la petición, con la fila de
+        # más que usa DRF para saber si hay página siguiente (None sin paginación).
+        # Sirve para evaluarla con el ORM asíncrono y para el ETag de la página.
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        ordering = self.get_ordering(request, queryset, view)
+        cursor = self.decode_cursor(request)
+        offset, reverse, posicion = cursor if cursor is not None else (0, False, None)
+
+        queryset = queryset.order_by(*(invertir_orden(ordering) if reverse else ordering))
+        if posicion is not None:
+            campo = ordering[0]
+            # (cursor invertido) XOR (orden invertido)
+            operador = 'lt' if reverse != campo.startswith('-') else 'gt'
+            queryset = queryset.filter(**{f"{campo.lstrip('-')}__{operador}": posicion})
+        return queryset[offset:offset + page_size + 1]
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        # Variante asíncrona: evalúa ventana() con el ORM asíncrono y calcula los
+        # cursores con _completar_pagina. PaginacionAsincronaTests compara el resultado
+        # con el paginate_queryset de DRF para detectar cambios al actualizarlo.
+        consulta = self.ventana(queryset, request, view)
+        if consulta is None:
+            return None
+        return self._completar_pagina([fila async for fila in consulta], queryset, request, view)
+
+    def _completar_pagina(self, results, queryset, request, view):
+        # Segunda mitad de CursorPagination.paginate_queryset (DRF 3.18): el mismo
+        # estado (page, has_next, next_position...) que leen get_next_link y compañía
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, posicion = self.cursor if self.cursor is not None else (0, False, None)
+
+        self.page = list(results[:self.page_size])
+        siguiente = None
+        if len(results) > len(self.page):
+            siguiente = self._get_position_from_instance(results[-1], self.ordering)
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = posicion is not None or offset > 0
+            self.has_previous = siguiente is not None
+            self.next_position = posicion
+            self.previous_position = siguiente
+        else:
+            self.has_next = siguiente is not None
+            self.has_previous = posicion is not None or offset > 0
+            self.next_position = siguiente
+            self.previous_position = posicion
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_paginated_data(self, data):
+        # Mismo cuerpo que get_paginated_response, sin crear una Response de DRF
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+
+# Las alertas se recorren de la más reciente a la más antigua
+class AlertaCursorPagination(IdCursorPagination):
+    ordering = ('-fecha_emision', '-id')
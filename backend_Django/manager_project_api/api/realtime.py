@@ -0,0 +1,66 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+
+from .serializers import AlertaSerializer
+
+logger = logging.getLogger(__name__)
+
+
+# Broker en proceso: reparte las alertas nuevas entre las conexiones abiertas
+# (Server-Sent Events) de cada usuario. Las vistas síncronas publican desde
+# cualquier hilo y cada suscriptor recibe en su propio event loop. Solo llega a las
+# conexiones del mismo proceso: con varios workers, una alerta escrita en otro no se
+# envía y el cliente la recibe al recargar o con /api/sync/.
+class AlertaBroker:
+    def __init__(self, max_pendientes=100):
+        self.max_pendientes = max_pendientes
+        self._suscriptores = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def suscribir(self, usuario_id):
+        # Debe llamarse dentro del event loop que leerá la cola
+        cola = asyncio.Queue(maxsize=self.max_pendientes)
+        suscripcion = (asyncio.get_running_loop(), cola)
+        with self._lock:
+            self._suscriptores[usuario_id].add(suscripcion)
+        return suscripcion
+
+    def cancelar(self, usuario_id, suscripcion):
+        with self._lock:
+            suscripciones = self._suscriptores.get(usuario_id)
+            if suscripciones is None:
+                return
+            suscripciones.discard(suscripcion)
+            if not suscripciones:
+                del self._suscriptores[usuario_id]
+
+    def conexiones(self, usuario_id):
+        with self._lock:
+            return len(self._suscriptores.get(usuario_id, ()))
+
+    def publicar(self, usuario_id, datos):
+        with self._lock:
+            suscripciones = list(self._suscriptores.get(usuario_id, ()))
+        for loop, cola in suscripciones:
+            try:
+                loop.call_soon_threadsafe(self._encolar, cola, datos)
+            except RuntimeError:
+                # El loop ya se cerró; la conexión se limpiará al cancelar
+                logger.debug("Suscripción cerrada para el usuario %s", usuario_id)
+
+    @staticmethod
+    def _encolar(cola, datos):
+        # Un cliente lento no bloquea al resto: se descarta la alerta más antigua
+        if cola.full():
+            cola.get_nowait()
+        cola.put_nowait(datos)
+
+
+broker = AlertaBroker()
+
+
+def publicar_alertas(alertas):
+    for alerta in alertas:
+        broker.publicar(alerta.usuario_id, AlertaSerializer(alerta).data)
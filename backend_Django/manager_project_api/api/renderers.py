@@ -0,0 +1,36 @@
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+
+class ORJSONRenderer(JSONRenderer):
+    # Mismo JSON que JSONRenderer (compacto, sin escapar unicode) codificado con orjson.
+    # Las fechas y los tipos que orjson no conoce pasan por el encoder de DRF para que
+    # el resultado sea idéntico. Con ?indent (API navegable) o sin orjson, usa json.
+    OPCIONES = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.ensure_ascii or not self.compact or \
+                self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self.encoder_class().default, option=self.OPCIONES)
+        # Igual que JSONRenderer: U+2028 y U+2029 escapados
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+def renderizar_json(datos):
+    # Para las respuestas fuera de DRF (vistas asíncronas): el primer renderer JSON
+    # configurado, para devolver los mismos bytes que los viewsets
+    for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES:
+        if issubclass(renderer_class, JSONRenderer):
+            return renderer_class().render(datos)
+    return JSONRenderer().render(datos)
@@ -0,0 +1,127 @@
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+# Réplicas de lectura: las acciones de solo lectura de los viewsets (LecturaReplicaMixin)
+# leen de una réplica de API_REPLICAS['ALIAS'] y el resto de consultas va a 'default'.
+# Tras una escritura, las lecturas del mismo usuario vuelven a la primaria durante
+# PEGAJOSO segundos para que vea sus propios cambios aunque la réplica vaya retrasada.
+
+# Configuración por defecto; se sobrescribe con API_REPLICAS en settings.py
+REPLICAS_POR_DEFECTO = {
+    'ALIAS': [],  # alias de DATABASES que son réplicas
+    'PEGAJOSO': 5,  # segundos de lectura en la primaria tras escribir (retraso máximo esperado)
+    'REINTENTO': 30,  # segundos sin usar una réplica que no acepta conexiones
+}
+
+CLAVE_PRIMARIA = 'api:replicas:primaria:{}'
+
+# Estado de la petición en curso: {'leer': acción de lectura, 'escrito': hubo una
+# escritura, 'alias': réplica elegida}. None fuera de los viewsets con el mixin.
+_peticion = ContextVar('replicas_peticion', default=None)
+
+# Réplicas caídas y hasta cuándo no se vuelven a probar (por proceso)
+_caidas = {}
+
+
+def configuracion():
+    return {**REPLICAS_POR_DEFECTO, **getattr(settings, 'API_REPLICAS', {})}
+
+
+def _cache():
+    return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+
+def iniciar(leer, usuario):
+    # Al empezar la acción del viewset; devuelve el token para terminar()
+    leer = leer and bool(configuracion()['ALIAS']) and not en_primaria(usuario)
+    return _peticion.set({'leer': leer, 'escrito': False, 'alias': None})
+
+
+def terminar(token, usuario):
+    estado = _peticion.get()
+    _peticion.reset(token)
+    if estado is not None and estado['escrito'] and getattr(usuario, 'is_authenticated', False):
+        _cache().set(CLAVE_PRIMARIA.format(usuario.pk), True, timeout=configuracion()['PEGAJOSO'])
+
+
+def en_primaria(usuario):
+    # El usuario escribió hace menos de PEGAJOSO segundos
+    if not getattr(usuario, 'is_authenticated', False):
+        return False
+    return _cache().get(CLAVE_PRIMARIA.format(usuario.pk)) is not None
+
+
+def en_replica():
+    # La petición en curso lee (o leerá) de una réplica
+    estado = _peticion.get()
+    return estado is not None and estado['leer'] and not estado['escrito']
+
+
+def elegir_replica():
+    # Una réplica al azar entre las disponibles; None si no responde ninguna. Con
+    # CONN_HEALTH_CHECKS una conexión persistente rota se cierra y se vuelve a abrir.
+    ahora = time.monotonic()
+    config = configuracion()
+    candidatas = [alias for alias in config['ALIAS'] if _caidas.get(alias, 0) <= ahora]
+    random.shuffle(candidatas)
+    for alias in candidatas:
+        conexion = connections[alias]
+        try:
+            conexion.close_if_health_check_failed()
+            conexion.ensure_connection()
+        except DatabaseError:
+            logger.warning("Réplica %s no disponible; se lee de la primaria durante %s s", alias, config['REINTENTO'])
+            _caidas[alias] = ahora + config['REINTENTO']
+            continue
+        _caidas.pop(alias, None)
+        return alias
+    return None
+
+
+class RouterReplicas:
+    def db_for_read(self, model, **hints):
+        estado = _peticion.get()
+        if estado is None or not estado['leer'] or estado['escrito']:
+            return 'default'
+        if estado['alias'] is None:
+            # Una réplica por petición: todas sus lecturas ven el mismo estado
+            estado['alias'] = elegir_replica() or 'default'
+        return estado['alias']
+
+    def db_for_write(self, model, **hints):
+        estado = _peticion.get()
+        if estado is not None:
+            estado['escrito'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Las réplicas tienen los mismos datos que la primaria
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in configuracion()['ALIAS']
+
+
+class LecturaReplicaMixin:
+    # Viewsets cuyas acciones de solo lectura pueden servirse desde una réplica
+    acciones_replica = ('list', 'retrieve', 'me', 'filter_by_project')
+
+    def initial(self, request, *args, **kwargs):
+        # Después de autenticar, para conocer al usuario (y su rastro de escrituras)
+        super().initial(request, *args, **kwargs)
+        self._replicas_token = iniciar(self.action in self.acciones_replica, request.user)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replicas_token', None)
+        if token is not None:
+            self._replicas_token = None
+            terminar(token, request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,75 @@
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+
+from . import cambios
+from .models import Alerta, AlertaArchivada
+from .signals import lapidas_por_fila
+
+# Retención de alertas: update_visibility y mark-all-read solo ocultan (visible=False),
+# así que las alertas descartadas se acumulan. purgar() elimina las ocultas emitidas
+# antes de una fecha, opcionalmente copiándolas a AlertaArchivada, por lotes de ids
+# consecutivos con una transacción corta por lote.
+
+# Configuración por defecto; se sobrescribe con API_RETENCION_ALERTAS en settings.py
+RETENCION_POR_DEFECTO = {
+    'DIAS': 90,  # antigüedad mínima (fecha_emision) de una alerta oculta para purgarla
+    'LOTE': 1000,  # filas por transacción
+    'ARCHIVAR': False,  # copiarlas a AlertaArchivada antes de eliminarlas
+    'PAUSA': 0,  # segundos entre lotes, para dejar paso a otras escrituras y réplicas
+}
+
+
+def configuracion():
+    return {**RETENCION_POR_DEFECTO, **getattr(settings, 'API_RETENCION_ALERTAS', {})}
+
+
+def purgar(antes_de, lote=None, archivar=None, pausa=None):
+    # Generador: procesa un lote por iteración y devuelve las filas eliminadas en él
+    config = configuracion()
+    lote = lote or config['LOTE']
+    archivar = config['ARCHIVAR'] if archivar is None else archivar
+    pausa = config['PAUSA'] if pausa is None else pausa
+
+    candidatas = Alerta.objects.filter(visible=False, fecha_emision__lt=antes_de)
+    inicio = 0
+    while True:
+        # El siguiente rango de ids se localiza fuera de la transacción recorriendo la
+        # clave primaria desde el último lote, sin volver a leer lo ya purgado
+        ids = list(candidatas.filter(id__gt=inicio).order_by('id').values_list('id', flat=True)[:lote])
+        if not ids:
+            return
+        inicio = ids[-1]
+        yield purgar_rango(candidatas.filter(id__gte=ids[0], id__lte=ids[-1]), archivar)
+        if pausa:
+            time.sleep(pausa)
+
+
+@contextmanager
+def sin_lapidas_por_fila():
+    # registrar_lapida no escribe nada en este contexto; purgar_rango escribe las lápidas
+    # del lote juntas. Otros hilos y peticiones que eliminen alertas a la vez siguen
+    # registrando las suyas.
+    token = lapidas_por_fila.set(False)
+    try:
+        yield
+    finally:
+        lapidas_por_fila.reset(token)
+
+
+def purgar_rango(alertas, archivar):
+    with transaction.atomic():
+        # Se bloquean y se vuelven a filtrar: una alerta que cambió desde la búsqueda
+        # del rango no se elimina
+        filas = list(alertas.select_for_update().order_by('id').values('id', 'usuario_id', 'mensaje', 'fecha_emision'))
+        if not filas:
+            return 0
+        if archivar:
+            AlertaArchivada.objects.bulk_create([AlertaArchivada(**fila) for fila in filas])
+        with sin_lapidas_por_fila():
+            Alerta.objects.filter(id__in=[fila['id'] for fila in filas]).delete()
+        # Lápidas para /api/sync/ en una sola inserción
+        cambios.registrar([Alerta(id=fila['id'], usuario_id=fila['usuario_id']) for fila in filas], eliminados=True)
+    return len(filas)
@@ -0,0 +1,54 @@
+"""
+Benchmark de las consultas más frecuentes sobre Tarea y Alerta.
+
+Muestra el plan de ejecución (EXPLAIN) y el tiempo medio de cada consulta para
+comparar el esquema antes y después de la migración 0005 (estado entero e
+índices compuestos). Para obtener el "antes", ejecutarlo con la base migrada a
+0004 y el código de ese punto; el "después", con la base migrada a 0005.
+
+Uso desde el shell de Django:
+
+    python manage.py shell -c "from api.scripts.benchmark_indices import sembrar, medir_consultas; sembrar(); medir_consultas()"
+"""
+import time
+
+from django.core.management import call_command
+
+from api.models import EstadoTarea, Usuario, Tarea, Alerta
+
+
+def sembrar(usuarios=200, proyectos=2000, tareas=200000, alertas=200000):
+    # Genera datos de prueba con el comando generar_datos; no repite la siembra si ya hay tareas suficientes
+    if Tarea.objects.count() >= tareas:
+        print("Ya existen suficientes datos sembrados.")
+        return
+    call_command(
+        'generar_datos', usuarios=usuarios, proyectos=proyectos, tareas=tareas, alertas=alertas,
+        prefijo=f'bench{Usuario.objects.count()}_',
+    )
+
+
+def consultas_frecuentes():
+    tarea = Tarea.objects.order_by('-id').first()
+    return {
+        'tareas de un usuario en un proyecto': Tarea.objects.filter(
+            asignada_a_id=tarea.asignada_a_id, proyecto_id=tarea.proyecto_id),
+        'tareas pendientes': Tarea.objects.filter(estado=EstadoTarea.PENDIENTE)[:100],
+        'alertas visibles de un usuario': Alerta.objects.filter(
+            usuario_id=tarea.asignada_a_id, visible=True).order_by('-fecha_emision')[:100],
+    }
+
+
+def medir_consultas(repeticiones=20):
+    # Imprime el plan y el tiempo medio (ms) de cada consulta
+    resultados = {}
+    for nombre, queryset in consultas_frecuentes().items():
+        plan = queryset.explain()
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            list(queryset.all())
+        media_ms = (time.perf_counter() - inicio) * 1000 / repeticiones
+        resultados[nombre] = {'plan': plan, 'media_ms': round(media_ms, 3)}
+        print(f"== {nombre}: {media_ms:.3f} ms")
+        print(plan)
+    return resultados
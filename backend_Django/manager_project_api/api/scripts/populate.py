@@ -1,4 +1,4 @@
-from api.models import Usuario, Proyecto, Tarea, Alerta
+from api.models import EstadoTarea, Usuario, Proyecto, Tarea, Alerta
 from django.utils import timezone
 import random
 
@@ -53,7 +53,7 @@ def poblar_datos():
             tarea = Tarea.objects.create(
                 nombre=f'Tarea {j} del {proyecto.nombre}',
                 descripcion=f'Descripción de la tarea {j} del proyecto {i}',
-                estado='pendiente',
+                estado=EstadoTarea.PENDIENTE,
                 asignada_a=user_number,  # Asigna un usuario aleatorio a la tarea
                 proyecto=proyecto
             )
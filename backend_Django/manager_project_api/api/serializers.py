@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Alerta, Usuario, Proyecto, Tarea
+from .models import Alerta, EstadoTarea, Usuario, Proyecto, Tarea
 from django.contrib.auth.hashers import make_password
 
 class UsuarioSerializer(serializers.ModelSerializer):
@@ -27,13 +27,134 @@ class ProyectoSerializer(serializers.ModelSerializer):
         model = Proyecto
         fields = ['id', 'nombre', 'descripcion', 'fecha_inicio', 'fecha_finalizacion', 'usuario']
 
+class EstadoTareaField(serializers.Field):
+    # El estado se guarda como entero pero la API lo expone por nombre ('pendiente', ...)
+    default_error_messages = {
+        'invalid': 'Estado no válido. Valores permitidos: {opciones}.',
+    }
+
+    # Nombres que enviaba el frontend antes de usar los de EstadoTarea
+    ALIAS = {
+        'en_progreso': EstadoTarea.DESARROLLO,
+        'completada': EstadoTarea.TERMINADO,
+    }
+
+    def to_representation(self, value):
+        return EstadoTarea(value).codigo
+
+    def to_internal_value(self, data):
+        if isinstance(data, int) and data in EstadoTarea.values:
+            return EstadoTarea(data)
+        if isinstance(data, str):
+            nombre = data.strip().lower()
+            if nombre in self.ALIAS:
+                return self.ALIAS[nombre]
+            if nombre.upper() in EstadoTarea.names:
+                return EstadoTarea[nombre.upper()]
+        self.fail('invalid', opciones=', '.join(estado.codigo for estado in EstadoTarea))
+
+
 class TareaSerializer(serializers.ModelSerializer):
     proyecto = ProyectoSerializer(read_only=True)  
+    estado = EstadoTareaField(required=False)
+    # En PUT/PATCH, la versión que leyó el cliente (transiciones.version_esperada); no
+    # se guarda nunca tal cual
+    version = serializers.IntegerField(required=False, min_value=0)
     class Meta:
         model = Tarea
-        fields = ['id', 'nombre', 'descripcion', 'estado', 'proyecto', 'asignada_a']
+        fields = ['id', 'nombre', 'descripcion', 'estado', 'proyecto', 'asignada_a', 'version']
+
+    def create(self, validated_data):
+        validated_data.pop('version', None)
+        return super().create(validated_data)
+
+class TareaBulkSerializer(serializers.Serializer):
+    # Valida cada tarea de /tasks/bulk/ sin consultar la base: proyectos y usuarios
+    # se resuelven después para toda la lista con una consulta id__in
+    id = serializers.IntegerField(required=False)
+    nombre = serializers.CharField(max_length=255)
+    descripcion = serializers.CharField(allow_blank=True)
+    estado = EstadoTareaField(required=False)
+    proyecto = serializers.IntegerField()
+    asignada_a = serializers.IntegerField()
+
+    def validate(self, attrs):
+        if self.partial and 'id' not in attrs:
+            raise serializers.ValidationError({'id': 'El id es obligatorio para actualizar.'})
+        return attrs
+
+
+class IdsSerializer(serializers.Serializer):
+    # Cuerpo {"ids": [...]} de las operaciones sobre varios objetos
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
 
 class AlertaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Alerta
-        fields = ['id', 'mensaje', 'usuario', 'visible', 'fecha_emision'] 
\ No newline at end of file
+        fields = ['id', 'mensaje', 'usuario', 'visible', 'fecha_emision'] 
+
+class LecturaValores:
+    # Ruta rápida de solo lectura: la misma representación que serializer_class a partir
+    # de filas de values(), sin instanciar modelos ni recorrer los campos de DRF por fila.
+    # Los conversores de cada campo se calculan una vez; los serializers anidados se leen
+    # con un JOIN (prefijo 'relacion__') y cada objeto anidado se construye una sola vez.
+    IDENTIDAD = (serializers.CharField, serializers.IntegerField, serializers.BooleanField)
+
+    def __init__(self, serializer_class, prefijo=''):
+        self.serializer_class = serializer_class
+        self.prefijo = prefijo
+        self._mapeo = None
+
+    @property
+    def mapeo(self):
+        # (nombre, columna, conversor, anidado) por campo legible
+        if self._mapeo is None:
+            mapeo = []
+            for nombre, campo in self.serializer_class().fields.items():
+                if campo.write_only:
+                    continue
+                if isinstance(campo, serializers.ModelSerializer):
+                    anidado = LecturaValores(type(campo), f'{self.prefijo}{campo.source}__')
+                    mapeo.append((nombre, f'{self.prefijo}{campo.source}', None, anidado))
+                elif isinstance(campo, serializers.PrimaryKeyRelatedField):
+                    mapeo.append((nombre, f'{self.prefijo}{campo.source}', None, None))
+                elif isinstance(campo, self.IDENTIDAD):
+                    mapeo.append((nombre, f'{self.prefijo}{campo.source}', None, None))
+                elif isinstance(campo, (serializers.SerializerMethodField, serializers.BaseSerializer)):
+                    raise ValueError(f'{self.serializer_class.__name__}.{nombre} no admite la lectura por values().')
+                else:
+                    mapeo.append((nombre, f'{self.prefijo}{campo.source}', campo.to_representation, None))
+            self._mapeo = mapeo
+        return self._mapeo
+
+    @property
+    def columnas(self):
+        columnas = []
+        for _, columna, _, anidado in self.mapeo:
+            columnas.extend(anidado.columnas if anidado is not None else [columna])
+        return columnas
+
+    def representar(self, filas):
+        cache = {}
+        return [self.representar_fila(fila, cache) for fila in filas]
+
+    def representar_fila(self, fila, cache):
+        datos = {}
+        for nombre, columna, conversor, anidado in self.mapeo:
+            if anidado is not None:
+                datos[nombre] = anidado.anidado(fila, columna, cache)
+                continue
+            valor = fila[columna]
+            datos[nombre] = conversor(valor) if conversor is not None and valor is not None else valor
+        return datos
+
+    def anidado(self, fila, columna, cache):
+        # El mismo objeto para todas las filas que apuntan a la misma relación
+        pk = fila[f'{columna}__id']
+        if pk is None:
+            return None
+        clave = (columna, pk)
+        if clave not in cache:
+            cache[clave] = self.representar_fila(fila, cache)
+        return cache[clave]
@@ -1,7 +1,72 @@
-from django.db.models.signals import post_migrate
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
-from api.scripts.populate import poblar_datos
+from api import cambios, contadores
+from api.cache_lecturas import invalidar_lecturas
+from api.models import Alerta, Proyecto, Tarea, Usuario
+from api.realtime import publicar_alertas
+
+# False mientras retencion.purgar_rango borra un lote: escribe sus lápidas juntas.
+# Solo afecta al contexto (hilo o tarea) que lo cambia; el receptor sigue conectado.
+lapidas_por_fila = ContextVar('lapidas_por_fila', default=True)
+
+@receiver(post_save, sender=Alerta)
+def publicar_alerta(sender, instance, created, **kwargs):
+    # Enviar la alerta nueva a las conexiones abiertas del usuario una vez confirmada
+    if created:
+        transaction.on_commit(lambda: publicar_alertas([instance]))
+
+@receiver(post_save, sender=Tarea)
+@receiver(post_delete, sender=Tarea)
+@receiver(post_save, sender=Proyecto)
+@receiver(post_delete, sender=Proyecto)
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def invalidar_cache_lecturas(sender, update_fields=None, **kwargs):
+    # El rehash de la contraseña al hacer login no cambia ninguna lectura cacheada
+    if update_fields is not None and set(update_fields) <= {'password', 'last_login'}:
+        return
+    # Tras confirmar, para que una lectura concurrente no guarde datos sin confirmar
+    transaction.on_commit(invalidar_lecturas)
+
+@receiver(post_init, sender=Tarea)
+def recordar_contador(sender, instance, **kwargs):
+    contadores.recordar(instance)
+
+@receiver(post_save, sender=Tarea)
+def actualizar_contador(sender, instance, **kwargs):
+    # bulk_create y bulk_update no envían post_save: las vistas llaman a contadores.aplicar
+    if contadores.activos():
+        contadores.aplicar([instance])
+
+@receiver(post_delete, sender=Tarea)
+def retirar_contador(sender, instance, **kwargs):
+    if contadores.activos():
+        contadores.retirar([instance])
+
+@receiver(post_init, sender=Tarea)
+@receiver(post_init, sender=Proyecto)
+@receiver(post_init, sender=Alerta)
+def recordar_dueno(sender, instance, **kwargs):
+    cambios.recordar(instance)
+
+@receiver(post_save, sender=Tarea)
+@receiver(post_save, sender=Proyecto)
+@receiver(post_save, sender=Alerta)
+def registrar_cambio(sender, instance, created, raw=False, **kwargs):
+    # Las rutas en bloque (bulk_create, bulk_update, update) llaman a cambios.registrar*
+    if raw:
+        return
+    cambios.registrar([instance])
+    if sender is Proyecto and not created:
+        cambios.registrar_tareas_de_proyecto(instance)
 
-@receiver(post_migrate)
-def ejecutar_poblamiento(sender, **kwargs):
-    poblar_datos()
\ No newline at end of file
+@receiver(post_delete, sender=Tarea)
+@receiver(post_delete, sender=Proyecto)
+@receiver(post_delete, sender=Alerta)
+def registrar_lapida(sender, instance, **kwargs):
+    if not lapidas_por_fila.get():
+        return
+    cambios.registrar([instance], eliminados=True)
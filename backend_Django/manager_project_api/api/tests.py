@@ -1,3 +1,1464 @@
-from django.test import TestCase
+import asyncio
+import contextvars
+import io
+import json
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections
+from django.db.models import F
+from unittest import mock, skipIf, skipUnless
+
+from django.http import HttpResponse
+from django.test import AsyncClient, AsyncRequestFactory, RequestFactory, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import tokens_para_usuario
+from .cache_lecturas import invalidar_lecturas
+
+from . import cambios, cola_alertas, retencion, transiciones
+from .throttling import CubosEnCache, CubosEnMemoria, gastar_ficha
+from . import vistas_asincronas
+from .views import TareaViewSet
+from .login import login_asincrono, obtener_pool
+from .instrumentacion import InstrumentacionMiddleware, MedidorConsultas, registro
+from .pagination import AlertaCursorPagination
+from .models import Alerta, AlertaArchivada, Cambio, ContadorTareas, EstadoTarea, Proyecto, Tarea, Usuario
+from .realtime import broker
+from .replicas import RouterReplicas, elegir_replica
+from .renderers import ORJSONRenderer, orjson
+from .serializers import AlertaSerializer, LecturaValores, ProyectoSerializer, TareaSerializer
+
+
+CACHE_LOCAL = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'}}
+
+# Las alertas se escriben dentro de la petición para poder comprobarlas en los tests
+# y la cache de lecturas se desactiva salvo en los tests que la prueban
+ajustes_tests = override_settings(
+    ALERTAS_COLA={'BACKEND': 'api.cola_alertas.ColaSincrona'},
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+    # Hash rápido para no pagar el coste real en cada usuario de prueba
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    API_THROTTLE={'ACTIVO': False},
+)
+
+
+def setUpModule():
+    ajustes_tests.enable()
+
+
+def tearDownModule():
+    ajustes_tests.disable()
+
+
+def crear_proyecto(usuario, nombre='Proyecto'):
+    return Proyecto.objects.create(
+        nombre=nombre,
+        descripcion=f'Descripción de {nombre}',
+        fecha_inicio=timezone.now().date(),
+        fecha_finalizacion=timezone.now().date(),
+        usuario=usuario,
+    )
+
+
+def tasas_throttle(**tasas):
+    return override_settings(
+        API_THROTTLE={'ACTIVO': True},
+        REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': tasas},
+    )
+
+
+def sin_ids_en_bulk_create():
+    # Como en MySQL: bulk_create no deja el id en los objetos creados
+    return mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert',
+                             new_callable=mock.PropertyMock, return_value=False)
+
+
+def crear_tareas(proyecto, usuario, cantidad):
+    Tarea.objects.bulk_create(
+        Tarea(
+            nombre=f'Tarea {i}',
+            descripcion=f'Descripción de la tarea {i}',
+            estado=EstadoTarea.PENDIENTE,
+            asignada_a=usuario,
+            proyecto=proyecto,
+        )
+        for i in range(cantidad)
+    )
+
+
+class TareaListTests(APITestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(username='jefe', password='x', rol='admin')
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', rol='usuario')
+        self.client.force_authenticate(self.admin)
+
+    def contar_consultas(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/tasks/')
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.data['results']
+
+    def test_agrupa_tareas_por_proyecto(self):
+        proyecto = crear_proyecto(self.usuario, 'Tablero')
+        crear_tareas(proyecto, self.usuario, 3)
+
+        _, data = self.contar_consultas()
+        grupo = next(p for p in data if p['id'] == proyecto.id)
+
+        self.assertEqual(grupo['nombre'], 'Tablero')
+        self.assertEqual(grupo['usuario'], self.usuario.id)
+        self.assertEqual(len(grupo['tareas']), 3)
+        self.assertEqual(grupo['tareas'][0]['asignada_a'], self.usuario.id)
+        self.assertEqual(grupo['tareas'][0]['estado'], 'pendiente')
+
+    def test_numero_de_consultas_constante(self):
+        proyecto = crear_proyecto(self.usuario, 'Pocas')
+        crear_tareas(proyecto, self.usuario, 2)
+        pocas, _ = self.contar_consultas()
+
+        for i in range(10):
+            crear_tareas(crear_proyecto(self.admin, f'Proyecto {i}'), self.usuario, 20)
+        muchas, _ = self.contar_consultas()
+
+        self.assertEqual(pocas, muchas)
+        # Agregado para el ETag + listado
+        self.assertLessEqual(muchas, 2)
+
+    def test_paginacion_por_cursor(self):
+        proyecto = crear_proyecto(self.usuario, 'Paginado')
+        crear_tareas(proyecto, self.usuario, 5)
+
+        ids = []
+        url = '/api/tasks/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            for grupo in response.data['results']:
+                ids.extend(t['id'] for t in grupo['tareas'])
+            url = response.data['next']
+
+        self.assertEqual(ids, sorted(Tarea.objects.values_list('id', flat=True)))
+
+
+class PaginacionAsincronaTests(APITestCase):
+    # apaginate_queryset calcula los cursores fuera de DRF: debe coincidir con
+    # el paginate_queryset de la versión instalada
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', rol='usuario')
+        fecha = timezone.now()
+        # Fechas repetidas para que los cursores necesiten offset
+        Alerta.objects.bulk_create([
+            Alerta(usuario=self.usuario, mensaje=f'alerta {i}', fecha_emision=fecha - timedelta(minutes=i // 3))
+            for i in range(8)
+        ])
+
+    def paginar(self, url):
+        peticion = Request(RequestFactory().get(url))
+        queryset = Alerta.objects.values('id', 'fecha_emision')
+        sincrono = AlertaCursorPagination()
+        asincrono = AlertaCursorPagination()
+        esperado = sincrono.paginate_queryset(queryset, peticion)
+        pagina = async_to_sync(asincrono.apaginate_queryset)(queryset, peticion)
+        self.assertEqual(pagina, esperado)
+        self.assertEqual(asincrono.get_paginated_data(None), sincrono.get_paginated_data(None))
+        return sincrono.get_next_link(), sincrono.get_previous_link()
+
+    def test_misma_pagina_y_cursores_que_drf(self):
+        url, anteriores = '/api/alertas/?page_size=2', []
+        while url:
+            siguiente, anterior = self.paginar(url)
+            if anterior:
+                anteriores.append(anterior)
+            url = siguiente
+        self.assertTrue(anteriores)
+        for anterior in anteriores:
+            self.paginar(anterior)
+
+
+class EstadoTareaTests(APITestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(username='jefe', password='x', rol='admin')
+        self.client.force_authenticate(self.admin)
+        crear_tareas(crear_proyecto(self.admin), self.admin, 1)
+        self.tarea = Tarea.objects.latest('id')
+
+    def test_estado_por_nombre(self):
+        response = self.client.patch(f'/api/tasks/{self.tarea.id}/', {'estado': 'observado'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['estado'], 'observado')
+        self.tarea.refresh_from_db()
+        self.assertEqual(self.tarea.estado, EstadoTarea.OBSERVADO)
+        self.assertTrue(Alerta.objects.filter(usuario=self.admin, mensaje__contains="'observado'").exists())
+
+    def test_estado_alias_y_no_valido(self):
+        response = self.client.patch(f'/api/tasks/{self.tarea.id}/', {'estado': 'completada'})
+        self.assertEqual(response.data['estado'], 'terminado')
+
+        response = self.client.patch(f'/api/tasks/{self.tarea.id}/', {'estado': 'archivada'})
+        self.assertEqual(response.status_code, 400)
+
+
+class TransicionesTareaTests(APITestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(username='jefe', password='x', rol='admin')
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', rol='usuario')
+        self.tarea = Tarea.objects.create(nombre='Tarea', descripcion='d', proyecto=crear_proyecto(self.admin),
+                                          asignada_a=self.usuario)
+
+    def patch(self, usuario, datos):
+        self.client.force_authenticate(usuario)
+        return self.client.patch(f'/api/tasks/{self.tarea.id}/', datos, format='json')
+
+    def test_cambio_de_estado_con_version(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.patch(self.usuario, {'estado': 'desarrollo', 'version': 0})
+        self.assertEqual(response.status_code, 200)
+        # Lectura con el proyecto, UPDATE condicionado, registro de cambios y la alerta
+        # (con su registro), sin contar los savepoints
+        sentencias = [consulta['sql'] for consulta in ctx.captured_queries if 'SAVEPOINT' not in consulta['sql']]
+        self.assertEqual([sentencia.split()[0] for sentencia in sentencias], ['SELECT', 'UPDATE', 'INSERT', 'INSERT', 'INSERT'])
+        self.assertIn('"version" = 0', sentencias[1])
+        self.assertEqual(response.json()['version'], 1)
+        self.assertEqual(response.json(), self.client.get(f'/api/tasks/{self.tarea.id}/').json())
+
+    def test_version_obsoleta_responde_409(self):
+        # Dos clientes leyeron la versión 0: el segundo no pisa al primero
+        self.assertEqual(self.patch(self.admin, {'nombre': 'Primero', 'version': 0}).status_code, 200)
+        response = self.patch(self.usuario, {'estado': 'terminado', 'version': 0})
+        self.assertEqual(response.status_code, 409)
+        self.tarea.refresh_from_db()
+        self.assertEqual((self.tarea.nombre, self.tarea.estado, self.tarea.version), ('Primero', EstadoTarea.PENDIENTE, 1))
+
+        # Una escritura entre la lectura y el UPDATE tampoco se pierde
+        version_esperada = transiciones.version_esperada
+
+        def concurrente(valor, actual):
+            Tarea.objects.filter(id=self.tarea.id).update(version=F('version') + 1)
+            return version_esperada(valor, actual)
+
+        with mock.patch('api.transiciones.version_esperada', side_effect=concurrente):
+            self.assertEqual(self.patch(self.admin, {'nombre': 'Segundo'}).status_code, 409)
+        self.assertEqual(Tarea.objects.get(id=self.tarea.id).nombre, 'Primero')
+
+    def test_version_no_entera_responde_400(self):
+        for version in ('²', 'x', -1):
+            response = self.patch(self.admin, {'nombre': 'Otro', 'version': version})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('version', response.json())
+
+    def test_transiciones_y_permisos(self):
+        self.assertEqual(self.patch(self.usuario, {'estado': 'terminado'}).status_code, 200)
+        response = self.patch(self.usuario, {'estado': 'pendiente'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("'terminado' no puede pasar a 'pendiente'", response.json()['msg'])
+        self.assertEqual(self.patch(self.usuario, {'estado': 'observado'}).status_code, 200)
+
+        # El usuario asignado solo cambia el estado, aunque envíe la tarea completa (PUT)
+        self.client.force_authenticate(self.usuario)
+        tarea = self.client.get(f'/api/tasks/{self.tarea.id}/').json()
+        response = self.client.put(f'/api/tasks/{self.tarea.id}/', {**tarea, 'estado': 'desarrollo'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.patch(self.usuario, {'nombre': 'Otro'}).status_code, 403)
+
+        response = self.client.patch('/api/tasks/bulk/', [{'id': self.tarea.id, 'estado': 'pendiente'}], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['version'], 4)
+
+
+class AlertaFiltrosTests(APITestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', rol='usuario')
+        otro = Usuario.objects.create_user(username='otro', password='x', rol='usuario')
+        self.client.force_authenticate(self.usuario)
+        self.ahora = timezone.now()
+        Alerta.objects.bulk_create([
+            Alerta(usuario=self.usuario, mensaje='vieja', visible=False, fecha_emision=self.ahora - timedelta(days=2)),
+            Alerta(usuario=self.usuario, mensaje='ayer', visible=True, fecha_emision=self.ahora - timedelta(days=1)),
+            Alerta(usuario=self.usuario, mensaje='nueva', visible=True, fecha_emision=self.ahora),
+            Alerta(usuario=otro, mensaje='ajena', visible=True, fecha_emision=self.ahora),
+        ])
+
+    def mensajes(self, params):
+        response = self.client.get('/api/alertas/', params)
+        self.assertEqual(response.status_code, 200)
+        return [alerta['mensaje'] for alerta in response.data['results']]
+
+    def test_filtra_por_visible_y_since(self):
+        self.assertEqual(self.mensajes({'visible': '1'}), ['nueva', 'ayer'])
+        self.assertEqual(self.mensajes({'visible': '0'}), ['vieja'])
+        since = (self.ahora - timedelta(hours=1)).isoformat()
+        self.assertEqual(self.mensajes({'since': since}), ['nueva'])
+
+    def test_parametros_no_validos(self):
+        self.assertEqual(self.client.get('/api/alertas/', {'visible': 'quizas'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/alertas/', {'since': 'ayer'}).status_code, 400)
+
+    def test_unread_count(self):
+        response = self.client.get('/api/alertas/unread-count/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'unread': 2})
+
+    def test_mark_all_read_un_update(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/alertas/mark-all-read/')
+        self.assertEqual(response.data, {'actualizadas': 2})
+        # Un UPDATE sobre las alertas, sin SELECT previo (más la fila del registro de cambios)
+        sentencias = [consulta['sql'] for consulta in ctx.captured_queries if 'api_alerta' in consulta['sql']]
+        self.assertEqual(len(sentencias), 1)
+        self.assertTrue(sentencias[0].startswith('UPDATE'))
+        # La alerta de otro usuario no se toca
+        self.assertEqual(Alerta.objects.filter(visible=True).values_list('mensaje', flat=True).get(), 'ajena')
+
+    def test_mark_read_before(self):
+        before = (self.ahora - timedelta(hours=1)).isoformat()
+        response = self.client.patch(f'/api/alertas/mark-all-read/?before={before.replace("+", "%2B")}')
+        self.assertEqual(response.data, {'actualizadas': 1})
+        self.assertEqual(self.mensajes({'visible': '1'}), ['nueva'])
+        self.assertEqual(self.client.post('/api/alertas/mark-all-read/', {'before': 'ayer'}).status_code, 400)
+
+    def test_update_visibility_solo_alertas_propias(self):
+        propias = list(Alerta.objects.filter(usuario=self.usuario).values_list('id', flat=True))
+        ajena = Alerta.objects.get(mensaje='ajena').id
+
+        response = self.client.patch('/api/alertas/update-visibility/', {'ids': [*propias, ajena]}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Alerta.objects.get(id=ajena).visible)
+        self.assertEqual(self.mensajes({'visible': '1'}), ['nueva', 'ayer'])
+
+        response = self.client.patch('/api/alertas/update-visibility/', {'ids': propias}, format='json')
+        self.assertEqual(response.data['actualizadas'], 3)
+        self.assertEqual(self.mensajes({'visible': '1'}), [])
+
+    def test_update_visibility_valida_ids(self):
+        propia = Alerta.objects.filter(usuario=self.usuario, visible=True).values_list('id', flat=True).first()
+        for cuerpo in ({'ids': str(propia)}, {'ids': ['a']}, {'ids': [[propia]]}, {}, [propia]):
+            response = self.client.patch('/api/alertas/update-visibility/', cuerpo, format='json')
+            self.assertEqual(response.status_code, 400, cuerpo)
+        self.assertTrue(Alerta.objects.get(id=propia).visible)
+
+
+class AlertaStreamTests(APITestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', rol='usuario')
+        self.token = str(RefreshToken.for_user(self.usuario).access_token)
+
+    def crear_alerta(self, mensaje):
+        # La alerta se publica al confirmar la transacción
+        with self.captureOnCommitCallbacks(execute=True):
+            Alerta.objects.create(usuario=self.usuario, mensaje=mensaje)
+
+    def test_sin_token(self):
+        response = self.client.get('/api/alertas/stream/')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_envia_alertas_nuevas(self):
+        response = await AsyncClient().get('/api/alertas/stream/', {'token': self.token})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        eventos = aiter(response.streaming_content)
+
+        self.assertTrue((await anext(eventos)).startswith(b'retry:'))
+        self.assertEqual(broker.conexiones(self.usuario.id), 1)
+
+        await sync_to_async(self.crear_alerta)('hola')
+        evento = (await asyncio.wait_for(anext(eventos), 1)).decode()
+
+        self.assertIn('event: alerta', evento)
+        datos = json.loads(evento.split('data: ', 1)[1])
+        self.assertEqual(datos['mensaje'], 'hola')
+
+    def test_publica_alertas_en_bloque_con_id(self):
+        alertas = [Alerta(usuario=self.usuario, mensaje='igual', fecha_emision=timezone.now()) for _ in range(2)]
+        with sin_ids_en_bulk_create(), mock.patch.object(cola_alertas, 'publicar_alertas') as publicar:
+            with self.captureOnCommitCallbacks(execute=True):
+                cola_alertas.escribir_alertas(alertas)
+
+        publicadas = publicar.call_args.args[0]
+        self.assertEqual(sorted(alerta.id for alerta in publicadas),
+                         list(Alerta.objects.order_by('id').values_list('id', flat=True)))
+        self.assertEqual(Cambio.objects.filter(modelo=Cambio.ALERTA, objeto_id__in=[a.id for a in publicadas]).count(), 2)
+
+
+class AlertaBrokerTests(APITestCase):
+    async def test_cancelar_suscripcion(self):
+        suscripcion = broker.suscribir(-1)
+        broker.publicar(-1, {'id': 1})
+        broker.cancelar(-1, suscripcion)
+        broker.publicar(-1, {'id': 2})
+
+        _, cola = suscripcion
+        self.assertEqual(await asyncio.wait_for(cola.get(), 1), {'id': 1})
+        self.assertTrue(cola.empty())
+        self.assertEqual(broker.conexiones(-1), 0)
+
+
+class ColaAlertasTests(TransactionTestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', rol='usuario')
+
+    def emitir_y_vaciar(self, cola, cantidad):
+        lotes = []
+        escribir = cola_alertas.escribir_alertas
+
+        def espiar(alertas):
+            lotes.append(len(alertas))
+            escribir(alertas)
+
+        with mock.patch.object(cola_alertas, 'escribir_alertas', espiar):
+            for i in range(cantidad):
+                cola.encolar([Alerta(usuario=self.usuario, mensaje=f'alerta {i}', fecha_emision=timezone.now())])
+            cola.vaciar()
+        return lotes
+
+    def test_agrupa_alertas_en_lotes(self):
+        lotes = self.emitir_y_vaciar(cola_alertas.ColaEnProceso(TAMANO_LOTE=50, INTERVALO=1), 120)
+
+        self.assertEqual(sum(lotes), 120)
+        self.assertLessEqual(len(lotes), 3)
+        self.assertEqual(Alerta.objects.filter(usuario=self.usuario).count(), 120)
+
+    def test_broker_local(self):
+        self.emitir_y_vaciar(cola_alertas.ColaBrokerLocal(INTERVALO=0.01), 3)
+
+        self.assertEqual(
+            sorted(Alerta.objects.filter(usuario=self.usuario).values_list('mensaje', flat=True)),
+            ['alerta 0', 'alerta 1', 'alerta 2'],
+        )
+
+
+class TareaBulkTests(APITestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(username='jefe', password='x', rol='admin')
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', rol='usuario')
+        self.proyecto = crear_proyecto(self.usuario)
+        self.client.force_authenticate(self.admin)
+
+    def crear(self, cantidad):
+        tareas = [
+            {'nombre': f'Tarea {i}', 'descripcion': '', 'proyecto': self.proyecto.id, 'asignada_a': self.usuario.id}
+            for i in range(cantidad)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/tasks/bulk/', tareas, format='json')
+        self.assertEqual(response.status_code, 201)
+        return len(ctx.captured_queries)
+
+    def test_crear_con_consultas_constantes(self):
+        pocas = self.crear(2)
+        muchas = self.crear(50)
+
+        self.assertEqual(pocas, muchas)
+        self.assertEqual(Tarea.objects.filter(proyecto=self.proyecto).count(), 52)
+        self.assertEqual(Alerta.objects.filter(usuario=self.usuario).count(), 52)
+
+    def test_crear_sin_ids_de_bulk_create(self):
+        with sin_ids_en_bulk_create():
+            self.crear(3)
+            response = self.client.post('/api/tasks/bulk/', [
+                {'nombre': 'igual', 'descripcion': '', 'proyecto': self.proyecto.id, 'asignada_a': self.usuario.id}
+                for _ in range(2)
+            ], format='json')
+
+        ids = [tarea['id'] for tarea in response.data]
+        self.assertEqual(sorted(ids), list(Tarea.objects.filter(nombre='igual').order_by('id').values_list('id', flat=True)))
+        self.assertEqual(Cambio.objects.filter(modelo=Cambio.TAREA, objeto_id__in=ids).count(), 2)
+
+    def test_crear_valida_referencias(self):
+        response = self.client.post('/api/tasks/bulk/', [
+            {'nombre': 'ok', 'descripcion': '', 'proyecto': self.proyecto.id, 'asignada_a': self.usuario.id},
+            {'nombre': 'mal', 'descripcion': '', 'proyecto': 0, 'asignada_a': self.usuario.id},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(1, response.data['errores'])
+        self.assertFalse(Tarea.objects.filter(nombre='ok').exists())
+
+    def test_actualizar_y_eliminar(self):
+        self.crear(3)
+        ids = list(Tarea.objects.filter(proyecto=self.proyecto).values_list('id', flat=True))
+
+        response = self.client.patch('/api/tasks/bulk/', [
+            {'id': id, 'estado': 'terminado'} for id in ids
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Tarea.objects.filter(id__in=ids, estado=EstadoTarea.TERMINADO).count(), 3)
+
+        response = self.client.delete('/api/tasks/bulk/', {'ids': ids}, format='json')
+        self.assertEqual(response.data, {'eliminadas': 3})
+
+    def test_eliminar_valida_ids(self):
+        self.crear(2)
+        ids = list(Tarea.objects.values_list('id', flat=True))
+        for cuerpo in ({'ids': '12'}, {'ids': ['a']}, {'ids': [{'id': ids[0]}]}, {'ids': []}, ids):
+            response = self.client.delete('/api/tasks/bulk/', cuerpo, format='json')
+            self.assertEqual(response.status_code, 400, cuerpo)
+
+        response = self.client.delete('/api/tasks/bulk/', {'ids': [*ids, 0]}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Tarea.objects.count(), 2)
+
+    def test_asignado_solo_cambia_estado(self):
+        self.crear(1)
+        tarea = Tarea.objects.get(proyecto=self.proyecto)
+        otro = Usuario.objects.create_user(username='otro', password='x', rol='usuario')
+        Tarea.objects.filter(id=tarea.id).update(asignada_a=otro)
+        self.client.force_authenticate(otro)
+
+        response = self.client.patch('/api/tasks/bulk/', [{'id': tarea.id, 'nombre': 'otro nombre'}], format='json')
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.patch('/api/tasks/bulk/', [{'id': tarea.id, 'estado': 'desarrollo'}], format='json')
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class CacheLecturasTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', rol='usuario')
+        self.proyecto = crear_proyecto(self.usuario)
+        crear_tareas(self.proyecto, self.usuario, 2)
+        self.client.force_authenticate(self.usuario)
+
+    def test_hit_sin_consultas_e_invalidacion(self):
+        self.assertEqual(self.client.get('/api/tasks/')['X-Cache'], 'MISS')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/tasks/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Tarea.objects.filter(proyecto=self.proyecto).first().save()
+        self.assertEqual(self.client.get('/api/tasks/')['X-Cache'], 'MISS')
+
+    def test_claves_por_usuario(self):
+        otro = Usuario.objects.create_user(username='otro', password='x', rol='usuario')
+        self.client.get('/api/projects/')
+        self.client.force_authenticate(otro)
+
+        response = self.client.get('/api/projects/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'], [])
+
+
+class ProyectoStatsTests(APITestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(username='jefe', password='x', rol='admin')
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', rol='usuario')
+        self.otro = Usuario.objects.create_user(username='otro', password='x', rol='usuario')
+        self.vencido = crear_proyecto(self.usuario, 'Vencido')
+        self.vencido.fecha_finalizacion = timezone.localdate() - timedelta(days=1)
+        self.vencido.save()
+        self.vacio = crear_proyecto(self.otro, 'Vacío')
+        crear_tareas(self.vencido, self.usuario, 3)
+        crear_tareas(self.vencido, self.otro, 1)
+        Tarea.objects.filter(asignada_a=self.otro).update(estado=EstadoTarea.TERMINADO)
+        self.client.force_authenticate(self.admin)
+
+    def stats(self):
+        response = self.client.get('/api/projects/stats/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_una_consulta_por_pagina(self):
+        with CaptureQueriesContext(connection) as ctx:
+            datos = self.stats()
+        # Los ids de la página y la consulta agrupada
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertIn('LIMIT', ctx.captured_queries[0]['sql'])
+        self.assertIn('GROUP BY', ctx.captured_queries[1]['sql'])
+
+        vencido, vacio = datos['proyectos']
+        self.assertEqual(vencido['por_estado'], {'pendiente': 3, 'desarrollo': 0, 'terminado': 1, 'observado': 0})
+        self.assertEqual((vencido['total'], vencido['abiertas'], vencido['progreso'], vencido['vencido']), (4, 3, 0.25, True))
+        self.assertEqual(vencido['carga'], [
+            {'usuario': self.usuario.id, 'total': 3, 'abiertas': 3},
+            {'usuario': self.otro.id, 'total': 1, 'abiertas': 0},
+        ])
+        self.assertEqual((vacio['total'], vacio['progreso'], vacio['vencido'], vacio['carga']), (0, None, False, []))
+        self.assertEqual(datos['usuarios'][0], {'usuario': self.usuario.id, 'total': 3, 'abiertas': 3, 'vencidas': 3})
+
+    def test_paginado_por_proyecto(self):
+        response = self.client.get('/api/projects/stats/', {'page_size': 1})
+        primera = response.json()
+        self.assertEqual([proyecto['nombre'] for proyecto in primera['proyectos']], ['Vencido'])
+        self.assertEqual(len(primera['usuarios']), 2)
+        segunda = self.client.get(primera['next']).json()
+        self.assertEqual([proyecto['nombre'] for proyecto in segunda['proyectos']], ['Vacío'])
+        # La carga por usuario es la de los proyectos de la página
+        self.assertEqual((segunda['usuarios'], segunda['next']), ([], None))
+
+    def test_solo_proyectos_visibles(self):
+        self.client.force_authenticate(self.otro)
+        self.assertEqual([proyecto['nombre'] for proyecto in self.stats()['proyectos']], ['Vacío'])
+
+    def test_contadores_materializados(self):
+        agrupado = self.stats()
+        with override_settings(API_CONTADORES_PROYECTO=True):
+            call_command('recalcular_contadores', stdout=io.StringIO())
+            self.assertEqual(self.stats(), agrupado)
+
+            # Alta, cambio de estado y de proyecto (uno a uno y en bloque) y borrado
+            response = self.client.post('/api/tasks/', {
+                'nombre': 'Nueva', 'descripcion': 'Nueva', 'proyecto': self.vacio.id, 'asignada_a': self.otro.id,
+            }, format='json')
+            self.assertEqual(response.status_code, 201)
+            tareas = list(Tarea.objects.filter(asignada_a=self.usuario).values_list('id', flat=True))
+            self.client.patch(f'/api/tasks/{tareas[0]}/', {'estado': 'observado'}, format='json')
+            self.client.patch('/api/tasks/bulk/', [
+                {'id': tareas[1], 'estado': 'terminado'},
+                {'id': tareas[2], 'proyecto': self.vacio.id},
+            ], format='json')
+            self.client.delete('/api/tasks/bulk/', {'ids': [tareas[0]]}, format='json')
+            self.client.post('/api/tasks/bulk/', [
+                {'nombre': 'Otra', 'descripcion': '', 'proyecto': self.vencido.id, 'asignada_a': self.usuario.id},
+            ], format='json')
+
+            with CaptureQueriesContext(connection) as ctx:
+                materializado = self.stats()
+            self.assertNotIn('GROUP BY', ctx.captured_queries[1]['sql'])
+        self.assertEqual(materializado, self.stats())
+        self.assertEqual(materializado['proyectos'][1]['total'], 2)
+        self.assertFalse(ContadorTareas.objects.filter(total__lt=0).exists())
+
+
+class LecturaValoresTests(APITestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(username='jefe', password='x', rol='admin')
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', rol='usuario')
+        self.proyecto = crear_proyecto(self.usuario, 'Proyecto ñandú')
+        crear_tareas(self.proyecto, self.usuario, 5)
+        crear_tareas(crear_proyecto(self.admin), self.usuario, 2)
+        Alerta.objects.create(usuario=self.usuario, mensaje='Alerta \u2028 con “comillas”')
+        self.client.force_authenticate(self.admin)
+
+    def test_misma_representacion_que_el_serializer(self):
+        for serializer_class, queryset in (
+            (TareaSerializer, Tarea.objects.order_by('id')),
+            (ProyectoSerializer, Proyecto.objects.order_by('id')),
+            (AlertaSerializer, Alerta.objects.order_by('id')),
+        ):
+            lectura = LecturaValores(serializer_class)
+            self.assertEqual(
+                lectura.representar(queryset.values(*lectura.columnas)),
+                serializer_class(queryset, many=True).data,
+            )
+
+    def test_proyecto_anidado_una_vez(self):
+        lectura = LecturaValores(TareaSerializer)
+        tareas = lectura.representar(Tarea.objects.filter(proyecto=self.proyecto).values(*lectura.columnas))
+        self.assertTrue(all(tarea['proyecto'] is tareas[0]['proyecto'] for tarea in tareas))
+
+    def test_filter_by_project_una_consulta(self):
+        url = f'/api/tasks/filter_by_project/?project_id={self.proyecto.id}'
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        # ETag + la página con el proyecto en JOIN (antes, una consulta más por tarea)
+        self.assertEqual(len(ctx.captured_queries), 2)
+        tareas = Tarea.objects.filter(proyecto=self.proyecto).order_by('id')
+        self.assertEqual(response.json()['results'], TareaSerializer(tareas, many=True).data)
+
+    @skipIf(orjson is None, 'orjson no está instalado')
+    def test_orjson_mismos_bytes(self):
+        datos = {
+            'results': AlertaSerializer(Alerta.objects.all(), many=True).data,
+            'errores': {0: 'índice entero'},
+            'fecha': timezone.now(),
+            'dia': timezone.localdate(),
+            'estado': EstadoTarea.TERMINADO,
+        }
+        self.assertEqual(ORJSONRenderer().render(datos), JSONRenderer().render(datos))
+        self.assertEqual(ORJSONRenderer().render(datos, 'application/json; indent=2'),
+                         JSONRenderer().render(datos, 'application/json; indent=2'))
+
+    def test_benchmark_serializacion(self):
+        salida = io.StringIO()
+        call_command('benchmark_serializacion', base_actual=True, filas=5, repeticiones=1, stdout=salida)
+        self.assertIn('valores', salida.getvalue())
+
+
+@override_settings(API_SYNC={'MARGEN': 0})
+class SyncTests(APITestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(username='jefe', password='x', rol='admin')
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', rol='usuario')
+        self.otro = Usuario.objects.create_user(username='otro', password='x', rol='usuario')
+        self.proyecto = crear_proyecto(self.admin)
+        self.tarea = Tarea.objects.create(nombre='Tarea', descripcion='d', proyecto=self.proyecto, asignada_a=self.usuario)
+
+    def sync(self, usuario, cursor=None):
+        self.client.force_authenticate(usuario)
+        response = self.client.get('/api/sync/', {} if cursor is None else {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def ids(self, datos, clave):
+        return [objeto['id'] for objeto in datos[clave]['actualizados']], datos[clave]['eliminados']
+
+    def test_solo_los_cambios_desde_el_cursor(self):
+        cursor = self.sync(self.usuario)['cursor']
+        self.assertEqual(self.sync(self.usuario, cursor)['tareas'], {'actualizados': [], 'eliminados': []})
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.post('/api/tasks/', {
+            'nombre': 'Nueva', 'descripcion': 'd', 'proyecto': self.proyecto.id, 'asignada_a': self.usuario.id,
+        }, format='json')
+        nueva = response.json()['id']
+
+        datos = self.sync(self.usuario, cursor)
+        self.assertEqual(self.ids(datos, 'tareas'), ([nueva], []))
+        self.assertEqual(datos['tareas']['actualizados'][0], self.client.get(f'/api/tasks/{nueva}/').json())
+        self.assertEqual(len(datos['alertas']['actualizados']), 1)
+        # Nada de otros usuarios
+        self.assertEqual(self.ids(self.sync(self.otro, cursor), 'tareas'), ([], []))
+        self.assertEqual(self.sync(self.usuario, datos['cursor'])['tareas']['actualizados'], [])
+
+    def test_lapidas_al_reasignar_y_eliminar(self):
+        cursor = self.sync(self.usuario)['cursor']
+        self.client.force_authenticate(self.admin)
+        self.client.patch('/api/tasks/bulk/', [{'id': self.tarea.id, 'asignada_a': self.otro.id}], format='json')
+
+        self.assertEqual(self.ids(self.sync(self.usuario, cursor), 'tareas'), ([], [self.tarea.id]))
+        self.assertEqual(self.ids(self.sync(self.otro, cursor), 'tareas'), ([self.tarea.id], []))
+        self.assertEqual(self.ids(self.sync(self.admin, cursor), 'tareas'), ([self.tarea.id], []))
+
+        tarea_id = self.tarea.id
+        self.tarea.delete()
+        self.assertEqual(self.ids(self.sync(self.otro, cursor), 'tareas'), ([], [tarea_id]))
+
+    def test_proyecto_editado_y_alertas_en_bloque(self):
+        Alerta.objects.create(usuario=self.usuario, mensaje='hola')
+        cursor = self.sync(self.usuario)['cursor']
+        self.proyecto.nombre = 'Renombrado'
+        self.proyecto.save()
+        self.client.force_authenticate(self.usuario)
+        self.client.post('/api/alertas/mark-all-read/')
+
+        datos = self.sync(self.usuario, cursor)
+        # El usuario no ve el proyecto, pero sí sus tareas con los datos nuevos
+        self.assertEqual(self.ids(datos, 'proyectos'), ([], []))
+        self.assertEqual(datos['tareas']['actualizados'][0]['proyecto']['nombre'], 'Renombrado')
+        self.assertEqual([alerta['mensaje'] for alerta in datos['alertas']['actualizados']], ['hola'])
+        self.assertFalse(datos['alertas']['actualizados'][0]['visible'])
+
+    def test_proyecto_editado_una_fila_para_todas_sus_tareas(self):
+        for i in range(3):
+            Tarea.objects.create(nombre=f'T{i}', descripcion='d', proyecto=self.proyecto, asignada_a=self.otro)
+        cursor = self.sync(self.usuario)['cursor']
+        antes = Cambio.objects.count()
+        self.proyecto.nombre = 'Renombrado'
+        self.proyecto.save()
+        # La del proyecto y la de sus tareas, sin una por tarea
+        self.assertEqual(Cambio.objects.count() - antes, 2)
+
+        self.assertEqual(self.ids(self.sync(self.usuario, cursor), 'tareas'), ([self.tarea.id], []))
+        self.assertEqual(len(self.ids(self.sync(self.otro, cursor), 'tareas')[0]), 3)
+        self.assertEqual(len(self.ids(self.sync(self.admin, cursor), 'tareas')[0]), 4)
+        # Sin tareas en el proyecto no recibe nada
+        sin_tareas = Usuario.objects.create_user(username='nadie', password='x', rol='usuario')
+        self.assertEqual(self.ids(self.sync(sin_tareas, cursor), 'tareas'), ([], []))
+
+    def test_tareas_en_bloque_sin_ids_de_bulk_create(self):
+        cursor = self.sync(self.usuario)['cursor']
+        self.client.force_authenticate(self.admin)
+        with sin_ids_en_bulk_create():
+            response = self.client.post('/api/tasks/bulk/', [
+                {'nombre': f'T{i}', 'descripcion': 'd', 'proyecto': self.proyecto.id, 'asignada_a': self.usuario.id}
+                for i in range(2)
+            ], format='json')
+
+        self.assertEqual(self.ids(self.sync(self.usuario, cursor), 'tareas'), (sorted(tarea['id'] for tarea in response.data), []))
+        with self.assertRaises(ValueError):
+            cambios.registrar([Tarea(nombre='sin id', proyecto=self.proyecto, asignada_a=self.usuario)])
+
+    def test_paginas_y_parametros(self):
+        for i in range(3):
+            Tarea.objects.create(nombre=f'T{i}', descripcion='d', proyecto=self.proyecto, asignada_a=self.usuario)
+        with self.settings(API_SYNC={'MARGEN': 0, 'LOTE': 2}):
+            datos = self.sync(self.usuario, 0)
+            self.assertTrue(datos['mas'])
+            siguiente = self.sync(self.usuario, datos['cursor'])
+        self.assertEqual(len(self.ids(datos, 'tareas')[0]) + len(self.ids(siguiente, 'tareas')[0]), 4)
+        self.assertFalse(siguiente['mas'])
+        self.assertEqual(self.client.get('/api/sync/', {'cursor': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/sync/', {'cursor': '²'}).status_code, 400)
+
+    def test_compactacion(self):
+        for nombre in ('a', 'b', 'c'):
+            self.tarea.nombre = nombre
+            self.tarea.save()
+        cursor = self.sync(self.usuario)['cursor']
+        call_command('compactar_cambios', dias=1, stdout=io.StringIO())
+        self.assertEqual(Cambio.objects.filter(modelo=Cambio.TAREA, objeto_id=self.tarea.id).count(), 1)
+        self.assertEqual(self.ids(self.sync(self.usuario, 0), 'tareas'), ([self.tarea.id], []))
+
+        Cambio.objects.update(fecha=timezone.now() - timedelta(days=2))
+        call_command('compactar_cambios', dias=1, stdout=io.StringIO())
+        self.assertFalse(Cambio.objects.exists())
+        self.client.force_authenticate(self.usuario)
+        self.assertEqual(self.client.get('/api/sync/', {'cursor': 0}).status_code, 410)
+        self.assertEqual(self.sync(self.usuario, cursor)['tareas']['actualizados'], [])
+
+
+@override_settings(CACHES=CACHE_LOCAL, API_REPLICAS={'ALIAS': ['replica'], 'PEGAJOSO': 5, 'REINTENTO': 30})
+class ReplicasTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = Usuario.objects.create_user(username='jefe', password='x', rol='admin')
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', rol='usuario')
+        self.proyecto = crear_proyecto(self.admin)
+        # La "réplica" es la propia base de pruebas: se comprueba a quién se consulta
+        parche = mock.patch('api.replicas.elegir_replica', return_value='default')
+        self.elegir = parche.start()
+        self.addCleanup(parche.stop)
+
+    def get(self, usuario, ruta='/api/tasks/'):
+        self.client.force_authenticate(usuario)
+        response = self.client.get(ruta)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_lecturas_en_replica_y_escrituras_en_primaria(self):
+        for ruta in ('/api/tasks/', '/api/projects/', f'/api/projects/{self.proyecto.id}/', '/api/usuarios/'):
+            self.elegir.reset_mock()
+            self.get(self.admin, ruta)
+            self.assertEqual(self.elegir.call_count, 1, ruta)
+
+        self.elegir.reset_mock()
+        self.get(self.admin, '/api/projects/stats/')
+        self.client.post('/api/tasks/', {
+            'nombre': 'Nueva', 'descripcion': 'd', 'proyecto': self.proyecto.id, 'asignada_a': self.usuario.id,
+        }, format='json')
+        self.elegir.assert_not_called()
+
+    def test_lee_sus_escrituras_en_la_primaria(self):
+        self.client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/tasks/', {
+                'nombre': 'Nueva', 'descripcion': 'd', 'proyecto': self.proyecto.id, 'asignada_a': self.usuario.id,
+            }, format='json')
+
+        self.get(self.admin)
+        self.elegir.assert_not_called()
+        # Otro usuario sí lee de la réplica, pero no guarda en cache lo leído justo
+        # después de la invalidación (la réplica podría no tener aún la escritura)
+        self.assertEqual(self.get(self.usuario)['X-Cache'], 'MISS')
+        self.assertEqual(self.get(self.usuario)['X-Cache'], 'MISS')
+        self.assertEqual(self.elegir.call_count, 2)
+
+        cache.clear()  # Pasados PEGAJOSO segundos
+        self.get(self.admin)
+        self.assertEqual(self.elegir.call_count, 3)
+
+    def test_router_fuera_de_los_viewsets(self):
+        router = RouterReplicas()
+        self.assertEqual(router.db_for_read(Tarea), 'default')
+        self.assertEqual(router.db_for_write(Tarea), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'api'))
+
+    def test_replica_caida_no_se_vuelve_a_probar(self):
+        conexion = mock.Mock()
+        conexion.ensure_connection.side_effect = OperationalError('sin conexión')
+        with mock.patch.dict('api.replicas._caidas', clear=True), \
+                mock.patch('api.replicas.connections', {'replica': conexion}), \
+                self.assertLogs('api.replicas', 'WARNING'):
+            self.assertIsNone(elegir_replica())
+            self.assertIsNone(elegir_replica())
+        self.assertEqual(conexion.ensure_connection.call_count, 1)
+
+
+ESPEJO = 'espejo' in settings.DATABASES
+
+
+@skipUnless(ESPEJO, 'requiere manager_project_api.settings_tests')
+@override_settings(CACHES=CACHE_LOCAL, API_REPLICAS={'ALIAS': ['espejo'], 'PEGAJOSO': 5, 'REINTENTO': 30})
+class ReplicaEspejoTests(APITransactionTestCase):
+    # Sin simular elegir_replica: 'espejo' (settings_tests.py) es otra conexión a la base de
+    # pruebas (TEST MIRROR) y se comprueba en qué alias se ejecuta cada consulta. Con
+    # transacciones confirmadas, para que la otra conexión vea los datos. Sin el alias,
+    # el runner rechaza la clase aunque se salte.
+    databases = {'default', 'espejo'} if ESPEJO else {'default'}
+
+    def setUp(self):
+        cache.clear()
+        self.admin = Usuario.objects.create_user(username='jefe', password='x', rol='admin')
+        crear_proyecto(self.admin, 'Proyecto')
+        self.client.force_authenticate(self.admin)
+
+    def consultas(self, metodo, ruta, datos=None):
+        with CaptureQueriesContext(connections['default']) as primaria, \
+                CaptureQueriesContext(connections['espejo']) as espejo:
+            response = getattr(self.client, metodo)(ruta, datos, format='json')
+        self.assertLess(response.status_code, 300)
+
+        def tablas(capturadas):
+            return [consulta['sql'] for consulta in capturadas if 'api_proyecto' in consulta['sql']]
+        return tablas(primaria.captured_queries), tablas(espejo.captured_queries)
+
+    def test_consultas_en_cada_alias(self):
+        primaria, espejo = self.consultas('get', '/api/projects/')
+        self.assertEqual(primaria, [])
+        self.assertTrue(espejo)
+
+        primaria, espejo = self.consultas('post', '/api/projects/', {
+            'nombre': 'Nuevo', 'descripcion': 'd', 'fecha_inicio': '2026-01-01',
+            'fecha_finalizacion': '2026-02-01', 'usuario': self.admin.id,
+        })
+        self.assertTrue(any(sql.startswith('INSERT') for sql in primaria))
+        self.assertEqual(espejo, [])
+
+        # Tras escribir, el mismo usuario lee de la primaria
+        primaria, espejo = self.consultas('get', '/api/projects/')
+        self.assertTrue(primaria)
+        self.assertEqual(espejo, [])
+
+
+class PurgaAlertasTests(APITestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', rol='usuario')
+        antigua = timezone.now() - timedelta(days=120)
+        Alerta.objects.bulk_create(
+            [Alerta(mensaje=f'Antigua {i}', usuario=self.usuario, visible=i % 2 == 0, fecha_emision=antigua) for i in range(10)]
+            + [Alerta(mensaje='Reciente', usuario=self.usuario, visible=False)]
+        )
+
+    def test_elimina_solo_las_ocultas_antiguas_por_lotes(self):
+        ocultas = set(Alerta.objects.filter(visible=False, mensaje__startswith='Antigua').values_list('id', flat=True))
+        salida = io.StringIO()
+        call_command('purgar_alertas', dias=90, lote=2, stdout=salida)
+
+        self.assertIn('Alertas eliminadas: 5 filas', salida.getvalue())
+        self.assertEqual(Alerta.objects.filter(visible=False).count(), 1)
+        self.assertEqual(Alerta.objects.count(), 6)
+        self.assertFalse(AlertaArchivada.objects.exists())
+        # Lápidas para los clientes de /api/sync/
+        self.assertEqual(set(Cambio.objects.filter(modelo=Cambio.ALERTA).values_list('objeto_id', flat=True)), ocultas)
+
+    def test_un_delete_por_lote(self):
+        with CaptureQueriesContext(connection) as ctx:
+            call_command('purgar_alertas', dias=90, lote=10, stdout=io.StringIO())
+        borrados = [consulta['sql'] for consulta in ctx.captured_queries if consulta['sql'].startswith('DELETE')]
+        self.assertEqual(len(borrados), 1)
+        self.assertEqual(Cambio.objects.filter(modelo=Cambio.ALERTA).count(), 5)
+
+    def test_otros_contextos_registran_sus_lapidas_durante_la_purga(self):
+        alerta = Alerta.objects.filter(visible=True).first()
+        alerta_id = alerta.id
+        with retencion.sin_lapidas_por_fila():
+            # Otro hilo o petición: un contexto nuevo
+            contextvars.Context().run(alerta.delete)
+        self.assertTrue(Cambio.objects.filter(modelo=Cambio.ALERTA, objeto_id=alerta_id).exists())
+
+    def test_archivar(self):
+        ocultas = list(Alerta.objects.filter(visible=False, mensaje__startswith='Antigua').order_by('id').values('id', 'mensaje'))
+        call_command('purgar_alertas', archivar=True, stdout=io.StringIO())
+        self.assertEqual(list(AlertaArchivada.objects.order_by('id').values('id', 'mensaje')), ocultas)
+        self.assertEqual(AlertaArchivada.objects.first().usuario_id, self.usuario.id)
+
+
+class BusquedaTests(APITestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(username='jefe', password='x', rol='admin')
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', rol='usuario')
+        self.otro = Usuario.objects.create_user(username='otro', password='x', rol='usuario')
+        self.proyecto = crear_proyecto(self.usuario, 'Migración de facturas')
+        self.en_nombre = Tarea.objects.create(nombre='Revisar facturación', descripcion='Cuadrar el mes',
+                                              proyecto=self.proyecto, asignada_a=self.usuario)
+        self.en_descripcion = Tarea.objects.create(nombre='Informe', descripcion='Resumen de facturación anual',
+                                                   proyecto=self.proyecto, asignada_a=self.usuario)
+        self.ajena = Tarea.objects.create(nombre='Facturación ajena', descripcion='d',
+                                          proyecto=self.proyecto, asignada_a=self.otro)
+
+    def buscar(self, usuario, **params):
+        self.client.force_authenticate(usuario)
+        return self.client.get('/api/search/', params)
+
+    def claves(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [(resultado['tipo'], resultado['objeto']['id']) for resultado in response.json()['results']]
+
+    def test_ordena_por_relevancia_y_respeta_la_visibilidad(self):
+        # Prefijo y sin acentos; el nombre pesa más que la descripción
+        claves = self.claves(self.buscar(self.usuario, q='FACTURACION'))
+        self.assertEqual(claves, [('tarea', self.en_nombre.id), ('tarea', self.en_descripcion.id)])
+        self.assertIn(('proyecto', self.proyecto.id), self.claves(self.buscar(self.usuario, q='factura')))
+
+        self.assertEqual(self.claves(self.buscar(self.otro, q='factura')), [('tarea', self.ajena.id)])
+        self.assertEqual(len(self.claves(self.buscar(self.admin, q='factura'))), 4)
+
+        response = self.buscar(self.usuario, q='revisar factura', tipo='tareas')
+        self.assertEqual(self.claves(response), [('tarea', self.en_nombre.id)])
+        self.assertEqual(response.json()['results'][0]['objeto'], self.client.get(f'/api/tasks/{self.en_nombre.id}/').json())
+
+    def test_el_indice_sigue_las_escrituras(self):
+        self.en_descripcion.nombre = 'Conciliación bancaria'
+        self.en_descripcion.descripcion = 'Sin relación'
+        self.en_descripcion.save()
+        self.en_nombre.delete()
+        self.assertEqual(self.claves(self.buscar(self.usuario, q='facturacion')), [])
+        self.assertEqual(self.claves(self.buscar(self.usuario, q='bancaria')), [('tarea', self.en_descripcion.id)])
+
+    def test_paginacion_y_errores(self):
+        response = self.buscar(self.admin, q='factura', page_size=3)
+        self.assertEqual(len(response.json()['results']), 3)
+        self.assertIsNone(response.json()['previous'])
+        siguiente = self.client.get(response.json()['next'])
+        self.assertEqual(len(siguiente.json()['results']), 1)
+        self.assertIsNone(siguiente.json()['next'])
+
+        # Los operadores de MATCH se tratan como texto
+        self.assertEqual(self.claves(self.buscar(self.usuario, q='"factura*) -')),
+                         self.claves(self.buscar(self.usuario, q='factura')))
+        self.assertEqual(self.buscar(self.usuario, q='a').status_code, 400)
+        self.assertEqual(self.buscar(self.usuario, q='factura', tipo='alertas').status_code, 400)
+        self.assertEqual(self.buscar(self.usuario, q='factura', offset=5000).status_code, 400)
+        self.assertEqual(self.buscar(self.usuario, q='factura', offset='²').status_code, 400)
+
+
+class ETagTests(APITestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', rol='usuario')
+        self.proyecto = crear_proyecto(self.usuario)
+        crear_tareas(self.proyecto, self.usuario, 2)
+        self.client.force_authenticate(self.usuario)
+
+    def test_lista_304_sin_serializar(self):
+        etag = self.client.get('/api/tasks/')['ETag']
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        Proyecto.objects.filter(id=self.proyecto.id).update(nombre='Otro', updated_at=timezone.now() + timedelta(seconds=1))
+        response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_id_no_numerico(self):
+        self.assertEqual(self.client.get('/api/tasks/²/').status_code, 404)
+        self.assertEqual(self.client.get('/api/tasks/filter_by_project/?project_id=²').status_code, 400)
+
+    def test_etag_de_la_pagina(self):
+        crear_tareas(self.proyecto, self.usuario, 3)
+        primera = self.client.get('/api/tasks/?page_size=2')
+        segunda = self.client.get(primera.data['next'])
+        self.assertNotEqual(primera['ETag'], segunda['ETag'])
+
+        # El agregado recorre solo la ventana de la página (LIMIT), no todas las tareas
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/tasks/?page_size=2', HTTP_IF_NONE_MATCH=primera['ETag'])
+        self.assertIn('LIMIT', ctx.captured_queries[0]['sql'])
+
+        # Un cambio en la segunda página no invalida la primera; eliminar una tarea
+        # de la primera sí, aunque otra ocupe su lugar
+        ultima = Tarea.objects.order_by('id').last()
+        Tarea.objects.filter(id=ultima.id).update(nombre='otro', updated_at=timezone.now() + timedelta(seconds=1))
+        self.assertEqual(self.client.get('/api/tasks/?page_size=2', HTTP_IF_NONE_MATCH=primera['ETag']).status_code, 304)
+        Tarea.objects.order_by('id').first().delete()
+        self.assertEqual(self.client.get('/api/tasks/?page_size=2', HTTP_IF_NONE_MATCH=primera['ETag']).status_code, 200)
+
+    @override_settings(CACHES=CACHE_LOCAL)
+    def test_admins_comparten_etag(self):
+        cache.clear()
+        admins = [Usuario.objects.create_user(username=f'jefe{i}', password='x', rol='admin') for i in range(2)]
+        self.client.force_authenticate(admins[0])
+        etag = self.client.get('/api/projects/')['ETag']
+        invalidar_lecturas()
+
+        # El otro admin no tiene la entrada en cache: el ETag calculado es el mismo
+        self.client.force_authenticate(admins[1])
+        response = self.client.get('/api/projects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['X-Cache']), (304, 'MISS'))
+
+    def test_detalle_y_alertas(self):
+        url = f'/api/projects/{self.proyecto.id}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Alerta.objects.create(usuario=self.usuario, mensaje='hola')
+        etag = self.client.get('/api/alertas/')['ETag']
+        self.client.patch('/api/alertas/update-visibility/', {'ids': list(Alerta.objects.values_list('id', flat=True))}, format='json')
+        self.assertEqual(self.client.get('/api/alertas/', **{'If-None-Match': etag}).status_code, 200)
+
+    def test_usuarios_etag_por_contenido(self):
+        response = self.client.get('/api/usuarios/')
+        self.assertIn('ETag', response)
+        self.assertEqual(self.client.get('/api/usuarios/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+
+@override_settings(API_JWT_SIN_CONSULTA=True)
+class JWTClaimsTests(APITestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', nombre='Dev', rol='usuario')
+
+    def autenticar(self, refresh):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_me_sin_consultas(self):
+        self.autenticar(tokens_para_usuario(self.usuario))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/usuarios/me/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['rol'], 'usuario')
+        self.assertEqual(response.data['nombre'], 'Dev')
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_campos_diferidos_y_tokens_antiguos(self):
+        self.autenticar(tokens_para_usuario(self.usuario))
+        response = self.client.get(f'/api/usuarios/{self.usuario.id}/')
+        self.assertEqual(response.data['email'], self.usuario.email)
+
+        self.autenticar(RefreshToken.for_user(self.usuario))
+        self.assertEqual(self.client.get('/api/usuarios/me/').data['username'], 'dev')
+
+
+class GenerarDatosTests(APITestCase):
+    def test_genera_volumenes_pedidos(self):
+        call_command('generar_datos', usuarios=5, proyectos=3, tareas=40, alertas=20, lote=7, stdout=io.StringIO())
+
+        self.assertEqual(Usuario.objects.filter(username__startswith='carga').count(), 5)
+        self.assertEqual(Proyecto.objects.count(), 3)
+        self.assertEqual(Tarea.objects.count(), 40)
+        self.assertEqual(Alerta.objects.count(), 20)
+        self.assertTrue(Usuario.objects.get(username='carga0000001').check_password('password123'))
+
+    def test_sin_usuarios_o_proyectos_de_los_que_elegir(self):
+        for opciones in ({'usuarios': 0}, {'proyectos': 0}):
+            with self.assertRaisesMessage(CommandError, 'necesita'):
+                call_command('generar_datos', **{'usuarios': 2, 'proyectos': 2, 'tareas': 3, 'alertas': 0, **opciones},
+                             stdout=io.StringIO())
+        self.assertFalse(Usuario.objects.exists())
+        # Sin tareas ni alertas no hacen falta
+        call_command('generar_datos', usuarios=2, proyectos=0, tareas=0, alertas=0, stdout=io.StringIO())
+
+
+class ExportacionTests(APITestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(username='jefe', password='x', rol='admin')
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', rol='usuario')
+        proyecto = crear_proyecto(self.admin)
+        crear_tareas(proyecto, self.usuario, 5)
+        crear_tareas(proyecto, self.admin, 2)
+
+    def leer_ndjson(self, response):
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        contenido = b''.join(response.streaming_content).decode()
+        return [json.loads(linea) for linea in contenido.splitlines()]
+
+    @override_settings(API_EXPORT_LOTE=2)
+    def test_exporta_tareas_del_usuario_por_lotes(self):
+        self.client.force_authenticate(self.usuario)
+
+        filas = self.leer_ndjson(self.client.get('/api/tasks/export/'))
+
+        esperadas = list(Tarea.objects.filter(asignada_a=self.usuario).order_by('id').values_list('id', flat=True))
+        self.assertEqual([fila['id'] for fila in filas], esperadas)
+        self.assertEqual(filas[0]['estado'], 'pendiente')
+        self.assertEqual(filas[0]['asignada_a'], self.usuario.id)
+
+    def test_admin_exporta_todas_las_tareas(self):
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(len(self.leer_ndjson(self.client.get('/api/tasks/export/'))), 7)
+
+    def test_exporta_usuarios_sin_password(self):
+        self.client.force_authenticate(self.admin)
+
+        filas = self.leer_ndjson(self.client.get('/api/usuarios/export/'))
+
+        self.assertEqual([fila['username'] for fila in filas], ['jefe', 'dev'])
+        self.assertNotIn('password', filas[0])
+
+
+class LoginTests(APITestCase):
+    @override_settings(PASSWORD_HASHERS=[
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ])
+    def test_actualiza_hash_antiguo_al_hacer_login(self):
+        usuario = Usuario.objects.create(username='dev', password=make_password('clave', hasher='md5'))
+
+        response = self.client.post('/api/usuarios/login/', {'username': 'dev', 'password': 'clave'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('token', response.data)
+        usuario.refresh_from_db()
+        self.assertTrue(usuario.password.startswith('pbkdf2_sha1$'))
+
+    def test_credenciales_incorrectas(self):
+        Usuario.objects.create_user(username='dev', password='clave')
+
+        response = self.client.post('/api/usuarios/login/', {'username': 'dev', 'password': 'otra'})
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data, {'msg': 'Invalid credentials'})
+
+
+class LoginAsincronoTests(TransactionTestCase):
+    # TransactionTestCase: el login se ejecuta en un hilo del pool, con otra conexión
+    def setUp(self):
+        Usuario.objects.create_user(username='dev', password='clave')
+
+    def peticion(self, datos):
+        return AsyncRequestFactory().post('/api/login/', datos, content_type='application/json')
+
+    async def test_login_en_pool_de_hilos(self):
+        response = await login_asincrono(self.peticion({'username': 'dev', 'password': 'clave'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('token', json.loads(response.content))
+
+        response = await login_asincrono(self.peticion({'username': 'dev', 'password': 'otra'}))
+        self.assertEqual(response.status_code, 401)
+
+    @tasas_throttle(login_ip='100/min', login_usuario='1/min')
+    async def test_aplica_throttling_antes_del_pool(self):
+        await login_asincrono(self.peticion({'username': 'dev', 'password': 'mala'}))
+        response = await login_asincrono(self.peticion({'username': 'dev', 'password': 'clave'}))
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(API_LOGIN={'PENDIENTES': 1})
+    async def test_rechaza_si_el_pool_esta_lleno(self):
+        _, plazas = obtener_pool()
+        plazas.acquire()
+        try:
+            response = await login_asincrono(self.peticion({'username': 'dev', 'password': 'clave'}))
+        finally:
+            plazas.release()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_benchmark_login(self):
+        salida = io.StringIO()
+        call_command(
+            'benchmark_login', base_actual=True, duracion=0.05, hilos=[1],
+            hashers=['django.contrib.auth.hashers.MD5PasswordHasher'], stdout=salida,
+        )
+        self.assertIn('logins/s', salida.getvalue())
+
+
+class ThrottlingTests(APITestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(username='dev', password='clave', rol='usuario')
+
+    def login(self, username, password='mala'):
+        return self.client.post('/api/usuarios/login/', {'username': username, 'password': password})
+
+    @tasas_throttle(login_ip='100/min', login_usuario='2/min')
+    def test_limita_intentos_por_cuenta_sin_consultar(self):
+        self.assertEqual(self.login('dev').status_code, 401)
+        self.assertEqual(self.login('DEV ').status_code, 400)
+
+        with self.assertNumQueries(0):
+            response = self.login('dev', 'clave')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        # Otra cuenta desde la misma IP sigue pudiendo entrar
+        self.assertEqual(self.login('otro').status_code, 400)
+
+    @tasas_throttle(login_ip='2/min', login_usuario='100/min')
+    def test_limita_intentos_por_ip(self):
+        self.login('a')
+        self.login('b')
+        self.assertEqual(self.login('c').status_code, 429)
+        self.assertEqual(self.login('c', 'clave').status_code, 429)
+
+    @tasas_throttle(registro_ip='1/hour')
+    def test_limita_registros_por_ip(self):
+        datos = {'username': 'nuevo1', 'password': 'clave', 'email': 'a@a.com', 'nombre': 'N', 'rol': 'usuario'}
+        self.assertEqual(self.client.post('/api/usuarios/', datos).status_code, 201)
+        datos['username'] = 'nuevo2'
+        self.assertEqual(self.client.post('/api/usuarios/', datos).status_code, 429)
+
+    @tasas_throttle(mutacion='1/min')
+    def test_limita_escrituras_por_usuario_y_no_lecturas(self):
+        self.client.force_authenticate(self.usuario)
+        proyecto = crear_proyecto(self.usuario)
+        datos = {'nombre': 'T', 'descripcion': 'D', 'proyecto': proyecto.id, 'asignada_a': self.usuario.id}
+
+        self.assertEqual(self.client.post('/api/tasks/', datos).status_code, 201)
+        self.assertEqual(self.client.post('/api/tasks/', datos).status_code, 429)
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 200)
+
+    def test_cubo_se_recarga_con_el_tiempo(self):
+        self.assertEqual(gastar_ficha(0, 0, 0.5, capacidad=2, recarga=2), (True, 0, 0.0))
+        self.assertEqual(gastar_ficha(0, 0, 0.25, capacidad=2, recarga=2), (False, 0.5, 0.25))
+        # Nunca se acumulan más fichas que la capacidad
+        self.assertEqual(gastar_ficha(1, 0, 100, capacidad=2, recarga=2), (True, 1, 0.0))
+
+    def test_cubos_en_memoria_acotados(self):
+        cubos = CubosEnMemoria(MAX_CLAVES=3)
+        for clave in ('a', 'b', 'c'):
+            self.assertTrue(cubos.consumir(clave, 1, 0.001)[0])
+        self.assertFalse(cubos.consumir('a', 1, 0.001)[0])
+        # Ningún cubo se ha llenado: al llegar 'd' se descarta el usado hace más tiempo ('b')
+        self.assertTrue(cubos.consumir('d', 1, 0.001)[0])
+        self.assertEqual(list(cubos._cubos), ['c', 'a', 'd'])
+        self.assertFalse(cubos.consumir('a', 1, 0.001)[0])
+
+    def test_cubos_en_cache(self):
+        cubos = CubosEnCache(CACHE='throttle')
+        with override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+            'throttle': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'throttle-tests'},
+        }):
+            self.assertEqual([cubos.consumir('k', 2, 0.001)[0] for _ in range(3)], [True, True, False])
+
+
+class VistasAsincronasTests(APITestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', rol='usuario')
+        self.proyecto = crear_proyecto(self.usuario)
+        crear_tareas(self.proyecto, self.usuario, 3)
+        Alerta.objects.create(usuario=self.usuario, mensaje='Uno', fecha_emision=timezone.now())
+        Alerta.objects.create(usuario=self.usuario, mensaje='Dos', visible=False, fecha_emision=timezone.now())
+        self.autorizacion = f'Bearer {tokens_para_usuario(self.usuario).access_token}'
+
+    def get_asincrono(self, vista, url, **extra):
+        request = AsyncRequestFactory().get(url, headers={'Authorization': self.autorizacion, **extra})
+        return async_to_sync(vista)(request)
+
+    def test_mismas_respuestas_que_los_viewsets(self):
+        casos = (
+            (vistas_asincronas.tareas, '/api/tasks/?page_size=2'),
+            (vistas_asincronas.proyectos, '/api/projects/'),
+            (vistas_asincronas.alertas, '/api/alertas/?visible=1'),
+            (vistas_asincronas.me, '/api/usuarios/me/'),
+        )
+        for vista, url in casos:
+            with self.subTest(url=url):
+                sincrona = self.client.get(url, HTTP_AUTHORIZATION=self.autorizacion)
+                asincrona = self.get_asincrono(vista, url)
+
+                self.assertEqual(asincrona.status_code, 200)
+                self.assertEqual(asincrona.content, sincrona.content)
+                if vista is not vistas_asincronas.me:
+                    # El ETag de "me" lo añade ConditionalGetMiddleware, fuera de la vista
+                    self.assertEqual(asincrona['ETag'], sincrona['ETag'])
+
+    def test_sigue_el_cursor_de_paginacion(self):
+        primera = json.loads(self.get_asincrono(vistas_asincronas.tareas, '/api/tasks/?page_size=2').content)
+        segunda = json.loads(self.get_asincrono(vistas_asincronas.tareas, primera['next']).content)
+
+        ids = [tarea['id'] for pagina in (primera, segunda) for proyecto in pagina['results'] for tarea in proyecto['tareas']]
+        self.assertEqual(ids, sorted(Tarea.objects.values_list('id', flat=True)))
+        self.assertIsNone(segunda['next'])
+
+    def test_no_modificado_y_errores(self):
+        etag = self.get_asincrono(vistas_asincronas.alertas, '/api/alertas/')['ETag']
+        response = self.get_asincrono(vistas_asincronas.alertas, '/api/alertas/', **{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        response = self.get_asincrono(vistas_asincronas.alertas, '/api/alertas/?visible=talvez')
+        self.assertEqual(response.status_code, 400)
+
+        for autorizacion in ('Bearer no-es-un-token', 'Bearer con espacios'):
+            self.autorizacion = autorizacion
+            self.assertEqual(self.get_asincrono(vistas_asincronas.tareas, '/api/tasks/').status_code, 401)
+
+    def test_escrituras_van_al_viewset(self):
+        vista = vistas_asincronas.lectura_asincrona(
+            vistas_asincronas.tareas, TareaViewSet.as_view({'get': 'list', 'post': 'create'}),
+        )
+        datos = {'nombre': 'T', 'descripcion': 'D', 'proyecto': self.proyecto.id, 'asignada_a': self.usuario.id}
+        request = AsyncRequestFactory().post(
+            '/api/tasks/', datos, content_type='application/json', headers={'Authorization': self.autorizacion},
+        )
+
+        response = async_to_sync(vista)(request)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Tarea.objects.count(), 4)
+
+
+class InstrumentacionTests(APITestCase):
+    def setUp(self):
+        registro.reiniciar()
+        self.usuario = Usuario.objects.create_user(username='dev', password='x', rol='usuario')
+        crear_tareas(crear_proyecto(self.usuario), self.usuario, 3)
+        self.client.force_authenticate(self.usuario)
+
+    def test_server_timing_con_consultas(self):
+        response = self.client.get('/api/tasks/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ consultas", render;dur=[\d.]+, total;dur=')
+
+    def test_metricas_prometheus_por_vista(self):
+        self.client.get('/api/tasks/')
+        self.client.get('/api/tasks/')
+
+        admin = Usuario.objects.create_user(username='jefe', password='x', rol='admin')
+        response = self.client.get('/api/metrics/', HTTP_AUTHORIZATION=f'Bearer {tokens_para_usuario(admin).access_token}')
+
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        texto = response.content.decode()
+        self.assertIn('api_peticiones_total{vista="tarea-list",metodo="GET"} 2', texto)
+        self.assertIn('api_peticion_segundos_bucket{vista="tarea-list",metodo="GET",le="+Inf"} 2', texto)
+
+    def test_metricas_solo_para_admin(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        token = tokens_para_usuario(self.usuario).access_token
+        self.assertEqual(self.client.get('/api/metrics/', HTTP_AUTHORIZATION=f'Bearer {token}').status_code, 403)
+        self.assertEqual(self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer mal').status_code, 403)
+        with self.settings(API_INSTRUMENTACION={'PUBLICO': True}):
+            self.assertEqual(self.client.get('/api/metrics/').status_code, 200)
+
+    @override_settings(API_INSTRUMENTACION={'TOKEN': 'secreto'})
+    def test_metricas_exigen_token_configurado(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        response = self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(API_INSTRUMENTACION={'LENTA_MS': 0})
+    def test_registra_peticiones_lentas(self):
+        with self.assertLogs('api.instrumentacion', level='WARNING') as logs:
+            self.client.get('/api/alertas/')
+
+        self.assertIn('GET /api/alertas/ (alerta-list)', logs.output[0])
+
+    @override_settings(API_INSTRUMENTACION={'LENTA_MS': 10 ** 6, 'CONSULTAS_REPETIDAS': 3})
+    def test_registra_sentencias_repetidas(self):
+        # Una consulta por tarea, como en un N+1
+        medidor = MedidorConsultas()
+        with InstrumentacionMiddleware.medir_consultas(medidor):
+            for tarea in Tarea.objects.all():
+                Tarea.objects.get(pk=tarea.pk)
+
+        request = RequestFactory().get('/api/tasks/')
+        with self.assertLogs('api.instrumentacion', level='WARNING') as logs:
+            InstrumentacionMiddleware(lambda r: None).registrar(request, HttpResponse(), 0.001, medidor)
+
+        self.assertIn('\n  3x SELECT', logs.output[0])
+
+
+class BenchmarkApiTests(APITestCase):
+    def test_guarda_medidas_de_cada_endpoint(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            salida = f'{directorio}/benchmark.json'
+            call_command(
+                'benchmark_api', base_actual=True, usuarios=3, proyectos=2, tareas=10, alertas=10,
+                repeticiones=2, repeticiones_login=1, salida=salida, stdout=io.StringIO(),
+            )
+            with open(salida) as fichero:
+                resultado = json.load(fichero)
+
+        self.assertIn('login', resultado['endpoints'])
+        for medida in resultado['endpoints'].values():
+            self.assertEqual(medida['status'], 200)
+            self.assertGreater(medida['consultas'], 0)
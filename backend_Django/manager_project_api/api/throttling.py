@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+# Configuración por defecto; se sobrescribe con API_THROTTLE en settings.py. Las tasas
+# de cada ámbito están en REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'].
+THROTTLE_POR_DEFECTO = {
+    'ACTIVO': True,
+    'BACKEND': 'api.throttling.CubosEnMemoria',
+    'CACHE': 'default',  # alias de cache para CubosEnCache
+    'MAX_CLAVES': 100000,  # CubosEnMemoria: cubos guardados; se descartan los usados hace más tiempo
+}
+
+
+def configuracion():
+    return {**THROTTLE_POR_DEFECTO, **getattr(settings, 'API_THROTTLE', {})}
+
+
+# Token bucket: cada clave tiene hasta `capacidad` fichas y recupera `recarga` por
+# segundo. Cada petición gasta una ficha; sin fichas se rechaza y se indica la espera.
+def gastar_ficha(fichas, ultimo, ahora, capacidad, recarga):
+    fichas = min(capacidad, fichas + (ahora - ultimo) * recarga)
+    if fichas >= 1:
+        return True, fichas - 1, 0.0
+    return False, fichas, (1 - fichas) / recarga
+
+
+# Cubos en la memoria del proceso: sin consultas ni red, pero cada worker tiene los suyos.
+# Se guardan en orden de uso (LRU): con más de MAX_CLAVES se descarta el usado hace más
+# tiempo, así que memoria y coste por petición quedan acotados aunque lleguen muchas
+# claves distintas (p. ej. un relleno de credenciales desde muchas IPs).
+class CubosEnMemoria:
+    def __init__(self, MAX_CLAVES=100000, **opciones):
+        self.max_claves = MAX_CLAVES
+        self._cubos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consumir(self, clave, capacidad, recarga):
+        ahora = time.monotonic()
+        with self._lock:
+            fichas, ultimo = self._cubos.get(clave, (capacidad, ahora))
+            permitido, fichas, espera = gastar_ficha(fichas, ultimo, ahora, capacidad, recarga)
+            self._cubos[clave] = (fichas, ahora)
+            self._cubos.move_to_end(clave)
+            if len(self._cubos) > self.max_claves:
+                self._cubos.popitem(last=False)
+        return permitido, espera
+
+
+# Cubos en la cache de Django: con Redis se comparten entre procesos y servidores; con
+# LocMemCache sirve de sustituto local. La lectura y escritura no son atómicas: en
+# concurrencia se pueden colar algunas peticiones de más.
+class CubosEnCache:
+    def __init__(self, CACHE='default', **opciones):
+        self.alias = CACHE
+
+    def consumir(self, clave, capacidad, recarga):
+        cache = caches[self.alias]
+        clave = f'api:throttle:{clave}'
+        ahora = time.time()
+        fichas, ultimo = cache.get(clave, (capacidad, ahora))
+        permitido, fichas, espera = gastar_ficha(fichas, ultimo, ahora, capacidad, recarga)
+        cache.set(clave, (fichas, ahora), timeout=int((capacidad - fichas) / recarga) + 1)
+        return permitido, espera
+
+
+_cubos = None
+_cubos_lock = threading.Lock()
+
+
+def obtener_cubos():
+    global _cubos
+    if _cubos is None:
+        with _cubos_lock:
+            if _cubos is None:
+                opciones = configuracion()
+                opciones.pop('ACTIVO')
+                _cubos = import_string(opciones.pop('BACKEND'))(**opciones)
+    return _cubos
+
+
+@receiver(setting_changed)
+def reiniciar_cubos(setting, **kwargs):
+    # Cubos vacíos al cambiar de configuración (override_settings en los tests)
+    global _cubos
+    if setting in ('API_THROTTLE', 'REST_FRAMEWORK'):
+        _cubos = None
+
+
+class CuboThrottle(BaseThrottle):
+    # Throttle de DRF sobre los cubos configurados. Se evalúa antes del handler de la
+    # vista, sin tocar la base de datos ni hashear contraseñas.
+    scope = None
+
+    def get_clave(self, request, view):
+        # None = la petición no cuenta para este throttle
+        raise NotImplementedError
+
+    def get_tasa(self):
+        # Mismo formato que DRF ('5/min'); capacidad = ráfaga, recarga = tasa media
+        tasa = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        if tasa is None:
+            return None
+        peticiones, periodo = tasa.split('/')
+        segundos = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[periodo[0]]
+        return int(peticiones), int(peticiones) / segundos
+
+    def allow_request(self, request, view):
+        return self.comprobar(self.get_clave(request, view))
+
+    def comprobar(self, clave):
+        self.espera = None
+        tasa = self.get_tasa()
+        if clave is None or tasa is None or not configuracion()['ACTIVO']:
+            return True
+        permitido, self.espera = obtener_cubos().consumir(f'{self.scope}:{clave}', *tasa)
+        return permitido
+
+    def wait(self):
+        return self.espera
+
+
+class IPThrottle(CuboThrottle):
+    def get_clave(self, request, view):
+        return self.get_ident(request)
+
+
+class LoginIPThrottle(IPThrottle):
+    scope = 'login_ip'
+
+
+class RegistroIPThrottle(IPThrottle):
+    scope = 'registro_ip'
+
+
+class LoginUsuarioThrottle(CuboThrottle):
+    # Frena los intentos contra una misma cuenta aunque lleguen desde muchas IPs
+    scope = 'login_usuario'
+
+    def get_clave(self, request, view):
+        datos = request.data
+        return self.normalizar(datos.get('username') if hasattr(datos, 'get') else None)
+
+    @staticmethod
+    def normalizar(username):
+        if not username or not isinstance(username, str):
+            return None
+        return username.strip().lower()[:150]
+
+
+class MutacionUsuarioThrottle(CuboThrottle):
+    # Solo escrituras de usuarios autenticados; las lecturas no cuentan
+    scope = 'mutacion'
+
+    def get_clave(self, request, view):
+        if request.method in ('GET', 'HEAD', 'OPTIONS') or not request.user.is_authenticated:
+            return None
+        return request.user.id
+
+
+def espera_login(request, username):
+    # Para login_asincrono (vista Django sin DRF): segundos de espera o None si se admite
+    ip = LoginIPThrottle()
+    if not ip.allow_request(request, None):
+        return ip.wait()
+    usuario = LoginUsuarioThrottle()
+    if not usuario.comprobar(usuario.normalizar(username)):
+        return usuario.wait()
+    return None
@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from . import cambios, contadores
+from .cache_lecturas import invalidar_lecturas
+from .models import EstadoTarea, Tarea
+
+# Cambios de una tarea (PUT y PATCH de /api/tasks/{id}/): la transición de estado se
+# valida en Python y el cambio se aplica con un único
+#   UPDATE api_tarea SET ..., version = version + 1 WHERE id = %s AND version = %s
+# Si otra escritura llegó antes, no se actualiza ninguna fila y la API responde 409
+# en lugar de pisarla.
+
+# Estados a los que se puede pasar desde cada estado (quedarse en el mismo siempre vale)
+TRANSICIONES = {
+    EstadoTarea.PENDIENTE: {EstadoTarea.DESARROLLO, EstadoTarea.TERMINADO, EstadoTarea.OBSERVADO},
+    EstadoTarea.DESARROLLO: {EstadoTarea.PENDIENTE, EstadoTarea.TERMINADO, EstadoTarea.OBSERVADO},
+    EstadoTarea.OBSERVADO: {EstadoTarea.PENDIENTE, EstadoTarea.DESARROLLO, EstadoTarea.TERMINADO},
+    # Una tarea terminada solo se reabre como observada
+    EstadoTarea.TERMINADO: {EstadoTarea.OBSERVADO},
+}
+
+
+class Conflicto(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = {'msg': 'La tarea ha cambiado desde que se leyó; vuelve a cargarla.'}
+    default_code = 'conflicto'
+
+
+def validar_transicion(actual, nuevo):
+    if nuevo != actual and nuevo not in TRANSICIONES[EstadoTarea(actual)]:
+        raise ValidationError({
+            'msg': f"Una tarea '{EstadoTarea(actual).codigo}' no puede pasar a '{EstadoTarea(nuevo).codigo}'.",
+        })
+
+
+def version_esperada(valor, actual):
+    # La versión que envía el cliente (la que leyó) o, sin ella, la leída en esta
+    # petición: al menos ninguna escritura se cuela entre la validación y el UPDATE
+    # (valor ya validado como entero por TareaSerializer)
+    if valor is None:
+        return actual
+    if valor != actual:
+        raise Conflicto()
+    return actual
+
+
+def aplicar(fila, campos, version):
+    # fila: la tarea leída con values() (estado, version, asignada_a, proyecto__id...);
+    # campos: columnas a cambiar. Devuelve la fila con los valores nuevos.
+    if 'estado' in campos:
+        validar_transicion(fila['estado'], campos['estado'])
+    if not campos:
+        return fila
+
+    # Tarea en memoria con los valores leídos, para que contadores y cambios calculen
+    # la diferencia igual que con un save()
+    tarea = Tarea(id=fila['id'], estado=fila['estado'], asignada_a_id=fila['asignada_a'],
+                  proyecto_id=fila['proyecto__id'], nombre=fila['nombre'])
+    with transaction.atomic():
+        actualizadas = Tarea.objects.filter(id=fila['id'], version=version).update(
+            **campos, version=F('version') + 1, updated_at=timezone.now(),
+        )
+        if not actualizadas:
+            raise Conflicto()
+        for campo, valor in campos.items():
+            setattr(tarea, campo, valor)
+        # update() no envía post_save
+        contadores.aplicar([tarea])
+        cambios.registrar([tarea])
+        transaction.on_commit(invalidar_lecturas)
+
+    return {
+        **fila,
+        **{('asignada_a' if campo == 'asignada_a_id' else campo): valor for campo, valor in campos.items()},
+        'version': version + 1,
+    }
@@ -1,6 +1,9 @@
+from django.conf import settings
 from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import AlertaViewSet, ProyectoViewSet, TareaViewSet, UsuarioViewSet
+from .instrumentacion import metricas_prometheus
+from .login import configuracion as configuracion_login, login_asincrono
+from .views import AlertaViewSet, ProyectoViewSet, TareaViewSet, UsuarioViewSet, alertas_stream, cache_metricas, search, sync
 
 router = DefaultRouter()
 router.register(r'projects', ProyectoViewSet)
@@ -14,4 +17,34 @@ urlpatterns = [
     path('api/login/', UsuarioViewSet.as_view({'post': 'login'}), name='login'),
     path('api/me/', UsuarioViewSet.as_view({'get': 'me'}), name='me'),  # Ruta para ver datos del usuario
     path('api/usuarios/<int:pk>/', UsuarioViewSet.as_view({'delete': 'destroy'}), name='delete_user'),
-] + router.urls
+    path('alertas/stream/', alertas_stream, name='alertas_stream'),  # Alertas en tiempo real (SSE, requiere ASGI)
+    path('cache/metrics/', cache_metricas, name='cache_metricas'),
+    path('metrics/', metricas_prometheus, name='metricas_prometheus'),  # Formato de texto de Prometheus
+    path('search/', search, name='search'),  # ?q= en tareas y proyectos (api/busqueda.py)
+    path('sync/', sync, name='sync'),  # Cambios desde ?cursor= (api/cambios.py)
+]
+
+# En ASGI el login puede ir a un pool de hilos acotado sin bloquear el event loop
+if configuracion_login()['ASINCRONO']:
+    urlpatterns = [
+        path('api/login/', login_asincrono, name='login'),
+        path('usuarios/login/', login_asincrono, name='usuario-login'),
+    ] + urlpatterns
+
+# En ASGI las lecturas del tablero, proyectos, alertas y "me" pueden servirse con
+# vistas asíncronas (api/vistas_asincronas.py); las escrituras siguen en los viewsets
+if getattr(settings, 'API_LECTURAS_ASINCRONAS', False):
+    from . import vistas_asincronas
+
+    urlpatterns = [
+        path('tasks/', vistas_asincronas.lectura_asincrona(
+            vistas_asincronas.tareas, TareaViewSet.as_view({'get': 'list', 'post': 'create'}))),
+        path('projects/', vistas_asincronas.lectura_asincrona(
+            vistas_asincronas.proyectos, ProyectoViewSet.as_view({'get': 'list', 'post': 'create'}))),
+        path('alertas/', vistas_asincronas.lectura_asincrona(
+            vistas_asincronas.alertas, AlertaViewSet.as_view({'get': 'list', 'post': 'create'}))),
+        path('api/me/', vistas_asincronas.me),
+        path('usuarios/me/', vistas_asincronas.me),
+    ] + urlpatterns
+
+urlpatterns += router.urls
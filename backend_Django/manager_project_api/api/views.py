@@ -1,20 +1,36 @@
-from collections import defaultdict
+import asyncio
+import json
 from venv import logger
+from django.db import transaction
+from django.db.models import F
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets, permissions
-from .models import Alerta, Proyecto, Tarea
-from .serializers import AlertaSerializer, ProyectoSerializer, TareaSerializer
+from .models import Alerta, Cambio, EstadoTarea, Proyecto, Tarea
+from .serializers import AlertaSerializer, LecturaValores, ProyectoSerializer, TareaBulkSerializer, TareaSerializer
 from .models import Usuario
-from .serializers import UsuarioSerializer
-from rest_framework_simplejwt.tokens import RefreshToken
+from .serializers import IdsSerializer, UsuarioSerializer
 from rest_framework import status
 from rest_framework.response import Response
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
 from rest_framework.exceptions import PermissionDenied
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from . import serializers
+from . import busqueda, cambios, contadores, insercion, serializers, transiciones
+from .authentication import JWTClaimsAuthentication, autenticar_asincrono, tokens_para_usuario
+from .cache_lecturas import invalidar_lecturas, metricas, respuesta_cacheada
+from .etags import etag_de_queryset, respuesta_condicional
+from .exportacion import respuesta_ndjson
+from .login import credenciales
+from .cola_alertas import emitir_alerta, emitir_alertas
+from .pagination import AlertaCursorPagination, IdCursorPagination
+from .realtime import broker
+from .replicas import LecturaReplicaMixin
+from .throttling import LoginIPThrottle, LoginUsuarioThrottle, RegistroIPThrottle
 from rest_framework.exceptions import PermissionDenied, ValidationError
 
 from rest_framework.exceptions import APIException
+from rest_framework.generics import get_object_or_404
+from rest_framework.utils.urls import replace_query_param
 
 class CustomAPIException(APIException):
     status_code = 400  # Código de estado predeterminado
@@ -53,16 +69,183 @@ class IsAdminOrOwner(permissions.BasePermission):
         return False
    
 
-class ProyectoViewSet(viewsets.ModelViewSet):
+def tareas_visibles(usuario):
+    # Si el usuario es administrador, todas las tareas
+    if usuario.rol == 'admin':
+        return Tarea.objects.all()
+
+    # Las tareas asignadas al usuario (vacío si no tiene ninguna, sin una
+    # consulta extra de exists())
+    return Tarea.objects.filter(asignada_a=usuario)
+
+
+def proyectos_visibles(usuario):
+    if usuario.rol == 'admin':
+        return Proyecto.objects.all()
+    return Proyecto.objects.filter(usuario=usuario)
+
+
+VALORES_VISIBLE = {'1': True, 'true': True, '0': False, 'false': False}
+
+
+def alertas_visibles(usuario, params):
+    alertas = Alerta.objects.filter(usuario=usuario)
+
+    # ?visible=1|0 filtra por visibilidad en la base de datos (índice usuario/visible/fecha)
+    visible = params.get('visible')
+    if visible is not None:
+        if visible.lower() not in VALORES_VISIBLE:
+            raise ValidationError({'msg': 'El parámetro visible debe ser 1 o 0.'})
+        alertas = alertas.filter(visible=VALORES_VISIBLE[visible.lower()])
+
+    # ?since=<fecha ISO 8601> devuelve solo las alertas emitidas después de esa fecha
+    since = params.get('since')
+    if since is not None:
+        alertas = alertas.filter(fecha_emision__gt=fecha_parametro(since, 'since'))
+
+    return alertas
+
+
+def fecha_parametro(valor, nombre):
+    fecha = parse_datetime(valor) if isinstance(valor, str) else None
+    if fecha is None:
+        raise ValidationError({'msg': f'El parámetro {nombre} debe ser una fecha ISO 8601.'})
+    if timezone.is_naive(fecha):
+        fecha = timezone.make_aware(fecha)
+    return fecha
+
+
+# Columnas del tablero de tareas: la tarea y los datos de su proyecto en una fila
+CAMPOS_TABLERO = (
+    'id',
+    'nombre',
+    'descripcion',
+    'estado',
+    'asignada_a_id',
+    'version',
+    'proyecto_id',
+    'proyecto__nombre',
+    'proyecto__descripcion',
+    'proyecto__fecha_inicio',
+    'proyecto__fecha_finalizacion',
+    'proyecto__usuario_id',
+)
+
+
+def agrupar_por_proyecto(tareas):
+    # Agrupar tareas por proyecto (se conserva el orden de aparición)
+    proyectos_dict = {}
+
+    for tarea in tareas:
+        proyecto_id = tarea['proyecto_id']
+        proyecto = proyectos_dict.get(proyecto_id)
+        if proyecto is None:
+            # Obtener datos del proyecto solo una vez
+            proyecto = proyectos_dict[proyecto_id] = {
+                "id": proyecto_id,
+                "nombre": tarea['proyecto__nombre'],
+                "descripcion": tarea['proyecto__descripcion'],
+                "fecha_inicio": tarea['proyecto__fecha_inicio'],
+                "fecha_finalizacion": tarea['proyecto__fecha_finalizacion'],
+                "usuario": tarea['proyecto__usuario_id'],
+                "tareas": []
+            }
+
+        # Añadir la tarea al proyecto correspondiente
+        proyecto["tareas"].append({
+            "id": tarea['id'],
+            "nombre": tarea['nombre'],
+            "descripcion": tarea['descripcion'],
+            "estado": EstadoTarea(tarea['estado']).codigo,
+            "asignada_a": tarea['asignada_a_id'],
+            "version": tarea['version'],
+        })
+
+    return list(proyectos_dict.values())
+
+
+def ids_de_peticion(request):
+    # Lista de ids enteros de {"ids": [...]}; cualquier otra forma responde 400
+    serializer = IdsSerializer(data=request.data if isinstance(request.data, dict) else {})
+    if not serializer.is_valid():
+        raise ValidationError({'msg': 'Se esperaba {"ids": [...]} con una lista de ids numéricos.',
+                               'errores': serializer.errors})
+    return serializer.validated_data['ids']
+
+
+def parametro_entero(request, nombre, por_defecto=None):
+    # Entero no negativo de la query string. isdecimal() y no isdigit(): este acepta
+    # caracteres como '²' que int() rechaza
+    valor = request.query_params.get(nombre)
+    if valor is None:
+        return por_defecto
+    if not valor.isdecimal():
+        raise ValidationError({'msg': f'El parámetro {nombre} debe ser numérico.'})
+    return int(valor)
+
+
+def etag_detalle(request, vista, queryset, pk, campos=('updated_at',)):
+    # ETag de un solo objeto dentro del queryset visible para el usuario
+    if not str(pk).isdecimal():
+        return None
+    return etag_de_queryset(request, vista, queryset.filter(pk=pk), campos)
+
+
+class ListadoValoresMixin:
+    # Listados de solo lectura por serializers.LecturaValores: misma respuesta que
+    # serializer_class, construida desde filas de values()
+    lectura = None
+
+    def listar_valores(self, queryset):
+        filas = queryset.values(*self.lectura.columnas)
+        page = self.paginate_queryset(filas)
+        if page is not None:
+            return self.get_paginated_response(self.lectura.representar(page))
+        return Response(self.lectura.representar(filas))
+
+
+class ProyectoViewSet(LecturaReplicaMixin, ListadoValoresMixin, viewsets.ModelViewSet):
     queryset = Proyecto.objects.all()
     serializer_class = ProyectoSerializer
+    lectura = LecturaValores(ProyectoSerializer)
     permission_classes = [IsAdminOrOwner]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [JWTClaimsAuthentication]
 
     def get_queryset(self):
-        if self.request.user.rol == 'admin':
-            return Proyecto.objects.all()
-        return Proyecto.objects.filter(usuario=self.request.user)
+        return proyectos_visibles(self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        return respuesta_cacheada(
+            request, 'proyectos',
+            lambda: self.listar_valores(self.filter_queryset(self.get_queryset())),
+            lambda: etag_de_queryset(request, 'proyectos', self.get_queryset(), paginador=self.paginator),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return respuesta_condicional(
+            request,
+            lambda: etag_detalle(request, 'proyecto', self.get_queryset(), kwargs.get('pk')),
+            lambda: super(ProyectoViewSet, self).retrieve(request, *args, **kwargs),
+        )
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        # Tareas por estado, carga por usuario asignado y proyectos vencidos de una página
+        # de proyectos visibles (mismo cursor que el listado): los ids de la página y una
+        # consulta agrupada sobre ellos (ver api/contadores.py)
+        return respuesta_cacheada(request, 'proyectos_stats', self.estadisticas_pagina)
+
+    def estadisticas_pagina(self):
+        proyectos = self.get_queryset()
+        pagina = self.paginate_queryset(proyectos.values('id'))
+        if pagina is None:
+            return Response(contadores.estadisticas(proyectos))
+        datos = contadores.estadisticas(proyectos.filter(id__in=[fila['id'] for fila in pagina]))
+        return Response({
+            'next': self.paginator.get_next_link(),
+            'previous': self.paginator.get_previous_link(),
+            **datos,
+        })
 
     def perform_create(self, serializer):
         if self.request.user.rol != 'admin':
@@ -77,7 +260,7 @@ class ProyectoViewSet(viewsets.ModelViewSet):
         proyecto = serializer.save(usuario=usuario)
 
         # Crear la alerta para el usuario asignado
-        Alerta.objects.create(usuario=usuario, mensaje=f"Se te ha asignado un nuevo proyecto: {proyecto.nombre}")
+        emitir_alerta(usuario, f"Se te ha asignado un nuevo proyecto: {proyecto.nombre}")
 
     def perform_update(self, serializer):
         if self.request.user.rol != 'admin':
@@ -100,68 +283,57 @@ class ProyectoViewSet(viewsets.ModelViewSet):
         instance.delete()
 
 # Vista para Tareas
-class TareaViewSet(viewsets.ModelViewSet):
+class TareaViewSet(LecturaReplicaMixin, ListadoValoresMixin, viewsets.ModelViewSet):
     queryset = Tarea.objects.all()
     serializer_class = TareaSerializer
+    lectura = LecturaValores(TareaSerializer)
     permission_classes = [IsAdminOrOwner]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [JWTClaimsAuthentication]
+
+    MAX_BULK = 1000  # tareas por petición en /tasks/bulk/
+    # La respuesta incluye datos del proyecto: cambia si cambia la tarea o su proyecto
+    CAMPOS_ETAG = ('updated_at', 'proyecto__updated_at')
 
     def get_queryset(self):
-        # Si el usuario es administrador, devuelve todas las tareas
-        if self.request.user.rol == 'admin':
-            return Tarea.objects.all()
+        return tareas_visibles(self.request.user)
 
-        # Obtén todas las tareas asignadas al usuario
-        tareas_asignadas = Tarea.objects.filter(asignada_a=self.request.user)
+    def list(self, request, *args, **kwargs):
+        # El tablero se sirve desde la cache por usuario/rol hasta que cambie algún dato
+        return respuesta_cacheada(
+            request, 'tareas',
+            lambda: self.listar_agrupado(request),
+            lambda: etag_de_queryset(request, 'tareas', self.get_queryset(), self.CAMPOS_ETAG, self.paginator),
+        )
 
-        # Si el usuario no tiene tareas asignadas, retorna un queryset vacío
-        if not tareas_asignadas.exists():
-            return Tarea.objects.none()
+    def retrieve(self, request, *args, **kwargs):
+        return respuesta_condicional(
+            request,
+            lambda: etag_detalle(request, 'tarea', self.get_queryset(), kwargs.get('pk'), self.CAMPOS_ETAG),
+            lambda: super(TareaViewSet, self).retrieve(request, *args, **kwargs),
+        )
 
-        return tareas_asignadas
+    def listar_agrupado(self, request):
+        # Una sola consulta con JOIN a proyecto; evita cargar cada relación por tarea
+        tareas = self.get_queryset().order_by('id').values(*CAMPOS_TABLERO)
 
-    def list(self, request, *args, **kwargs):
-        tareas = self.get_queryset()
-
-        # Agrupar tareas por proyecto
-        proyectos_dict = defaultdict(lambda: {
-            "id": None,
-            "nombre": None,
-            "descripcion": None,
-            "fecha_inicio": None,
-            "fecha_finalizacion": None,
-            "usuario": None,
-            "tareas": []
-        })
+        # Paginar por id de tarea antes de agrupar; un proyecto puede repetirse
+        # en páginas consecutivas y el cliente los une por id
+        page = self.paginate_queryset(tareas)
+        response_data = agrupar_por_proyecto(tareas if page is None else page)
 
-        for tarea in tareas:
-            # Obtener datos del proyecto solo una vez
-            proyecto_id = tarea.proyecto.id
-            if proyectos_dict[proyecto_id]["id"] is None:
-                proyectos_dict[proyecto_id].update({
-                    "id": proyecto_id,
-                    "nombre": tarea.proyecto.nombre,
-                    "descripcion": tarea.proyecto.descripcion,
-                    "fecha_inicio": tarea.proyecto.fecha_inicio,
-                    "fecha_finalizacion": tarea.proyecto.fecha_finalizacion,
-                    "usuario": tarea.proyecto.usuario.id,
-                    "tareas": []
-                })
-
-            # Añadir la tarea al proyecto correspondiente
-            tarea_data = {
-                "id": tarea.id,
-                "nombre": tarea.nombre,
-                "descripcion": tarea.descripcion,
-                "estado": tarea.estado,
-                "asignada_a": tarea.asignada_a.id,
-            }
-            proyectos_dict[proyecto_id]["tareas"].append(tarea_data)
+        if page is not None:
+            return self.get_paginated_response(response_data)
+        return Response(response_data)
 
-        # Convertir el defaultdict en una lista
-        response_data = list(proyectos_dict.values())
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        # Todas las tareas visibles para el usuario, una por línea (NDJSON) y en streaming
+        def transformar(tarea):
+            tarea['estado'] = EstadoTarea(tarea['estado']).codigo
+            return tarea
 
-        return Response(response_data)
+        campos = ('id', 'nombre', 'descripcion', 'estado', 'asignada_a', 'proyecto', 'updated_at')
+        return respuesta_ndjson(self.get_queryset(), campos, 'tareas', transformar)
     
     def perform_create(self, serializer):
         proyecto_id = self.request.data.get('proyecto')
@@ -187,78 +359,216 @@ class TareaViewSet(viewsets.ModelViewSet):
         tarea = serializer.save(proyecto=proyecto, asignada_a=asignada_a)
     
         # Crear la alerta para el usuario asignado
-        Alerta.objects.create(usuario=asignada_a, mensaje=f"Se te ha asignado una nueva tarea: {tarea.nombre}")
+        emitir_alerta(asignada_a, f"Se te ha asignado una nueva tarea: {tarea.nombre}")
     
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-    def partial_update(self, request, *args, **kwargs):
-        instance = self.get_object()  # Obtiene la tarea específica
-        original_estado = instance.estado  # Guarda el estado original
-    
-        # Verifica si el usuario es admin
-        if request.user.rol == 'admin':
-            serializer = self.get_serializer(instance, data=request.data, partial=True)
-            serializer.is_valid(raise_exception=True)
-            self.perform_update(serializer)
-    
-            # Crea la alerta
-            Alerta.objects.create(
-                usuario=instance.asignada_a,
-                mensaje=f"El estado de la tarea '{instance.nombre}' ha cambiado a '{instance.estado}'"
-            )
-            return Response(serializer.data)
-    
-        # Verifica si el usuario asignado a la tarea intenta modificar el estado
-        if request.user == instance.asignada_a:
-            if 'estado' in request.data:
-                serializer = self.get_serializer(instance, data=request.data, partial=True)
-                serializer.is_valid(raise_exception=True)
-                self.perform_update(serializer)
-    
-                # Crea la alerta
-                Alerta.objects.create(
-                    usuario=instance.asignada_a,
-                    mensaje=f"El estado de la tarea '{instance.nombre}' ha cambiado a '{instance.estado}'"
-                )
-                return Response(serializer.data)
-    
-        # Verifica si el usuario es el propietario del proyecto
-        if request.user.id == instance.proyecto.usuario.id:
-            # Si el usuario es el propietario del proyecto, permite modificar todos los campos
-            serializer = self.get_serializer(instance, data=request.data, partial=True)
-            serializer.is_valid(raise_exception=True)
-            self.perform_update(serializer)
-    
-            # Crea la alerta
-            Alerta.objects.create(
-                usuario=instance.asignada_a,
-                mensaje=f"El estado de la tarea '{instance.nombre}' ha cambiado a '{instance.estado}'"
+    def update(self, request, *args, **kwargs):
+        # PUT y PATCH: una lectura (con el proyecto) y un UPDATE condicionado a la
+        # versión (api/transiciones.py); 409 si la tarea cambió entre medias
+        partial = kwargs.pop('partial', False)
+        # El queryset ya limita a los no admin a sus tareas (IsAdminOrOwner)
+        fila = get_object_or_404(self.get_queryset().values(*self.lectura.columnas), pk=kwargs['pk'])
+
+        serializer = self.get_serializer(data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        version = transiciones.version_esperada(serializer.validated_data.pop('version', None), fila['version'])
+        campos = {}
+        for campo, valor in serializer.validated_data.items():
+            if campo == 'asignada_a':
+                campo, valor = 'asignada_a_id', valor.id
+            if fila['asignada_a' if campo == 'asignada_a_id' else campo] != valor:
+                campos[campo] = valor
+
+        # Admin y responsable del proyecto cambian cualquier campo; el usuario asignado
+        # solo el estado
+        if request.user.rol != 'admin' and fila['proyecto__usuario'] != request.user.id:
+            if fila['asignada_a'] != request.user.id or set(campos) - {'estado'}:
+                return Response({"detail": "No tienes permiso para modificar estos campos."},
+                                status=status.HTTP_403_FORBIDDEN)
+
+        actualizada = transiciones.aplicar(fila, campos, version)
+        if campos:
+            emitir_alerta(
+                actualizada['asignada_a'],
+                f"El estado de la tarea '{actualizada['nombre']}' ha cambiado a '{EstadoTarea(actualizada['estado']).codigo}'"
             )
-            return Response(serializer.data)
-    
-        # Si ninguna de las condiciones se cumple, no se permite la modificación
-        alert_message = "No tienes permiso para modificar estos campos."
-        return Response(
-            {"detail": alert_message},
-            status=status.HTTP_403_FORBIDDEN
-        )
+        return Response(self.lectura.representar([actualizada])[0])
 
+    # Operaciones masivas: POST crea, PATCH actualiza (por id) y DELETE elimina ({"ids": [...]})
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request):
+        if request.method == 'DELETE':
+            return self.bulk_destroy(request)
 
+        if not isinstance(request.data, list) or not request.data:
+            raise ValidationError({'msg': 'Se esperaba una lista de tareas.'})
+        if len(request.data) > self.MAX_BULK:
+            raise ValidationError({'msg': f'No se pueden procesar más de {self.MAX_BULK} tareas por petición.'})
 
+        partial = request.method == 'PATCH'
+        serializer = TareaBulkSerializer(data=request.data, many=True, partial=partial)
+        serializer.is_valid(raise_exception=True)
 
+        if partial:
+            return self.bulk_update(request, serializer.validated_data)
+        return self.bulk_create(request, serializer.validated_data)
+
+    def resolver_relaciones(self, items):
+        # Proyectos (con su responsable) y usuarios de toda la lista en dos consultas
+        proyecto_ids = {item['proyecto'] for item in items if 'proyecto' in item}
+        usuario_ids = {item['asignada_a'] for item in items if 'asignada_a' in item}
+        proyectos = dict(Proyecto.objects.filter(id__in=proyecto_ids).values_list('id', 'usuario_id')) if proyecto_ids else {}
+        usuarios = set(Usuario.objects.filter(id__in=usuario_ids).values_list('id', flat=True)) if usuario_ids else set()
+
+        errores = {}
+        for indice, item in enumerate(items):
+            if 'proyecto' in item and item['proyecto'] not in proyectos:
+                errores[indice] = 'El proyecto no existe.'
+            elif 'asignada_a' in item and item['asignada_a'] not in usuarios:
+                errores[indice] = 'El usuario asignado no existe.'
+            elif ('proyecto' in item and self.request.user.rol != 'admin'
+                    and proyectos[item['proyecto']] != self.request.user.id):
+                errores[indice] = 'No tiene permiso para crear una tarea en este proyecto.'
+        if errores:
+            raise ValidationError({'msg': 'Algunas tareas no son válidas.', 'errores': errores})
+
+    def bulk_create(self, request, items):
+        self.resolver_relaciones(items)
+        tareas = [
+            Tarea(
+                nombre=item['nombre'],
+                descripcion=item['descripcion'],
+                estado=item.get('estado', EstadoTarea.PENDIENTE),
+                proyecto_id=item['proyecto'],
+                asignada_a_id=item['asignada_a'],
+            )
+            for item in items
+        ]
+        with transaction.atomic():
+            # Con los ids también en MySQL, para la respuesta y el registro de cambios
+            insercion.crear(Tarea, tareas, ('nombre', 'proyecto_id', 'asignada_a_id'))
+            # bulk_create no envía post_save
+            contadores.aplicar(tareas)
+            cambios.registrar(tareas)
+            transaction.on_commit(invalidar_lecturas)
+            emitir_alertas(
+                (tarea.asignada_a_id, f"Se te ha asignado una nueva tarea: {tarea.nombre}") for tarea in tareas
+            )
+        return Response(self.bulk_response(tareas), status=status.HTTP_201_CREATED)
+
+    @transaction.atomic
+    def bulk_update(self, request, items):
+        ids = [item['id'] for item in items]
+        if len(set(ids)) != len(ids):
+            raise ValidationError({'msg': 'Hay ids de tareas repetidos.'})
+
+        # Bloqueadas hasta el final: ninguna escritura suelta se pierde entre la lectura
+        # y el bulk_update
+        tareas = {
+            tarea.id: tarea
+            for tarea in Tarea.objects.filter(id__in=ids).select_for_update()
+            .annotate(responsable_id=F('proyecto__usuario_id'))
+        }
+        if len(tareas) != len(ids):
+            return Response({'msg': 'Algunas tareas no existen.'}, status=status.HTTP_404_NOT_FOUND)
+
+        # Mismas reglas que partial_update: admin y responsable del proyecto cambian
+        # cualquier campo; el usuario asignado solo el estado
+        es_admin = request.user.rol == 'admin'
+        for item in items:
+            tarea = tareas[item['id']]
+            if es_admin or tarea.responsable_id == request.user.id:
+                continue
+            if tarea.asignada_a_id == request.user.id and set(item) <= {'id', 'estado'}:
+                continue
+            return Response({'msg': f"No tienes permiso para modificar la tarea {item['id']}."},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        self.resolver_relaciones(items)
+
+        for item in items:
+            if 'estado' in item:
+                transiciones.validar_transicion(tareas[item['id']].estado, item['estado'])
+
+        campos = set()
+        for item in items:
+            tarea = tareas[item['id']]
+            for campo, valor in item.items():
+                if campo == 'id':
+                    continue
+                atributo = f'{campo}_id' if campo in ('proyecto', 'asignada_a') else campo
+                setattr(tarea, atributo, valor)
+                campos.add(atributo)
+
+        # bulk_update no aplica auto_now: se actualiza a mano para los ETag, igual que
+        # la versión (las escrituras sueltas que leyeron la anterior reciben 409)
+        ahora = timezone.now()
+        for tarea in tareas.values():
+            tarea.updated_at = ahora
+            tarea.version += 1
+        campos.update(('updated_at', 'version'))
+
+        actualizadas = [tareas[id] for id in ids]
+        with transaction.atomic():
+            Tarea.objects.bulk_update(actualizadas, sorted(campos), batch_size=self.MAX_BULK)
+            contadores.aplicar(actualizadas)
+            cambios.registrar(actualizadas)
+            transaction.on_commit(invalidar_lecturas)
+            emitir_alertas(
+                (tarea.asignada_a_id,
+                 f"El estado de la tarea '{tarea.nombre}' ha cambiado a '{EstadoTarea(tarea.estado).codigo}'")
+                for tarea in actualizadas
+            )
+        return Response(self.bulk_response(actualizadas))
+
+    def bulk_destroy(self, request):
+        ids = ids_de_peticion(request)
+        if len(ids) > self.MAX_BULK:
+            raise ValidationError({'msg': f'No se pueden procesar más de {self.MAX_BULK} tareas por petición.'})
+
+        # Mismo alcance que destroy: admin cualquiera, el resto solo sus tareas asignadas.
+        # Las filas eliminadas sustituyen al count() previo; si falta alguna se deshace.
+        with transaction.atomic():
+            _, por_modelo = self.get_queryset().filter(id__in=ids).delete()
+            eliminadas = por_modelo.get(Tarea._meta.label, 0)
+            if eliminadas != len(set(ids)):
+                transaction.set_rollback(True)
+                return Response({'msg': 'Algunos IDs no son válidos.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'eliminadas': eliminadas})
+
+    @staticmethod
+    def bulk_response(tareas):
+        return [
+            {
+                "id": tarea.id,
+                "nombre": tarea.nombre,
+                "descripcion": tarea.descripcion,
+                "estado": EstadoTarea(tarea.estado).codigo,
+                "proyecto": tarea.proyecto_id,
+                "asignada_a": tarea.asignada_a_id,
+                "version": tarea.version,
+            }
+            for tarea in tareas
+        ]
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def filter_by_project(self, request):
-        project_id = request.query_params.get('project_id')
+        project_id = parametro_entero(request, 'project_id')
         tasks = self.get_queryset().filter(proyecto_id=project_id)
-        serializer = self.get_serializer(tasks, many=True)
-        return Response(serializer.data)
 
+        # El proyecto llega en la misma consulta (JOIN) y se serializa una sola vez
+        return respuesta_condicional(
+            request,
+            lambda: etag_de_queryset(request, 'tareas_proyecto', tasks, self.CAMPOS_ETAG, self.paginator),
+            lambda: self.listar_valores(tasks),
+        )
 
-class UsuarioViewSet(viewsets.ModelViewSet):
+
+class UsuarioViewSet(LecturaReplicaMixin, viewsets.ModelViewSet):
     serializer_class = UsuarioSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [JWTClaimsAuthentication]
 
     def get_queryset(self):
         if self.request.user.rol == 'admin':
@@ -275,11 +585,20 @@ class UsuarioViewSet(viewsets.ModelViewSet):
 
         return super(UsuarioViewSet, self).get_permissions()
 
+    def get_throttles(self):
+        # Login y registro son públicos: se limitan por IP (y el login por cuenta)
+        # antes de consultar el usuario o hashear la contraseña
+        if self.action == 'login':
+            return [LoginIPThrottle(), LoginUsuarioThrottle()]
+        if self.action == 'create':
+            return [RegistroIPThrottle()]
+        return super(UsuarioViewSet, self).get_throttles()
+
     def create(self, request):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_para_usuario(user)
         return Response({
             'user': serializer.data,
             'refresh': str(refresh),
@@ -288,20 +607,9 @@ class UsuarioViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'], permission_classes=[permissions.AllowAny])
     def login(self, request):
-        username = request.data.get('username')
-        password = request.data.get('password')
-        try:
-            user = Usuario.objects.get(username=username)
-            if user.check_password(password):
-                refresh = RefreshToken.for_user(user)
-                return Response({
-                    'refresh': str(refresh),
-                    'token': str(refresh.access_token),
-                })
-            else:
-                return format_error_response( 'Invalid credentials', status_code=status.HTTP_401_UNAUTHORIZED)
-        except Usuario.DoesNotExist:
-             raise ValidationError({'msg':'User does not exist'})
+        # Bajo ASGI con API_LOGIN['ASINCRONO'] esta ruta la sirve login.login_asincrono
+        estado, datos = credenciales(request.data.get('username'), request.data.get('password'))
+        return Response(datos, status=estado)
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -326,6 +634,11 @@ class UsuarioViewSet(viewsets.ModelViewSet):
             "rol": request.user.rol,
         })
 
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def export(self, request):
+        # Usuarios visibles (todos para admin) en NDJSON y en streaming, sin la contraseña
+        return respuesta_ndjson(self.get_queryset(), ('id', 'username', 'email', 'nombre', 'rol'), 'usuarios')
+
     def destroy(self, request, pk=None):
         try:
             user_to_delete = self.get_object()
@@ -377,14 +690,36 @@ class IsAdminOrAlertOwner(permissions.BasePermission):
             return True
         return False
 
-class AlertaViewSet(viewsets.ModelViewSet):
+class AlertaViewSet(LecturaReplicaMixin, ListadoValoresMixin, viewsets.ModelViewSet):
     queryset = Alerta.objects.all()
     serializer_class = AlertaSerializer
+    lectura = LecturaValores(AlertaSerializer)
     permission_classes = [permissions.IsAuthenticated, IsAdminOrAlertOwner]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [JWTClaimsAuthentication]
+    pagination_class = AlertaCursorPagination
 
     def get_queryset(self):
-        return Alerta.objects.filter(usuario=self.request.user)
+        return alertas_visibles(self.request.user, self.request.query_params)
+
+    def list(self, request, *args, **kwargs):
+        return respuesta_condicional(
+            request,
+            lambda: etag_de_queryset(request, 'alertas', self.get_queryset(), paginador=self.paginator),
+            lambda: self.listar_valores(self.filter_queryset(self.get_queryset())),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return respuesta_condicional(
+            request,
+            lambda: etag_detalle(request, 'alerta', self.get_queryset(), kwargs.get('pk')),
+            lambda: super(AlertaViewSet, self).retrieve(request, *args, **kwargs),
+        )
+
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread_count(self, request):
+        # COUNT(*) resuelto sobre el índice (usuario, visible, fecha_emision)
+        total = Alerta.objects.filter(usuario=request.user, visible=True).count()
+        return Response({'unread': total})
 
     def perform_create(self, serializer):
         usuario_id = self.request.data.get('usuario')
@@ -402,16 +737,137 @@ class AlertaViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['patch'], url_path='update-visibility')
     def update_visibility(self, request):
-        ids = request.data.get('ids', [])
-        if not ids:
-            return Response({'msg': 'No se proporcionaron IDs.'}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Verificar que los IDs son válidos
-        alerts = Alerta.objects.filter(id__in=ids)
-        if alerts.count() != len(ids):
-            return Response({'msg': 'Algunos IDs no son válidos.'}, status=status.HTTP_404_NOT_FOUND)
-
-        # Actualizar el campo 'visible' a 0 para las alertas encontradas
-        alerts.update(visible=0)
-
-        return Response({'msg': 'Visibilidad actualizada correctamente.'}, status=status.HTTP_200_OK)
\ No newline at end of file
+        ids = ids_de_peticion(request)
+
+        # Un solo UPDATE sobre las alertas del usuario; el número de filas afectadas
+        # sustituye al count() previo y, si falta alguna, se deshace el cambio
+        ahora = timezone.now()
+        with transaction.atomic():
+            actualizadas = Alerta.objects.filter(usuario=request.user, id__in=ids).update(
+                visible=False, updated_at=ahora
+            )
+            if actualizadas != len(set(ids)):
+                transaction.set_rollback(True)
+                return Response({'msg': 'Algunos IDs no son válidos.'}, status=status.HTTP_404_NOT_FOUND)
+            cambios.registrar_alertas_de_usuarios([request.user.id], ahora)
+
+        return Response({'msg': 'Visibilidad actualizada correctamente.', 'actualizadas': actualizadas},
+                        status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post', 'patch'], url_path='mark-all-read')
+    def mark_all_read(self, request):
+        # Oculta todas las alertas visibles del usuario, o solo las emitidas hasta
+        # ?before=<fecha ISO 8601> (las que el cliente ya tenía), con un solo UPDATE
+        alertas = Alerta.objects.filter(usuario=request.user, visible=True)
+        datos = request.data if isinstance(request.data, dict) else {}
+        before = request.query_params.get('before', datos.get('before'))
+        if before is not None:
+            alertas = alertas.filter(fecha_emision__lte=fecha_parametro(before, 'before'))
+
+        ahora = timezone.now()
+        with transaction.atomic():
+            actualizadas = alertas.update(visible=False, updated_at=ahora)
+            if actualizadas:
+                cambios.registrar_alertas_de_usuarios([request.user.id], ahora)
+        return Response({'actualizadas': actualizadas})
+
+
+# Canal de alertas en tiempo real (Server-Sent Events) servido por la app ASGI
+ALERTAS_STREAM_KEEPALIVE = 25  # segundos entre comentarios para mantener viva la conexión
+
+async def alertas_stream(request):
+    # EventSource no permite cabeceras propias: se acepta el token también como ?token=
+    usuario = await autenticar_asincrono(request, request.GET.get('token'))
+    if usuario is None:
+        return JsonResponse({'msg': 'Token no válido o ausente.'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    async def eventos():
+        suscripcion = broker.suscribir(usuario.id)
+        _, cola = suscripcion
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    alerta = await asyncio.wait_for(cola.get(), timeout=ALERTAS_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f"id: {alerta['id']}\nevent: alerta\ndata: {json.dumps(alerta)}\n\n"
+        finally:
+            broker.cancelar(usuario.id, suscripcion)
+
+    response = StreamingHttpResponse(eventos(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# Métricas de la cache de lecturas (aciertos y fallos por vista), solo para admin
+@api_view(['GET'])
+@authentication_classes([JWTClaimsAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+def cache_metricas(request):
+    if request.user.rol != 'admin':
+        return format_error_response('Solo los administradores pueden ver las métricas.', status_code=status.HTTP_403_FORBIDDEN)
+    return Response(metricas())
+
+
+@api_view(['GET'])
+@authentication_classes([JWTClaimsAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+def sync(request):
+    # Sincronización incremental: proyectos, tareas y alertas creados, modificados o
+    # eliminados después de ?cursor= (ver api/cambios.py). Sin cursor devuelve el actual,
+    # que el cliente pide antes de la carga completa.
+    consultas = [
+        (Cambio.PROYECTO, 'proyectos', proyectos_visibles(request.user), ProyectoViewSet.lectura),
+        (Cambio.TAREA, 'tareas', tareas_visibles(request.user), TareaViewSet.lectura),
+        (Cambio.ALERTA, 'alertas', Alerta.objects.filter(usuario=request.user), AlertaViewSet.lectura),
+    ]
+    cursor = parametro_entero(request, 'cursor')
+    if cursor is None:
+        return Response({
+            'cursor': str(cambios.ultimo_cursor()),
+            'mas': False,
+            **cambios.representar_cambios([], consultas),
+        })
+    if cursor < cambios.horizonte():
+        return Response({'msg': 'El cursor es anterior a la última compactación; hay que recargar todo.'},
+                        status=status.HTTP_410_GONE)
+    return Response(cambios.sincronizar(request.user, cursor, consultas))
+
+
+@api_view(['GET'])
+@authentication_classes([JWTClaimsAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+def search(request):
+    # Búsqueda de texto completo en tareas y proyectos visibles (ver api/busqueda.py),
+    # ordenada por relevancia. ?tipo=tareas|proyectos limita la búsqueda a uno de ellos.
+    palabras = busqueda.terminos(request.query_params.get('q', ''))
+    if not palabras:
+        raise ValidationError({'msg': f"El parámetro q necesita al menos una palabra de "
+                                      f"{busqueda.configuracion()['MIN_LONGITUD']} letras."})
+
+    consultas = [
+        ('tarea', tareas_visibles(request.user), TareaViewSet.lectura),
+        ('proyecto', proyectos_visibles(request.user), ProyectoViewSet.lectura),
+    ]
+    tipo = request.query_params.get('tipo')
+    if tipo is not None:
+        consultas = [consulta for consulta in consultas if f'{consulta[0]}s' == tipo]
+        if not consultas:
+            raise ValidationError({'msg': 'El parámetro tipo debe ser tareas o proyectos.'})
+
+    limite = IdCursorPagination().get_page_size(request)
+    offset = parametro_entero(request, 'offset', 0)
+    if offset + limite > busqueda.configuracion()['MAX_RESULTADOS']:
+        raise ValidationError({'msg': 'La búsqueda no pasa de los primeros '
+                                      f"{busqueda.configuracion()['MAX_RESULTADOS']} resultados; afina el término."})
+
+    resultados, hay_mas = busqueda.buscar(palabras, consultas, offset, limite)
+    url = request.build_absolute_uri()
+    return Response({
+        'next': replace_query_param(url, 'offset', offset + limite) if hay_mas else None,
+        'previous': replace_query_param(url, 'offset', max(offset - limite, 0)) if offset else None,
+        'results': resultados,
+    })
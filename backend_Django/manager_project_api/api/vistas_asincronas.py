@@ -0,0 +1,126 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotModified
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import NotAuthenticated, ValidationError
+from rest_framework.request import Request
+
+from .authentication import autenticar_asincrono
+from .cache_lecturas import arespuesta_cacheada, respuesta_json
+from .etags import aetag_de_queryset, etag_coincide
+from .pagination import AlertaCursorPagination, IdCursorPagination
+from .views import (
+    CAMPOS_TABLERO,
+    AlertaViewSet,
+    ProyectoViewSet,
+    TareaViewSet,
+    agrupar_por_proyecto,
+    alertas_visibles,
+    proyectos_visibles,
+    tareas_visibles,
+)
+
+# Variantes asíncronas de las lecturas más frecuentes (tablero de tareas, proyectos,
+# alertas y "me") para servir con ASGI (uvicorn). Usan el ORM asíncrono y no ocupan
+# un hilo mientras esperan a la base de datos. Devuelven el mismo JSON, los mismos
+# cursores de paginación y los mismos ETag/cache que los viewsets de DRF.
+
+
+def lectura_asincrona(vista_asincrona, vista_sincrona):
+    # GET/HEAD van a la vista asíncrona; el resto de métodos al viewset de DRF
+    vista_sincrona = sync_to_async(vista_sincrona)
+
+    async def vista(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return await vista_asincrona(request)
+        return await vista_sincrona(request, *args, **kwargs)
+
+    return csrf_exempt(vista)
+
+
+def no_autenticado():
+    # Mismo cuerpo y cabecera que NotAuthenticated en los viewsets
+    response = respuesta_json({'detail': str(NotAuthenticated.default_detail)}, status=status.HTTP_401_UNAUTHORIZED)
+    response['WWW-Authenticate'] = 'Bearer realm="api"'
+    return response
+
+
+async def peticion_autenticada(request):
+    # Request de DRF sin parsers ni autenticadores: da query_params y build_absolute_uri
+    # a la paginación y a las claves de cache, con el usuario ya autenticado
+    usuario = await autenticar_asincrono(request)
+    if usuario is None:
+        return None
+    peticion = Request(request)
+    peticion.user = usuario
+    return peticion
+
+
+async def tareas(request):
+    peticion = await peticion_autenticada(request)
+    if peticion is None:
+        return no_autenticado()
+    queryset = tareas_visibles(peticion.user)
+
+    async def construir():
+        paginador = IdCursorPagination()
+        filas = await paginador.apaginate_queryset(queryset.values(*CAMPOS_TABLERO), peticion)
+        return paginador.get_paginated_data(agrupar_por_proyecto(filas))
+
+    return await arespuesta_cacheada(
+        peticion, 'tareas', construir,
+        lambda: aetag_de_queryset(peticion, 'tareas', queryset, TareaViewSet.CAMPOS_ETAG, IdCursorPagination()),
+    )
+
+
+async def proyectos(request):
+    peticion = await peticion_autenticada(request)
+    if peticion is None:
+        return no_autenticado()
+    queryset = proyectos_visibles(peticion.user)
+
+    async def construir():
+        paginador = IdCursorPagination()
+        lectura = ProyectoViewSet.lectura
+        pagina = await paginador.apaginate_queryset(queryset.values(*lectura.columnas), peticion)
+        return paginador.get_paginated_data(lectura.representar(pagina))
+
+    return await arespuesta_cacheada(
+        peticion, 'proyectos', construir,
+        lambda: aetag_de_queryset(peticion, 'proyectos', queryset, paginador=IdCursorPagination()),
+    )
+
+
+async def alertas(request):
+    peticion = await peticion_autenticada(request)
+    if peticion is None:
+        return no_autenticado()
+    try:
+        queryset = alertas_visibles(peticion.user, peticion.query_params)
+    except ValidationError as error:
+        return respuesta_json(error.detail, status=status.HTTP_400_BAD_REQUEST)
+
+    etag = await aetag_de_queryset(peticion, 'alertas', queryset, paginador=AlertaCursorPagination())
+    if etag_coincide(peticion, etag):
+        response = HttpResponseNotModified()
+    else:
+        paginador = AlertaCursorPagination()
+        lectura = AlertaViewSet.lectura
+        pagina = await paginador.apaginate_queryset(queryset.values(*lectura.columnas), peticion)
+        response = respuesta_json(paginador.get_paginated_data(lectura.representar(pagina)))
+    if etag is not None:
+        response['ETag'] = etag
+    return response
+
+
+async def me(request):
+    # Con API_JWT_SIN_CONSULTA no toca la base de datos
+    usuario = await autenticar_asincrono(request)
+    if usuario is None:
+        return no_autenticado()
+    return respuesta_json({
+        'id': usuario.id,
+        'username': usuario.username,
+        'nombre': usuario.nombre,
+        'rol': usuario.rol,
+    })
@@ -3,6 +3,16 @@ ASGI config for manager_project_api project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+El canal de alertas en tiempo real (``/api/alertas/stream/``, Server-Sent
+Events) mantiene conexiones abiertas y solo escala servido desde aquí, p. ej.:
+
+    uvicorn manager_project_api.asgi:application
+
+Con ``API_LECTURAS_ASINCRONAS = True`` las lecturas de ``tasks/``, ``projects/``,
+``alertas/`` y ``me/`` usan vistas asíncronas (api/vistas_asincronas.py), y con
+``API_LOGIN['ASINCRONO']`` el login se verifica en un pool de hilos. Para comparar
+con el despliegue WSGI: ``python manage.py benchmark_concurrencia``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
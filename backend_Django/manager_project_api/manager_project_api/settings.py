@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,9 +49,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    # Consultas, tiempo SQL y render por vista (Server-Timing y /api/metrics/)
+    'api.instrumentacion.InstrumentacionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    # ETag a partir del contenido para las vistas que no calculan uno propio (usuarios)
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -89,9 +94,31 @@ DATABASES = {
         'PASSWORD': '',
         'HOST': 'localhost',
         'PORT': 3306,
+        # Conexiones persistentes: cada worker reutiliza la suya durante CONN_MAX_AGE
+        # segundos en lugar de abrir una por petición, y la comprueba antes de usarla
+        # tras un periodo sin uso. Con ASGI conviene CONN_MAX_AGE = 0 (cada petición
+        # asíncrona usa otro hilo) y un pool del lado del servidor (p. ej. ProxySQL).
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Réplicas de solo lectura: cada alias distinto de 'default' es una réplica y
+# api.replicas.RouterReplicas envía a ellas list, retrieve, me y filter_by_project.
+# En los tests apuntan a la base de 'default' (MIRROR). Por ejemplo:
+# DATABASES['replica'] = {**DATABASES['default'], 'HOST': 'replica-1', 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['api.replicas.RouterReplicas']
+
+# PEGAJOSO: segundos que las lecturas de un usuario van a la primaria después de que
+# escriba (retraso máximo esperado de las réplicas; con Redis como cache se comparte
+# entre procesos). REINTENTO: segundos sin probar una réplica que no acepta conexiones.
+API_REPLICAS = {
+    'ALIAS': [alias for alias in DATABASES if alias != 'default'],
+    'PEGAJOSO': 5,
+    'REINTENTO': 30,
+}
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -116,6 +143,10 @@ LOGGING = {
             'handlers': ['console'],
             'level': 'INFO',  # Cambia a DEBUG para más detalles
         },
+        'api': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
         'myapp': {  # Reemplaza 'myapp' con el nombre de tu aplicación
             'handlers': ['console'],
             'level': 'INFO',  # Cambia a DEBUG para más detalles
@@ -123,6 +154,28 @@ LOGGING = {
     },
 }
 
+# Hashers de contraseña: el primero se usa para las contraseñas nuevas y el resto solo
+# para verificar hashes antiguos, que se recalculan con el primero en el siguiente login.
+# Argon2 (pip install argon2-cffi) o bcrypt (pip install bcrypt) con costes ajustados en
+# api/hashers.py; sin ninguna de las dos librerías se mantiene PBKDF2.
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+if find_spec('bcrypt'):
+    PASSWORD_HASHERS.insert(0, 'api.hashers.BCryptAjustado')
+if find_spec('argon2'):
+    PASSWORD_HASHERS.insert(0, 'api.hashers.Argon2Ajustado')
+
+# Login: con ASINCRONO (solo al servir con ASGI) /api/login/ verifica la contraseña en un
+# pool de HILOS hilos y responde 503 si hay más de PENDIENTES logins en curso
+API_LOGIN = {
+    'ASINCRONO': False,
+    'HILOS': None,
+    'PENDIENTES': 100,
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -166,8 +219,116 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.JWTClaimsAuthentication',
     ],
+    # Paginación por cursor sobre el id; el cliente puede ajustar el tamaño con ?page_size=
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.IdCursorPagination',
+    'PAGE_SIZE': 100,
+    # Token bucket en memoria (api/throttling.py): capacidad = ráfaga, se recarga a la tasa
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.MutacionUsuarioThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '20/min',
+        'login_usuario': '5/min',
+        'registro_ip': '10/hour',
+        'mutacion': '120/min',
+    },
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+# Con orjson instalado, el JSON de las respuestas se codifica con orjson (mismos bytes)
+if find_spec('orjson'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'][0] = 'api.renderers.ORJSONRenderer'
+
+# Almacén de los cubos de throttling: 'api.throttling.CubosEnMemoria' (por proceso) o
+# 'api.throttling.CubosEnCache' (cache de Django; con Redis se comparte entre procesos)
+API_THROTTLE = {
+    'ACTIVO': True,
+    'BACKEND': 'api.throttling.CubosEnMemoria',
+    'CACHE': 'default',
+}
+
+# Cache de lecturas (tablero de tareas y listado de proyectos). Por defecto en memoria
+# local; para compartirla entre procesos se puede usar Redis, p. ej.:
+#   'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#   'LOCATION': 'redis://127.0.0.1:6379',
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api-lecturas',
+    }
+}
+
+API_CACHE_TIMEOUT = 300  # segundos
+
+# Filas por consulta en las exportaciones NDJSON (/api/tasks/export/, /api/usuarios/export/)
+API_EXPORT_LOTE = 2000
+
+# Estadísticas de /api/projects/stats/: con True se leen de los contadores por proyecto,
+# usuario y estado (api.models.ContadorTareas) que se actualizan al guardar o borrar
+# tareas, en lugar de un GROUP BY sobre la tabla de tareas. Tras activarlo:
+#   python manage.py recalcular_contadores
+API_CONTADORES_PROYECTO = False
+
+# Sincronización incremental (/api/sync/): cambios por respuesta, segundos de margen
+# antes de entregar un cambio (transacciones que confirman un id menor después de uno
+# mayor) y días que conserva el registro; los antiguos se eliminan con:
+#   python manage.py compactar_cambios
+API_SYNC = {
+    'LOTE': 1000,
+    'MARGEN': 2,
+    'RETENCION_DIAS': 30,
+}
+
+# Retención de alertas: python manage.py purgar_alertas (programarlo, p. ej. con cron)
+# elimina por lotes las alertas ocultas emitidas hace más de DIAS días y, con ARCHIVAR,
+# las copia antes a api_alertaarchivada. PAUSA: segundos entre lotes.
+API_RETENCION_ALERTAS = {
+    'DIAS': 90,
+    'LOTE': 1000,
+    'ARCHIVAR': False,
+    'PAUSA': 0,
+}
+
+# Búsqueda de texto completo (/api/search/): longitud mínima de un término (igual que
+# innodb_ft_min_token_size en MySQL), términos por búsqueda y resultados alcanzables
+# con ?offset= (cada página ordena todas las coincidencias anteriores)
+API_BUSQUEDA = {
+    'MIN_LONGITUD': 3,
+    'MAX_TERMINOS': 8,
+    'MAX_RESULTADOS': 1000,
+}
+
+# Cola de escritura de alertas: 'api.cola_alertas.ColaEnProceso' (hilo de fondo que
+# agrupa en bulk_create), 'api.cola_alertas.ColaBrokerLocal' (sustituto local de un
+# broker externo) o 'api.cola_alertas.ColaSincrona' (escribe dentro de la petición)
+ALERTAS_COLA = {
+    'BACKEND': 'api.cola_alertas.ColaEnProceso',
+    'TAMANO_LOTE': 500,
+    'INTERVALO': 0.2,
+}
+
+# Autenticación JWT sin consultar el usuario en cada petición: el id, username, nombre
+# y rol se leen de los claims firmados del token (api.authentication.JWTClaimsAuthentication).
+# Los cambios de rol o las bajas no se aplican hasta que el token expira.
+API_JWT_SIN_CONSULTA = False
+
+# Lecturas asíncronas (solo al servir con ASGI): GET de tasks/, projects/, alertas/ y
+# me/ con el ORM asíncrono en api/vistas_asincronas.py
+API_LECTURAS_ASINCRONAS = False
+
+# Instrumentación de peticiones (api.instrumentacion.InstrumentacionMiddleware): se
+# registran en el log las peticiones de más de LENTA_MS o con una misma sentencia SQL
+# repetida CONSULTAS_REPETIDAS veces. /api/metrics/ exige un JWT de admin o, si se
+# define TOKEN, ese Bearer; PUBLICO = True la deja abierta (solo en redes internas).
+API_INSTRUMENTACION = {
+    'LENTA_MS': 500,
+    'CONSULTAS_REPETIDAS': 10,
+    'TOKEN': None,
+    'PUBLICO': False,
 }
 
 SIMPLE_JWT = {
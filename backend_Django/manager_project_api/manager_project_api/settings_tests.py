@@ -0,0 +1,9 @@
+# Settings para ejecutar los tests con la base espejo del router de réplicas:
+#   python manage.py test --settings=manager_project_api.settings_tests
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+# 'espejo' no es una réplica (API_REPLICAS ya está calculado): en los tests es otra
+# conexión a la base de 'default' y ReplicaEspejoTests la usa para comprobar en qué
+# alias se ejecuta cada consulta.
+DATABASES = {**DATABASES, 'espejo': {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}}
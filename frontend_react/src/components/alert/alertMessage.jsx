@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react';
-import { eliminarAlerta, obtenerAlertas } from '../api/alerta.api'; // Importa tus funciones de API
+import { eliminarAlerta, marcarAlertasLeidas, obtenerAlertas } from '../../services/alert.service'; // Importa tus funciones de API
 import { Alerta } from '../types/alerta.type';
 
 const AlertMessage = ({ onClose }) => {
@@ -7,8 +7,8 @@ const AlertMessage = ({ onClose }) => {
 
   useEffect(() => {
     const fetchAlertas = async () => {
-      const fetchedAlertas = await obtenerAlertas();
-      setAlertas(fetchedAlertas.filter(alerta => alerta.visible === 1)); // Filtrar alertas visibles
+      const fetchedAlertas = await obtenerAlertas({ visible: true }); // Filtradas en el servidor
+      setAlertas(fetchedAlertas);
     };
 
     fetchAlertas();
@@ -20,12 +20,9 @@ const AlertMessage = ({ onClose }) => {
   };
 
   const handleMarkAsSeen = async () => {
-    // Aquí puedes hacer una actualización de las alertas para marcarlas como vistas (visible = 0)
-    await Promise.all(alertas.map(async (alerta) => {
-      // Actualizar la alerta (suponiendo que tienes un método para hacerlo)
-      // await actualizarAlerta(alerta.id, { visible: 0 }); 
-      alerta.visible = 0; // Marca como no visible en el estado
-    }));
+    // Una sola petición para todas las alertas mostradas, no una por alerta
+    if (alertas.length === 0) return;
+    await marcarAlertasLeidas(alertas[0].fecha_emision);
     setAlertas(prev => prev.map(alerta => ({ ...alerta, visible: 0 }))); // Actualiza el estado
   };
 
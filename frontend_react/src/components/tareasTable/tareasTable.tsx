@@ -41,6 +41,7 @@ const TasksTable: React.FC<{ isAdmin: boolean }> = ({ isAdmin }) => {
     proyecto: number;  // ID del proyecto asociado
     asignada_a: number;  // ID del usuario asignado
     estado: string;
+    version?: number;  // Versión leída: la API responde 409 si la tarea cambió después
   }>({
     id: 0,
     nombre: "",
@@ -155,6 +156,7 @@ const TasksTable: React.FC<{ isAdmin: boolean }> = ({ isAdmin }) => {
         asignada_a: auxTaskToEdit.asignada_a,
         proyecto: proyecto,
         estado: auxTaskToEdit.estado,
+        version: auxTaskToEdit.version,
       });
       setOpen(true);
     }
@@ -175,6 +177,8 @@ const TasksTable: React.FC<{ isAdmin: boolean }> = ({ isAdmin }) => {
         setSnackbarMessage('Error:' + error.response.data.msg);
         setSnackbarSeverity('error');
         setSnackbarOpen(true);
+        // 409: otra persona la modificó; se recarga para editar la versión actual
+        if (error.response?.status === 409) fetchProjects();
       });
     } else {
       console.error('Error: Task ID is undefined');
@@ -275,8 +279,9 @@ const TasksTable: React.FC<{ isAdmin: boolean }> = ({ isAdmin }) => {
                                 onChange={(e) => handleTaskStatusChange(task.id, e.target.value)}
                               >
                                 <MenuItem value="pendiente">Pendiente</MenuItem>
-                                <MenuItem value="en_progreso">En progreso</MenuItem>
-                                <MenuItem value="completada">Completada</MenuItem>
+                                <MenuItem value="desarrollo">En desarrollo</MenuItem>
+                                <MenuItem value="terminado">Terminado</MenuItem>
+                                <MenuItem value="observado">Observado</MenuItem>
                               </Select>
                             </FormControl>
                           </TableCell>
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { logout } from '../services/auth.service';
-import { obtenerAlertas, eliminarAlerta, actualizarVisibilidad } from './../services/alert.service';
+import { obtenerAlertas, contarAlertasNoLeidas, suscribirAlertas, eliminarAlerta, marcarAlertasLeidas } from './../services/alert.service';
 import { Alerta } from './../types/alert.type';
 import { User } from '../types/auth.types';
 import { getMe } from '../services/user.service';
@@ -49,13 +49,20 @@ const Dashboard: React.FC = () => {
 
     fetchUser();
     fetchAlerts(); // Fetch alerts when component mounts
+
+    // Las alertas nuevas llegan por el canal en tiempo real, sin volver a consultar
+    const cerrarSuscripcion = suscribirAlertas(alerta => {
+      setAlerts(prevAlerts => [alerta, ...prevAlerts]);
+      setUnseenCount(prevCount => prevCount + 1);
+    });
+    return cerrarSuscripcion;
   }, []);
 
   const fetchAlerts = () => {
-    obtenerAlertas().then(alerts => {
+    obtenerAlertas({ visible: true }).then(alerts => {
       setAlerts(alerts);
-      setUnseenCount(alerts.filter(alert => alert.visible === true).length);
     });
+    contarAlertasNoLeidas().then(setUnseenCount);
 
   };
 
@@ -84,7 +91,10 @@ const Dashboard: React.FC = () => {
   };
 
   const updateAlertsVisibility = () => {
-    actualizarVisibilidad(alerts.map(alert => alert.id)).then(() => {
+    // Una sola petición: oculta en el servidor las alertas emitidas hasta la más reciente
+    // que se muestra (las que lleguen mientras tanto siguen sin leer)
+    if (alerts.length === 0) return;
+    marcarAlertasLeidas(alerts[0].fecha_emision).then(() => {
       setAlerts(prevAlerts =>
         prevAlerts.map(alert => ({ ...alert, visible: false })) // Actualiza todas las alertas a visible = false
       );
@@ -1,5 +1,7 @@
 import axios from './../utils/axiosConfig';
-import { Alerta, CrearAlerta, ActualizarAlerta } from './../types/alert.type';
+import { obtenerTodasLasPaginas } from './../utils/pagination';
+import { REACT_APP_API_URL } from './../evn';
+import { Alerta, CrearAlerta, ActualizarAlerta, FiltroAlertas } from './../types/alert.type';
 
 // Crear una nueva alerta
 const crearAlerta = async (data: CrearAlerta): Promise<Alerta> => {
@@ -7,10 +9,29 @@ const crearAlerta = async (data: CrearAlerta): Promise<Alerta> => {
     return response.data;
 };
 
-// Obtener todas las alertas
-const obtenerAlertas = async (): Promise<Array<Alerta>> => {
-    const response = await axios.get<Alerta[]>('alertas/');
-    return response.data;
+// Obtener las alertas; el filtrado por visibilidad y fecha se hace en el servidor
+const obtenerAlertas = async (filtros: FiltroAlertas = {}): Promise<Array<Alerta>> => {
+    const params = new URLSearchParams();
+    if (filtros.visible !== undefined) params.set('visible', filtros.visible ? '1' : '0');
+    if (filtros.since) params.set('since', filtros.since);
+    const query = params.toString();
+    return obtenerTodasLasPaginas<Alerta>(query ? `alertas/?${query}` : 'alertas/');
+};
+
+// Número de alertas visibles (no leídas) sin descargarlas
+const contarAlertasNoLeidas = async (): Promise<number> => {
+    const response = await axios.get<{ unread: number }>('alertas/unread-count/');
+    return response.data.unread;
+};
+
+// Recibir las alertas nuevas en tiempo real (Server-Sent Events); devuelve la función para cerrar
+const suscribirAlertas = (onAlerta: (alerta: Alerta) => void): (() => void) => {
+    const token = localStorage.getItem('token') ?? '';
+    const fuente = new EventSource(`${REACT_APP_API_URL}alertas/stream/?token=${encodeURIComponent(token)}`);
+    fuente.addEventListener('alerta', (evento) => {
+        onAlerta(JSON.parse((evento as MessageEvent).data));
+    });
+    return () => fuente.close();
 };
 
 // Obtener una alerta específica
@@ -30,6 +51,13 @@ const eliminarAlerta = async (id: number): Promise<void> => {
     await axios.delete(`alertas/${id}/`);
 };
 
+// Marcar como leídas todas las alertas visibles del usuario (o solo las emitidas hasta
+// `antes`) con una sola petición; devuelve cuántas se han actualizado
+const marcarAlertasLeidas = async (antes?: string): Promise<number> => {
+    const response = await axios.post<{ actualizadas: number }>('alertas/mark-all-read/', antes ? { before: antes } : {});
+    return response.data.actualizadas;
+};
+
 // Actualizar la visibilidad de alertas
 export const actualizarVisibilidad = async (ids: number[]): Promise<void> => {
     try {
@@ -42,4 +70,4 @@ export const actualizarVisibilidad = async (ids: number[]): Promise<void> => {
   };
 
 // Exportar las funciones
-export { crearAlerta, obtenerAlertas, obtenerAlerta, actualizarAlerta, eliminarAlerta };
+export { crearAlerta, obtenerAlertas, contarAlertasNoLeidas, marcarAlertasLeidas, suscribirAlertas, obtenerAlerta, actualizarAlerta, eliminarAlerta };
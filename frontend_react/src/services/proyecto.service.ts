@@ -1,4 +1,5 @@
 import axios from './../utils/axiosConfig';
+import { obtenerTodasLasPaginas } from './../utils/pagination';
 import { Proyecto, CrearProyecto, ActualizarProyecto } from './../types/proyecto.type';
 
 // Crear un nuevo proyecto
@@ -9,8 +10,7 @@ const crearProyecto = async (data: CrearProyecto): Promise<Proyecto> => {
 
 // Obtener todos los proyectos
 const obtenerProyectos = async (): Promise<Array<Proyecto>> => {
-    const response = await axios.get<Proyecto[]>('projects/');
-    return response.data;
+    return obtenerTodasLasPaginas<Proyecto>('projects/');
 };
 
 const obtenerProyecto = async (id: number): Promise<Proyecto> => {
@@ -1,4 +1,5 @@
 import axios from './../utils/axiosConfig';
+import { obtenerTodasLasPaginas } from './../utils/pagination';
 import { Tarea, CrearTarea, ActualizarTarea, Proyecto } from './../types/tareas.type';
 
 // Crear una nueva tarea
@@ -9,8 +10,18 @@ const crearTarea = async (data: CrearTarea): Promise<Tarea> => {
 
 // Obtener todas las tareas
 const obtenerTareas = async (): Promise<Proyecto[]> => {
-    const response = await axios.get<Proyecto[]>('tasks/');
-    return response.data;
+    // Las páginas se cortan por tarea: un proyecto puede llegar en varias páginas
+    const grupos = await obtenerTodasLasPaginas<Proyecto>('tasks/');
+    const proyectos = new Map<number, Proyecto>();
+    for (const grupo of grupos) {
+        const existente = proyectos.get(grupo.id);
+        if (existente) {
+            existente.tareas = [...(existente.tareas ?? []), ...(grupo.tareas ?? [])];
+        } else {
+            proyectos.set(grupo.id, grupo);
+        }
+    }
+    return Array.from(proyectos.values());
 };
 
 const obtenerTarea = async (id: number): Promise<Tarea> => {
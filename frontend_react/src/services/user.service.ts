@@ -1,4 +1,5 @@
 import axios from './../utils/axiosConfig';
+import { obtenerTodasLasPaginas } from './../utils/pagination';
 import {  RegisterData, User } from '../types/auth.types';
 
 const getUser = async (id: string): Promise<User> => {
@@ -7,8 +8,7 @@ const getUser = async (id: string): Promise<User> => {
 }
 
 const getUsers = async (): Promise<Array<User>> => {
-    const response = await axios.get<User[]>(`usuarios/`);
-    return response.data;
+    return obtenerTodasLasPaginas<User>(`usuarios/`);
 }
 
 const getMe = async (): Promise<User> => {
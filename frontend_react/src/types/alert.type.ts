@@ -2,7 +2,7 @@ export interface Alerta {
     id: number;
     usuario: number; // ID del usuario al que se envía la alerta
     mensaje: string; // Mensaje de la alerta
-    fechaCreacion: string; // Fecha de creación de la alerta
+    fecha_emision: string; // Fecha de emisión de la alerta (ISO 8601)
     visible: boolean; // Visibilidad de la alerta
 }
 
@@ -13,4 +13,9 @@ export interface CrearAlerta {
 
 export interface ActualizarAlerta {
     mensaje: string; // Mensaje de la alerta
-}
\ No newline at end of file
+}
+
+export interface FiltroAlertas {
+    visible?: boolean; // Solo alertas visibles (true) u ocultas (false)
+    since?: string; // Fecha ISO 8601: solo alertas emitidas después
+}
@@ -5,6 +5,7 @@ export interface Tarea {
     estado: string;
     proyecto: Proyecto; // Proyecto asociado
     asignada_a: number; // ID del usuario asignado
+    version: number; // Se incrementa con cada cambio
 }
 
 export interface CrearTarea {
@@ -20,6 +21,7 @@ export interface ActualizarTarea {
     descripcion?: string;
     asignada_a?: number; // ID del usuario asignado
     estado?: string;
+    version?: number; // Versión leída; si la tarea cambió después, la API responde 409
 }
 
 export interface Tarea {
@@ -28,6 +30,7 @@ export interface Tarea {
     descripcion: string;
     estado: string; // Puede ser 'pendiente', 'en desarrollo', 'completada', etc.
     asignada_a: number; // ID del usuario asignado
+    version: number;
 }
 
 export interface Proyecto {
@@ -0,0 +1,20 @@
+import axios from './axiosConfig';
+
+// Respuesta de los listados paginados por cursor de la API
+export interface PaginaCursor<T> {
+    next: string | null;
+    previous: string | null;
+    results: T[];
+}
+
+// Recorre todas las páginas de un listado siguiendo el cursor `next`
+export const obtenerTodasLasPaginas = async <T>(url: string): Promise<T[]> => {
+    const resultados: T[] = [];
+    let siguiente: string | null = url;
+    while (siguiente) {
+        const response: { data: PaginaCursor<T> } = await axios.get<PaginaCursor<T>>(siguiente);
+        resultados.push(...response.data.results);
+        siguiente = response.data.next;
+    }
+    return resultados;
+};